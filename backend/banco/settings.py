@@ -65,6 +65,10 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend'
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'clientes.renderers.ORJSONRenderer',  # Misma salida que JSONRenderer, codificada con orjson
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_THROTTLE_CLASSES': [
         'rest_framework.throttling.AnonRateThrottle',
         'rest_framework.throttling.UserRateThrottle',
@@ -198,6 +202,52 @@ else:
     }
 
 
+# Cachés
+# 'respuestas' guarda respuestas de la API por versión de datos (clientes/respuestas.py)
+# y 'clientes' la representación de cada cliente (clientes/cache_clientes.py).
+# Con CACHE_DIR se comparten en disco entre los workers de gunicorn. Sin él quedan
+# en memoria de cada proceso: las claves de 'respuestas' llevan la versión de datos
+# y 'clientes' comprueba la secuencia de cambio de la fila en cada acierto, porque
+# no ve las invalidaciones de los otros workers. Ambas descartan por LRU al superar
+# su límite de bytes.
+CACHE_DIR = os.getenv('CACHE_DIR', '')
+RESPUESTAS_CACHE_MAX_BYTES = int(os.getenv('RESPUESTAS_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+CLIENTES_CACHE_MAX_BYTES = int(os.getenv('CLIENTES_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+# Las invalidaciones son explícitas; el plazo solo acota cuánto vive una entrada sin uso
+CLIENTES_CACHE_TIMEOUT = int(os.getenv('CLIENTES_CACHE_TIMEOUT', 60))
+# Segundos que estadisticas-generales y agregados pueden servirse obsoletos mientras
+# se recalculan en segundo plano (clientes/revalidacion.py); 0 recalcula en la petición
+ESTADISTICAS_MAX_OBSOLETA = int(os.getenv('ESTADISTICAS_MAX_OBSOLETA', 300))
+# Segundos que una petición espera el mismo cálculo en curso en otro hilo o worker
+# (clientes/coalescencia.py) antes de calcular por su cuenta
+ESTADISTICAS_ESPERA_MAXIMA = float(os.getenv('ESTADISTICAS_ESPERA_MAXIMA', 10))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'respuestas': {
+        'BACKEND': 'clientes.cache.ArchivoLRUCache' if CACHE_DIR else 'clientes.cache.MemoriaLRUCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'respuestas') if CACHE_DIR else 'respuestas',
+        # Las claves llevan la versión de datos: no hace falta que expiren por tiempo
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': 100_000,
+            'MAX_BYTES': RESPUESTAS_CACHE_MAX_BYTES,
+        },
+    },
+    'clientes': {
+        'BACKEND': 'clientes.cache.ArchivoLRUCache' if CACHE_DIR else 'clientes.cache.MemoriaLRUCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'clientes') if CACHE_DIR else 'clientes',
+        'TIMEOUT': CLIENTES_CACHE_TIMEOUT,
+        'OPTIONS': {
+            'MAX_ENTRIES': 100_000,
+            'MAX_BYTES': CLIENTES_CACHE_MAX_BYTES,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
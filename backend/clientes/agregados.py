@@ -0,0 +1,147 @@
+"""
+Agregación por grupos en el servidor para los gráficos del dashboard.
+
+Cada petición se resuelve con un único ``GROUP BY``: el tamaño de la respuesta
+depende de la cantidad de grupos, no de la cantidad de clientes.
+"""
+from django.db.models import Avg, Case, CharField, Count, IntegerField, Max, Q, Sum, Value, When
+from rest_framework import serializers
+
+from .campos import PromedioCentavos
+from .estadisticas import RANGOS_EDAD, filtro_rango_edad
+from .versionado import subconsulta_actualizado, subconsulta_version
+
+# (etiqueta, saldo mínimo inclusive, saldo máximo exclusivo o None)
+RANGOS_SALDO = [
+    ('0-10k', 0, 10000),
+    ('10k-25k', 10000, 25000),
+    ('25k-50k', 25000, 50000),
+    ('50k-75k', 50000, 75000),
+    ('75k-100k', 75000, 100000),
+    ('100k+', 100000, None),
+]
+
+
+def _filtros_edad():
+    return [(etiqueta, filtro_rango_edad(minima, maxima)) for etiqueta, minima, maxima, _ in RANGOS_EDAD]
+
+
+def _filtros_saldo():
+    return [
+        (etiqueta, Q(saldo__gte=minimo) if maximo is None else Q(saldo__gte=minimo, saldo__lt=maximo))
+        for etiqueta, minimo, maximo in RANGOS_SALDO
+    ]
+
+
+def _expresion_rango(filtros):
+    return Case(
+        *[When(filtro, then=Value(etiqueta)) for etiqueta, filtro in filtros],
+        default=Value(None),
+        output_field=CharField(),
+    )
+
+
+def _posicion_rango(filtros):
+    """Posición del rango en su lista, para ordenar los grupos como los rangos y no por etiqueta"""
+    return Case(
+        *[When(filtro, then=Value(posicion)) for posicion, (_, filtro) in enumerate(filtros)],
+        default=Value(len(filtros)),
+        output_field=IntegerField(),
+    )
+
+
+# Dimensiones de agrupación: nombre público -> filtros de sus rangos (None = columna directa)
+DIMENSIONES = {
+    'genero': None,
+    'activo': None,
+    'nivel_de_satisfaccion': None,
+    'edad_bucket': _filtros_edad,
+    'saldo_bucket': _filtros_saldo,
+}
+
+# Métricas: nombre público -> (expresión, conversión del valor)
+METRICAS = {
+    'count': (lambda: Count('pk'), int),
+    'avg_saldo': (lambda: PromedioCentavos('saldo'), lambda valor: round(float(valor), 2)),
+    'sum_saldo': (lambda: Sum('saldo'), lambda valor: round(float(valor), 2)),
+    'avg_edad': (lambda: Avg('edad'), lambda valor: round(float(valor), 2)),
+}
+
+
+def _parsear_lista(valor, permitidos, parametro, por_defecto):
+    if not valor:
+        return list(por_defecto)
+    elementos = [elemento.strip() for elemento in valor.split(',') if elemento.strip()]
+    invalidos = [elemento for elemento in elementos if elemento not in permitidos]
+    if invalidos:
+        raise serializers.ValidationError({
+            parametro: [f"Valores no soportados: {', '.join(invalidos)}. "
+                        f"Opciones: {', '.join(permitidos)}"]
+        })
+    # Sin duplicados, conservando el orden pedido
+    return list(dict.fromkeys(elementos))
+
+
+def parsear_parametros(query_params):
+    """Valida ``group_by`` y ``metrics``; lanza ValidationError (400) si no son válidos"""
+    dimensiones = _parsear_lista(query_params.get('group_by'), DIMENSIONES, 'group_by', [])
+    metricas = _parsear_lista(query_params.get('metrics'), METRICAS, 'metrics', ['count'])
+    return dimensiones, metricas
+
+
+def calcular_agregados_por_grupo(queryset, dimensiones, metricas, leer_version=False):
+    """
+    Agrega ``queryset`` por ``dimensiones`` en una sola consulta.
+
+    Devuelve una tabla compacta: ``columnas`` (dimensiones y luego métricas)
+    y ``filas`` como listas, ordenadas por las dimensiones (los rangos en el
+    orden de ``RANGOS_EDAD`` y ``RANGOS_SALDO``). Con
+    ``leer_version`` devuelve además ``(version, actualizado)`` de los datos,
+    leída en la misma consulta (None si no hay filas).
+    """
+    rangos = {
+        dimension: DIMENSIONES[dimension]()
+        for dimension in dimensiones if DIMENSIONES[dimension] is not None
+    }
+    queryset = queryset.order_by()
+    if rangos:
+        queryset = queryset.annotate(**{
+            dimension: _expresion_rango(filtros) for dimension, filtros in rangos.items()
+        })
+    orden = list(dimensiones)
+    if dimensiones:
+        queryset = queryset.values(*dimensiones)
+        if rangos:
+            # Depende solo de la etiqueta: entra en el GROUP BY sin cambiar los grupos
+            queryset = queryset.annotate(**{
+                f'_posicion_{dimension}': _posicion_rango(filtros) for dimension, filtros in rangos.items()
+            })
+            orden = [f'_posicion_{dimension}' if dimension in rangos else dimension for dimension in dimensiones]
+    expresiones = {metrica: METRICAS[metrica][0]() for metrica in metricas}
+    if leer_version:
+        expresiones.update(_version=Max(subconsulta_version()), _actualizado=Max(subconsulta_actualizado()))
+
+    if dimensiones:
+        resultados = queryset.annotate(**expresiones).order_by(*orden)
+    else:
+        resultados = [queryset.aggregate(**expresiones)]
+
+    filas = []
+    version_datos = None
+    for resultado in resultados:
+        if leer_version and resultado['_version'] is not None:
+            version_datos = (resultado['_version'], resultado['_actualizado'])
+        fila = [resultado[dimension] for dimension in dimensiones]
+        for metrica in metricas:
+            valor = resultado[metrica]
+            fila.append(METRICAS[metrica][1](valor) if valor is not None else None)
+        filas.append(fila)
+
+    data = {
+        'columnas': dimensiones + metricas,
+        'filas': filas,
+        'total_grupos': len(filas),
+    }
+    if leer_version:
+        return data, version_datos
+    return data
@@ -0,0 +1,111 @@
+"""
+Suites de benchmark para ``manage.py benchmark``.
+
+Cada suite recibe un queryset con la página a medir y la cantidad de
+repeticiones, y devuelve ``(mediciones, verificaciones)``: la primera
+medición es la referencia (la implementación original) y las verificaciones
+confirman que las variantes producen el mismo resultado.
+"""
+import random
+import time
+from collections import namedtuple
+from decimal import Decimal
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+from .lectura import CAMPOS_CONSULTA, representar
+from .renderers import ColumnarJSONRenderer, MessagePackRenderer, ORJSONRenderer, msgpack
+from .models import Cliente
+from .serializers import ClienteSerializer
+
+Medicion = namedtuple('Medicion', ['nombre', 'segundos', 'tamano'])
+
+
+def generar_clientes(cantidad, semilla=0, tamano_lote=5000):
+    """Inserta ``cantidad`` clientes sintéticos reproducibles"""
+    azar = random.Random(semilla)
+    lote = []
+    for _ in range(cantidad):
+        lote.append(Cliente(
+            edad=azar.randint(18, 90),
+            genero=azar.choice('MF'),
+            saldo=Decimal(azar.randint(0, 20000000)) / 100,
+            activo=azar.random() < 0.8,
+            nivel_de_satisfaccion=azar.randint(1, 5),
+        ))
+        if len(lote) >= tamano_lote:
+            Cliente.objects.bulk_create(lote)
+            lote = []
+    if lote:
+        Cliente.objects.bulk_create(lote)
+
+
+def cronometrar(funcion, repeticiones):
+    """Mejor tiempo de ``repeticiones`` ejecuciones y el resultado de la última"""
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor, resultado
+
+
+def suite_serializacion(queryset, repeticiones):
+    """ClienteSerializer sobre instancias frente a la lectura rápida desde tuplas (consulta + JSON)"""
+    renderer = JSONRenderer()
+
+    def con_serializer():
+        return renderer.render(ClienteSerializer(list(queryset), many=True).data)
+
+    def con_lectura_rapida():
+        return renderer.render(representar(queryset.values_list(*CAMPOS_CONSULTA)))
+
+    segundos_original, original = cronometrar(con_serializer, repeticiones)
+    segundos_rapida, rapida = cronometrar(con_lectura_rapida, repeticiones)
+    mediciones = [
+        Medicion('ClienteSerializer', segundos_original, len(original)),
+        Medicion('Lectura rápida (values_list)', segundos_rapida, len(rapida)),
+    ]
+    return mediciones, {'Salida idéntica byte a byte': original == rapida}
+
+
+def suite_renderers(queryset, repeticiones):
+    """Tiempo de codificación y tamaño de una página del listado en cada formato"""
+    data = {
+        'count': len(queryset),
+        'next': None,
+        'previous': None,
+        'results': representar(queryset.values_list(*CAMPOS_CONSULTA)),
+    }
+    renderers = [
+        ('JSONRenderer (json estándar)', JSONRenderer()),
+        ('ORJSONRenderer', ORJSONRenderer()),
+        ('Columnar JSON (?format=columnas)', ColumnarJSONRenderer()),
+    ]
+    if msgpack is not None:
+        renderers.append(('MessagePack (?format=msgpack)', MessagePackRenderer()))
+
+    mediciones, salidas = [], []
+    for nombre, renderer in renderers:
+        segundos, salida = cronometrar(lambda: renderer.render(data), repeticiones)
+        mediciones.append(Medicion(nombre, segundos, len(salida)))
+        salidas.append(salida)
+
+    columnas = orjson.loads(salidas[2])['results']
+    verificaciones = {
+        'orjson idéntico a JSONRenderer': salidas[1] == salidas[0],
+        'Columnas reconstruyen las filas': [
+            dict(zip(columnas, valores)) for valores in zip(*columnas.values())
+        ] == data['results'],
+    }
+    if msgpack is not None:
+        verificaciones['MessagePack decodifica los mismos datos'] = msgpack.unpackb(salidas[3]) == data
+    return mediciones, verificaciones
+
+
+SUITES = {
+    'serializacion': suite_serializacion,
+    'renderers': suite_renderers,
+}
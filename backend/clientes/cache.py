@@ -0,0 +1,181 @@
+"""
+Backends de caché acotados por bytes con expulsión LRU.
+
+Los backends de Django limitan la cantidad de entradas (``MAX_ENTRIES``),
+no la memoria, y ``FileBasedCache`` descarta entradas al azar. Para
+respuestas de la API, cuyo tamaño va de unos cientos de bytes a varios MB,
+el límite útil es en bytes y conviene descartar las menos usadas:
+
+- ``MemoriaLRUCache``: memoria local del proceso (como ``LocMemCache``).
+- ``ArchivoLRUCache``: archivos en un directorio, compartidos entre workers.
+
+Ambos aceptan ``OPTIONS['MAX_BYTES']`` además de las opciones estándar.
+"""
+import itertools
+import os
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# Límite por defecto de cada caché
+MAX_BYTES = 64 * 1024 * 1024
+# ArchivoLRUCache: escrituras entre dos recorridos del directorio y segundos
+# mínimos entre dos actualizaciones de la fecha de uso de un archivo
+CULL_CADA = 100
+RESOLUCION_USO = 60
+
+_AUSENTE = object()
+
+
+class _Uso:
+    """Tamaño de cada entrada y total, compartidos por las instancias de un mismo nombre"""
+
+    def __init__(self):
+        self.tamanos = {}
+        self.total = 0
+
+    def fijar(self, clave, tamano):
+        self.quitar(clave)
+        self.tamanos[clave] = tamano
+        self.total += tamano
+
+    def quitar(self, clave):
+        self.total -= self.tamanos.pop(clave, 0)
+
+    def vaciar(self):
+        self.tamanos.clear()
+        self.total = 0
+
+
+_usos = {}
+_escrituras = {}
+
+
+class MemoriaLRUCache(LocMemCache):
+    """
+    ``LocMemCache`` acotado por bytes.
+
+    ``LocMemCache`` ya mantiene el orden de uso (cada lectura mueve la entrada
+    al frente); aquí cada entrada cuenta el tamaño de su valor serializado y,
+    al guardar, se expulsan las menos usadas hasta que la nueva entre bajo
+    ``MAX_BYTES`` y ``MAX_ENTRIES``. Un valor más grande que el límite no se
+    guarda.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self.max_bytes = int(params.get('OPTIONS', {}).get('MAX_BYTES', MAX_BYTES))
+        self._uso = _usos.setdefault(name, _Uso())
+
+    @property
+    def bytes_usados(self):
+        return self._uso.total
+
+    def __len__(self):
+        return len(self._cache)
+
+    def _set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self._delete(key)
+        if len(value) > self.max_bytes:
+            return
+        while self._cache and (len(self._cache) >= self._max_entries
+                               or self._uso.total + len(value) > self.max_bytes):
+            # La menos usada está al final
+            expulsada, _ = self._cache.popitem()
+            del self._expire_info[expulsada]
+            self._uso.quitar(expulsada)
+        super()._set(key, value, timeout)
+        self._uso.fijar(key, len(value))
+
+    def _delete(self, key):
+        self._uso.quitar(key)
+        return super()._delete(key)
+
+    def incr(self, key, delta=1, version=None):
+        valor = super().incr(key, delta, version)
+        clave = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            if clave in self._cache:
+                self._uso.fijar(clave, len(self._cache[clave]))
+        return valor
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._expire_info.clear()
+            self._uso.vaciar()
+
+
+class ArchivoLRUCache(FileBasedCache):
+    """
+    ``FileBasedCache`` acotado por bytes que descarta las entradas menos usadas.
+
+    La fecha de modificación de cada archivo marca su último uso: una lectura
+    exitosa la actualiza si tiene más de ``OPTIONS['RESOLUCION_USO']``
+    segundos, así los aciertos frecuentes no escriben en el disco. Cada
+    ``OPTIONS['CULL_CADA']`` escrituras del proceso se recorre el directorio
+    y, si supera ``MAX_BYTES`` o ``MAX_ENTRIES``, se borran los archivos más
+    antiguos hasta liberar ``1/CULL_FREQUENCY`` del límite (como
+    ``FileBasedCache``, pero por uso en lugar de al azar). El límite es
+    aproximado: entre dos recorridos puede excederse en esas escrituras.
+    """
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        opciones = params.get('OPTIONS', {})
+        self.max_bytes = int(opciones.get('MAX_BYTES', MAX_BYTES))
+        self.cull_cada = int(opciones.get('CULL_CADA', CULL_CADA))
+        self.resolucion_uso = float(opciones.get('RESOLUCION_USO', RESOLUCION_USO))
+        # Compartido por las instancias (una por hilo) del mismo directorio
+        self._escrituras = _escrituras.setdefault(self._dir, itertools.count(1))
+
+    def get(self, key, default=None, version=None):
+        valor = super().get(key, _AUSENTE, version)
+        if valor is _AUSENTE:
+            return default
+        ruta = self._key_to_file(key, version)
+        try:
+            if time.time() - os.stat(ruta).st_mtime >= self.resolucion_uso:
+                os.utime(ruta)
+        except FileNotFoundError:
+            pass
+        return valor
+
+    def _archivos(self):
+        """[(fecha de uso, tamaño, ruta)] de las entradas existentes"""
+        archivos = []
+        for ruta in self._list_cache_files():
+            try:
+                estado = os.stat(ruta)
+            except FileNotFoundError:
+                continue
+            archivos.append((estado.st_mtime, estado.st_size, ruta))
+        return archivos
+
+    @property
+    def bytes_usados(self):
+        return sum(tamano for _, tamano, _ in self._archivos())
+
+    def __len__(self):
+        return len(self._list_cache_files())
+
+    def _cull(self):
+        if next(self._escrituras) % self.cull_cada:
+            return
+        archivos = self._archivos()
+        total = sum(tamano for _, tamano, _ in archivos)
+        if len(archivos) < self._max_entries and total <= self.max_bytes:
+            return
+        if self._cull_frequency == 0:
+            return self.clear()
+        fraccion = 1 - 1 / self._cull_frequency
+        max_entradas, max_bytes = int(self._max_entries * fraccion), self.max_bytes * fraccion
+        restantes = len(archivos)
+        for _, tamano, ruta in sorted(archivos):
+            if restantes <= max_entradas and total <= max_bytes:
+                break
+            self._delete(ruta)
+            restantes -= 1
+            total -= tamano
@@ -0,0 +1,126 @@
+"""
+Caché por objeto de la representación de cada cliente (detalle y sus estadísticas).
+
+Cada entrada guarda el dict que devuelve ``representar_fila`` junto con la
+secuencia de cambio de la fila, que da el ETag del detalle, y el momento
+del último cambio de los datos, que da el Last-Modified. Se lee a través de
+la caché: un fallo carga la fila y la guarda.
+
+Las señales de Cliente invalidan la entrada del cliente guardado o eliminado
+(``post_save``/``post_delete``) y la importación en modo merge la de los
+clientes que actualiza; las demás escrituras masivas no informan los IDs y
+vacían la caché. El almacén es el alias ``clientes`` de ``CACHES``, acotado
+por bytes con expulsión LRU. Con ``CACHE_DIR`` está en disco y lo comparten
+los workers: una invalidación vale para todos y un acierto no consulta la
+base de datos. Sin él cada proceso tiene el suyo en memoria y no ve las
+invalidaciones de los demás, así que un acierto se confirma con la secuencia
+de cambio de la fila (una consulta por clave primaria); ninguno sirve una
+entrada (ni su ETag) anterior a la última escritura.
+"""
+from collections import namedtuple
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+from .lectura import CAMPOS_CONSULTA, representar_fila
+from .models import Cliente
+from .respuestas import metricas
+from .versionado import obtener_version, subconsulta_actualizado
+
+CACHE_CLIENTES = 'clientes'
+# IDs por consulta al calentar y máximo por solicitud de calentar-cache
+TAMANO_LOTE = 1000
+MAXIMO_CALENTAR = 10000
+
+Entrada = namedtuple('Entrada', ['datos', 'secuencia', 'actualizado'])
+
+
+class CacheClientes:
+    """Representaciones de clientes por ID, leídas a través de la caché"""
+
+    @property
+    def almacen(self):
+        return caches[CACHE_CLIENTES]
+
+    @property
+    def compartida(self):
+        """Si el almacén lo comparten los workers (en memoria cada proceso tiene el suyo)"""
+        return not isinstance(self.almacen, LocMemCache)
+
+    @staticmethod
+    def clave(cliente_id):
+        return f'cliente:{cliente_id}'
+
+    def obtener(self, cliente_id):
+        """``Entrada`` del cliente, o None si no existe; si no está en caché la carga"""
+        entrada = self.almacen.get(self.clave(cliente_id))
+        if entrada is not None and (self.compartida or self._vigente(cliente_id, entrada)):
+            metricas.registrar('clientes.aciertos')
+            return entrada
+        metricas.registrar('clientes.fallos')
+        return self.calentar([cliente_id]).get(cliente_id)
+
+    @staticmethod
+    def _vigente(cliente_id, entrada):
+        """Si la fila sigue en la secuencia de la entrada (otro worker pudo modificarla)"""
+        return Cliente.objects.filter(pk=cliente_id, secuencia_cambio=entrada.secuencia).exists()
+
+    def calentar(self, ids):
+        """Carga en la caché los clientes de ``ids`` (una consulta por lote) y devuelve ``{id: Entrada}``"""
+        ids = list(dict.fromkeys(ids))
+        entradas = {}
+        for inicio in range(0, len(ids), TAMANO_LOTE):
+            filas = Cliente.objects.filter(pk__in=ids[inicio:inicio + TAMANO_LOTE]).annotate(
+                actualizado_datos=subconsulta_actualizado(),
+            ).values_list(*CAMPOS_CONSULTA, 'secuencia_cambio', 'actualizado_datos')
+            for fila in filas:
+                actualizado = fila[-1]
+                if actualizado is None:
+                    # Todavía no hay snapshot: se construye para fijar la fecha
+                    actualizado = obtener_version()[1]
+                entradas[fila[0]] = Entrada(representar_fila(fila), fila[-2], actualizado)
+        if entradas:
+            self.almacen.set_many({self.clave(cliente_id): entrada for cliente_id, entrada in entradas.items()})
+            metricas.registrar('clientes.cargadas', len(entradas))
+        return entradas
+
+    def invalidar(self, ids):
+        """Descarta las entradas de ``ids`` ahora y al confirmar la transacción"""
+        claves = [self.clave(cliente_id) for cliente_id in ids]
+        self.almacen.delete_many(claves)
+        # Un lector pudo volver a cargar la fila anterior antes del commit
+        transaction.on_commit(lambda: self.almacen.delete_many(claves))
+        metricas.registrar('clientes.invalidadas', len(claves))
+
+    def vaciar(self):
+        """Descarta todas las entradas ahora y al confirmar la transacción"""
+        self.almacen.clear()
+        transaction.on_commit(self.almacen.clear)
+        metricas.registrar('clientes.vaciados')
+
+
+cache_clientes = CacheClientes()
+
+
+def version_cliente(vista, request, *args, **kwargs):
+    """
+    ``(secuencia, actualizado)`` del cliente pedido, para ``respuesta_condicional``.
+
+    Lee la entrada de la caché (cargándola si falta), así un ``If-None-Match``
+    vigente se responde sin consultas (con una si la caché es del proceso).
+    Sin lectura rápida se usa la versión global, como en el resto de las acciones.
+    """
+    if not vista.lectura_rapida:
+        return obtener_version()
+    entrada = obtener_entrada(vista.kwargs[vista.lookup_url_kwarg or vista.lookup_field])
+    return None if entrada is None else (entrada.secuencia, entrada.actualizado)
+
+
+def obtener_entrada(cliente_id):
+    """Entrada del cliente por el valor de la URL; None si no es un ID o no existe"""
+    try:
+        cliente_id = int(cliente_id)
+    except (TypeError, ValueError):
+        return None
+    return cache_clientes.obtener(cliente_id)
@@ -0,0 +1,82 @@
+"""
+Sincronización incremental de clientes.
+
+Cada escritura numera las filas que toca con ``secuencia_cambio`` y cada
+eliminación deja una marca en ``ClienteEliminado``. Un consumidor guarda la
+última secuencia sincronizada y pide solo lo ocurrido después, recorrido por
+``(secuencia_cambio, cliente_id)`` con paginación keyset.
+"""
+from django.db.models import Q
+from rest_framework import serializers
+
+from .models import Cliente, ClienteEliminado
+
+LIMITE_POR_DEFECTO = 1000
+LIMITE_MAXIMO = 10000
+
+
+def _entero(query_params, parametro, minimo):
+    valor = query_params.get(parametro)
+    if valor in (None, ''):
+        return None
+    try:
+        valor = int(valor)
+    except ValueError:
+        valor = None
+    if valor is None or valor < minimo:
+        raise serializers.ValidationError({parametro: [f'Debe ser un entero mayor o igual a {minimo}']})
+    return valor
+
+
+def parsear_consulta(query_params):
+    """Valida ``desde``, ``despues_de`` y ``limite``; lanza ValidationError (400) si no son válidos"""
+    desde = _entero(query_params, 'desde', 0)
+    despues_de = _entero(query_params, 'despues_de', 0)
+    limite = _entero(query_params, 'limite', 1) or LIMITE_POR_DEFECTO
+    if despues_de is not None and desde is None:
+        raise serializers.ValidationError({'despues_de': ['Requiere el parámetro desde']})
+    return desde, despues_de, min(limite, LIMITE_MAXIMO)
+
+
+def _posteriores(queryset, desde, despues_de, hasta):
+    posteriores = Q(secuencia_cambio__gt=desde)
+    if despues_de is not None:
+        posteriores |= Q(secuencia_cambio=desde, cliente_id__gt=despues_de)
+    return queryset.filter(posteriores, secuencia_cambio__lte=hasta).order_by('secuencia_cambio', 'cliente_id')
+
+
+def obtener_cambios(desde, despues_de, limite, hasta):
+    """
+    Cambios con secuencia posterior a ``desde`` y hasta ``hasta`` inclusive.
+
+    ``hasta`` debe leerse antes de llamar: las secuencias se confirman en orden,
+    así que todo cambio hasta ese valor ya es visible. Sin ``desde`` devuelve
+    toda la tabla y ninguna eliminación. Devuelve ``(clientes, eliminados,
+    ultimo)``, con ``ultimo = (secuencia, cliente_id)`` del último cambio
+    incluido si quedan más, o ``None``.
+    """
+    completa = desde is None
+    if completa:
+        desde, despues_de = -1, None
+
+    clientes = list(_posteriores(Cliente.objects.all(), desde, despues_de, hasta)[:limite + 1])
+    eliminados = []
+    if not completa:
+        eliminados = list(
+            _posteriores(ClienteEliminado.objects.all(), desde, despues_de, hasta)
+            .values_list('secuencia_cambio', 'cliente_id')[:limite + 1]
+        )
+
+    cambios = sorted(
+        [((cliente.secuencia_cambio, cliente.cliente_id), cliente) for cliente in clientes]
+        + [(clave, None) for clave in eliminados],
+        key=lambda cambio: cambio[0],
+    )
+    ultimo = cambios[limite - 1][0] if len(cambios) > limite else None
+    cambios = cambios[:limite]
+
+    return (
+        [cliente for _, cliente in cambios if cliente is not None],
+        [cliente_id for (_, cliente_id), cliente in cambios if cliente is None],
+        ultimo,
+    )
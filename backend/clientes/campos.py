@@ -0,0 +1,75 @@
+"""
+Campos de modelo propios de la app.
+"""
+from decimal import Decimal
+
+from django.db import models
+from django.db.backends.utils import format_number
+
+
+class CentavosField(models.DecimalField):
+    """
+    Decimal almacenado como entero en la unidad mínima (centavos con ``decimal_places=2``).
+
+    Hacia Python, formularios y serializers se comporta como ``DecimalField``
+    (mismo ``to_python``, validadores y redondeo), pero la columna es un
+    ``BIGINT``: sumar, ordenar e indexar no pasan por ``NUMERIC`` y leer un
+    valor es una multiplicación. Los valores de las búsquedas
+    (``saldo__gte=100``) se convierten a centavos igual que al guardar.
+
+    ``Sum``, ``Min`` y ``Max`` conservan este campo como tipo de salida; para
+    promediar se usa ``PromedioCentavos``. En la aritmética con ``F()`` los
+    literales se interpretan en centavos salvo que se declaren como
+    ``Value(x, output_field=CentavosField())``.
+    """
+
+    description = 'Decimal almacenado como entero de centavos'
+
+    def __init__(self, *args, max_digits=18, decimal_places=2, **kwargs):
+        # 18 dígitos caben en un BIGINT con cualquier cantidad de decimales
+        super().__init__(*args, max_digits=max_digits, decimal_places=decimal_places, **kwargs)
+
+    def get_internal_type(self):
+        return 'BigIntegerField'
+
+    def a_centavos(self, valor):
+        """Decimal -> entero en la unidad mínima, con el redondeo de ``DecimalField``"""
+        return int(Decimal(format_number(valor, self.max_digits, self.decimal_places)).scaleb(self.decimal_places))
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        # Enteros salvo en Avg (float o Decimal según el motor)
+        if not isinstance(value, int):
+            value = Decimal(str(value))
+        return Decimal(value).scaleb(-self.decimal_places)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if value is None or hasattr(value, 'as_sql'):
+            return value
+        return self.a_centavos(value)
+
+    def get_db_prep_save(self, value, connection):
+        if hasattr(value, 'as_sql'):
+            return value
+        return self.get_db_prep_value(value, connection)
+
+
+class PromedioCentavos(models.Avg):
+    """
+    ``Avg`` de un ``CentavosField`` en unidades, conservando la fracción de centavo.
+
+    ``Avg`` resuelve su tipo como un ``DecimalField`` genérico (devolvería
+    centavos) y con ``output_field=CentavosField()`` la conversión genérica de
+    enteros truncaría el promedio antes de pasarlo a unidades.
+    """
+
+    def __init__(self, expression, **extra):
+        super().__init__(expression, output_field=CentavosField(), **extra)
+
+    @property
+    def convert_value(self):
+        # Solo se aplica from_db_value del campo
+        return self._convert_value_noop
@@ -0,0 +1,120 @@
+"""
+Coalescencia de cálculos concurrentes (single flight).
+
+Cuando varias peticiones necesitan el mismo cálculo a la vez, solo una lo
+ejecuta y las demás esperan y leen el resultado que guardó. Dentro del worker
+la espera es entre hilos; entre workers, un archivo de bloqueo en
+``CACHE_DIR/bloqueos`` cumple el mismo papel, ya que el resultado se comparte
+por la caché en disco. Si el resultado no aparece (el cálculo falló o no se
+guardó) o la espera supera el máximo, quien esperaba calcula por su cuenta.
+
+Sin ``CACHE_DIR`` las cachés son de cada proceso y no hay nada que compartir
+entre workers: la coalescencia es solo dentro del worker (también sin
+``fcntl``, por ejemplo en Windows).
+"""
+import hashlib
+import os
+import threading
+import time
+
+from django.conf import settings
+
+from .respuestas import metricas
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Archivos de bloqueo: las claves se reparten en franjas para no crear uno por URL
+FRANJAS_BLOQUEO = 256
+INTERVALO_ESPERA = 0.05
+
+
+def ruta_bloqueo(clave):
+    """Archivo de bloqueo entre workers para ``clave``, o None si no se comparten cachés"""
+    if not settings.CACHE_DIR or fcntl is None:
+        return None
+    franja = int(hashlib.sha1(clave.encode()).hexdigest(), 16) % FRANJAS_BLOQUEO
+    return os.path.join(settings.CACHE_DIR, 'bloqueos', f'{franja:03d}.lock')
+
+
+def bloquear(archivo, espera):
+    """
+    Toma el bloqueo exclusivo de ``archivo`` esperando hasta ``espera`` segundos.
+
+    Devuelve ``(tomado, espero)``: si se obtuvo y si hubo que esperar a otro worker.
+    """
+    limite = time.monotonic() + espera
+    espero = False
+    while True:
+        try:
+            fcntl.flock(archivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True, espero
+        except BlockingIOError:
+            if time.monotonic() >= limite:
+                return False, True
+            espero = True
+            time.sleep(INTERVALO_ESPERA)
+
+
+class Coalescedor:
+    """Un cálculo por clave a la vez; métricas ``<nombre>.coalescidas`` y ``<nombre>.esperas_vencidas``"""
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self._lock = threading.Lock()
+        # clave -> Event que se activa al terminar el cálculo en curso en este proceso
+        self._en_curso = {}
+
+    def ejecutar(self, clave, calcular, leer, espera):
+        """
+        Resultado de ``calcular()`` para ``clave``, ejecutándolo una sola vez.
+
+        ``leer()`` devuelve el resultado que guardó otro hilo o worker, o None
+        si no está. Quien calcula recibe las excepciones de ``calcular``; los
+        que esperaban vuelven a intentarlo por su cuenta.
+        """
+        with self._lock:
+            terminado = self._en_curso.get(clave)
+            lider = terminado is None
+            if lider:
+                terminado = self._en_curso[clave] = threading.Event()
+
+        if not lider:
+            metricas.registrar(f'{self.nombre}.coalescidas')
+            if terminado.wait(espera):
+                resultado = leer()
+                if resultado is not None:
+                    return resultado
+            else:
+                metricas.registrar(f'{self.nombre}.esperas_vencidas')
+            return calcular()
+
+        try:
+            return self._entre_workers(clave, calcular, leer, espera)
+        finally:
+            with self._lock:
+                del self._en_curso[clave]
+            terminado.set()
+
+    def _entre_workers(self, clave, calcular, leer, espera):
+        ruta = ruta_bloqueo(clave)
+        if ruta is None:
+            return calcular()
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with open(ruta, 'a') as archivo:
+            tomado, espero = bloquear(archivo, espera)
+            if not tomado:
+                metricas.registrar(f'{self.nombre}.esperas_vencidas')
+                return calcular()
+            try:
+                if espero:
+                    # Otro worker calculó mientras esperábamos
+                    resultado = leer()
+                    if resultado is not None:
+                        metricas.registrar(f'{self.nombre}.coalescidas')
+                        return resultado
+                return calcular()
+            finally:
+                fcntl.flock(archivo, fcntl.LOCK_UN)
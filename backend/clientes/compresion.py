@@ -0,0 +1,140 @@
+"""
+Bytes renderizados y comprimidos de las respuestas en caché.
+
+Junto a cada respuesta cacheada (listado y estadísticas) se guardan sus bytes
+ya renderizados, sin comprimir y comprimidos con gzip y, si está instalado el
+paquete ``brotli``, con br. La clave incluye el tipo de medio negociado (JSON,
+columnas, msgpack). Un acierto se responde con esos bytes según
+``Accept-Encoding``, sin serializar ni comprimir; los que no llegan a
+``MINIMO_BYTES`` se guardan solo sin comprimir. La API navegable no se guarda:
+su HTML depende del usuario.
+
+Las exportaciones no se cachean y se comprimen con gzip en streaming.
+"""
+import gzip
+import time
+
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+from rest_framework.renderers import BrowsableAPIRenderer
+
+from .metricas import metricas
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+# Por debajo de este tamaño la compresión no compensa sus encabezados
+MINIMO_BYTES = 1024
+NIVEL_GZIP = 6
+# Velocidad parecida a gzip 6 con mejor relación de compresión
+CALIDAD_BROTLI = 5
+
+# En orden de preferencia del servidor
+CODIFICACIONES = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def aceptadas(request):
+    """Codificaciones de ``CODIFICACIONES`` que acepta ``request`` (q > 0), en orden de preferencia"""
+    pesos = {}
+    for parte in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        codificacion, _, parametros = parte.strip().partition(';')
+        peso = 1.0
+        parametro, _, valor = parametros.strip().partition('=')
+        if parametro.strip() == 'q':
+            try:
+                peso = float(valor)
+            except ValueError:
+                continue
+        if codificacion:
+            pesos[codificacion.lower()] = peso
+    return [
+        codificacion for codificacion in CODIFICACIONES
+        if pesos.get(codificacion, pesos.get('*', 0)) > 0
+    ]
+
+
+def comprimir(contenido, codificacion):
+    if codificacion == 'br':
+        return brotli.compress(contenido, quality=CALIDAD_BROTLI)
+    return gzip.compress(contenido, compresslevel=NIVEL_GZIP, mtime=0)
+
+
+def se_guarda(request):
+    return not isinstance(getattr(request, 'accepted_renderer', None), (BrowsableAPIRenderer, type(None)))
+
+
+def clave_bytes(base, request, codificacion):
+    """Clave de los bytes de la respuesta ``base`` para el tipo de medio negociado y ``codificacion``"""
+    return f'{base}:{request.accepted_media_type.replace(" ", "")}:{codificacion}'
+
+
+def codificar(response, codificacion):
+    """Marca ``response`` como codificada y debilita su ETag (otra codificación, mismo contenido)"""
+    if codificacion != 'identity':
+        response['Content-Encoding'] = codificacion
+        if response.has_header('ETag') and not response['ETag'].startswith('W/'):
+            response['ETag'] = f'W/{response["ETag"]}'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def respuesta_guardada(almacen, request, base):
+    """``HttpResponse`` con los bytes de ``base`` guardados en ``almacen`` para ``request``, o None"""
+    if not se_guarda(request):
+        return None
+    for codificacion in [*aceptadas(request), 'identity']:
+        guardada = almacen.get(clave_bytes(base, request, codificacion))
+        if guardada is None:
+            continue
+        content_type, contenido, tamano = guardada
+        metricas.registrar('compresion.aciertos')
+        metricas.registrar('compresion.bytes_sin_comprimir', tamano)
+        metricas.registrar('compresion.bytes_enviados', len(contenido))
+        return codificar(HttpResponse(contenido, content_type=content_type), codificacion)
+    return None
+
+
+def guardar_al_renderizar(response, almacen, request, base):
+    """
+    Al renderizar ``response`` guarda sus bytes en ``almacen`` bajo ``base`` y la envía comprimida.
+
+    Comprime con todas las ``CODIFICACIONES`` una sola vez, para que los
+    aciertos siguientes no usen CPU. ``base`` None solo comprime la respuesta.
+    """
+    def al_renderizar(response):
+        if response.status_code != 200:
+            return
+        contenido = response.content
+        variantes = {'identity': contenido}
+        if len(contenido) >= MINIMO_BYTES:
+            inicio = time.perf_counter()
+            for codificacion in CODIFICACIONES:
+                variantes[codificacion] = comprimir(contenido, codificacion)
+            metricas.registrar('compresion.microsegundos', int((time.perf_counter() - inicio) * 1_000_000))
+        if base is not None and se_guarda(request):
+            almacen.set_many({
+                clave_bytes(base, request, codificacion): (response['Content-Type'], variante, len(contenido))
+                for codificacion, variante in variantes.items()
+            })
+        codificacion = next((c for c in aceptadas(request) if c in variantes), 'identity')
+        metricas.registrar('compresion.fallos')
+        metricas.registrar('compresion.bytes_sin_comprimir', len(contenido))
+        metricas.registrar('compresion.bytes_enviados', len(variantes[codificacion]))
+        response.content = variantes[codificacion]
+        codificar(response, codificacion)
+
+    response.add_post_render_callback(al_renderizar)
+    return response
+
+
+def comprimir_streaming(response, request):
+    """Comprime con gzip el contenido de un ``StreamingHttpResponse`` si la petición lo acepta"""
+    if 'gzip' in aceptadas(request):
+        response.streaming_content = compress_sequence(response.streaming_content)
+        codificar(response, 'gzip')
+    else:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
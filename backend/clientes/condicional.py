@@ -0,0 +1,102 @@
+"""
+GET condicional (ETag / Last-Modified) a partir de la versión de los datos.
+
+El ETag fuerte combina la versión de ``EstadisticasSnapshot`` con la ruta, los
+parámetros y el ``Accept`` de la petición, de modo que cualquier escritura
+sobre Cliente lo invalida. Si la petición trae ``If-None-Match`` o
+``If-Modified-Since`` se consulta solo la versión y, si los datos no
+cambiaron, se responde ``304`` sin evaluar ningún queryset.
+"""
+import hashlib
+from functools import partial, wraps
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+from .versionado import obtener_version
+
+
+def calcular_etag(request, version, actualizado):
+    """ETag fuerte para la versión de datos y la representación pedida"""
+    parametros = sorted((clave, sorted(valores)) for clave, valores in request.GET.lists())
+    clave = '|'.join([
+        str(version),
+        actualizado.isoformat(),
+        request.path,
+        repr(parametros),
+        request.META.get('HTTP_ACCEPT', ''),
+    ])
+    return f'"{version}-{hashlib.sha1(clave.encode()).hexdigest()[:20]}"'
+
+
+def no_modificado(request, etag, actualizado):
+    """Evalúa If-None-Match o, si no viene, If-Modified-Since"""
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        # Comparación débil (RFC 9110 13.1.2): se ignora el prefijo W/
+        return '*' in etags or etag in (candidato.removeprefix('W/') for candidato in etags)
+    desde = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return desde is not None and int(actualizado.timestamp()) <= desde
+
+
+def agregar_validadores(response, etag, actualizado):
+    if response.has_header('Content-Encoding'):
+        # Bytes comprimidos de la representación: validador débil (RFC 9110 8.8.3)
+        etag = f'W/{etag}'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(actualizado.timestamp())
+    # El cliente puede guardar la respuesta, pero debe revalidarla siempre
+    patch_cache_control(response, no_cache=True)
+    patch_vary_headers(response, ('Accept',))
+    return response
+
+
+def respuesta_condicional(metodo=None, *, leer_version=None):
+    """
+    Decora una acción GET del ViewSet con validadores y respuestas 304.
+
+    La acción informa la versión de los datos que leyó en ``self.version_datos``
+    como ``(version, actualizado)``, idealmente obtenida en la misma consulta
+    que los datos. Si no la informa (por ejemplo, una página vacía) se usa la
+    versión consultada antes de ejecutarla, o la respuesta sale sin validadores:
+    una versión leída después podría describir datos más nuevos que los enviados.
+
+    ``leer_version(vista, request, *args, **kwargs)`` reemplaza a la versión
+    global para validar ``If-None-Match``/``If-Modified-Since`` (por ejemplo,
+    la secuencia de cambio de un solo cliente); si devuelve None la acción se
+    ejecuta sin comparar.
+    """
+    if metodo is None:
+        return partial(respuesta_condicional, leer_version=leer_version)
+
+    @wraps(metodo)
+    def envoltura(self, request, *args, **kwargs):
+        previa = None
+        if 'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META:
+            if leer_version is None:
+                previa = obtener_version()
+            else:
+                previa = leer_version(self, request, *args, **kwargs)
+            if previa is not None:
+                etag = calcular_etag(request, *previa)
+                if no_modificado(request, etag, previa[1]):
+                    return agregar_validadores(HttpResponseNotModified(), etag, previa[1])
+
+        self.version_datos = None
+        response = metodo(self, request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+
+        if self.version_datos is not None and self.version_datos[0] is None:
+            # Todavía no hay snapshot: se construye para las siguientes peticiones
+            obtener_version()
+            self.version_datos = None
+        version_datos = self.version_datos or previa
+        if version_datos is None:
+            return response
+        version, actualizado = version_datos
+        return agregar_validadores(response, calcular_etag(request, version, actualizado), actualizado)
+
+    return envoltura
@@ -0,0 +1,560 @@
+"""
+Motor de agregación para las estadísticas de clientes.
+
+Construye la respuesta de ``estadisticas-generales`` con agregación condicional
+(``Count(filter=Q(...))``) en lugar de una consulta por cada métrica.
+"""
+import threading
+from collections import Counter, defaultdict, namedtuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Case, Count, F, Max, Min, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+from .campos import PromedioCentavos
+from .models import Cliente, ClienteEliminado, CuboSaldo, EstadisticasSnapshot
+from .sketch import SketchCuantiles
+
+# Etiquetas usadas como claves en la respuesta JSON
+NIVELES_SATISFACCION = {
+    1: 'muy_insatisfecho',
+    2: 'insatisfecho',
+    3: 'neutral',
+    4: 'satisfecho',
+    5: 'muy_satisfecho',
+}
+
+# (etiqueta, edad mínima, edad máxima o None si no tiene tope, campo en EstadisticasSnapshot)
+RANGOS_EDAD = [
+    ('18-30', 18, 30, 'edad_18_30'),
+    ('31-45', 31, 45, 'edad_31_45'),
+    ('46-60', 46, 60, 'edad_46_60'),
+    ('61-80', 61, 80, 'edad_61_80'),
+    ('81+', 81, None, 'edad_81_mas'),
+]
+
+# Fila única de EstadisticasSnapshot
+SNAPSHOT_PK = 1
+
+CAMPOS_TOP_5 = ('cliente_id', 'edad', 'genero', 'saldo', 'nivel_de_satisfaccion')
+
+# Extremos de EstadisticasSnapshot -> campo de Cliente del que salen
+CAMPOS_EXTREMOS = {
+    'saldo_maximo': 'saldo',
+    'saldo_minimo': 'saldo',
+    'edad_maxima': 'edad',
+    'edad_minima': 'edad',
+}
+MAXIMOS = ('saldo_maximo', 'edad_maxima')
+
+
+def filtro_rango_edad(minima, maxima):
+    if maxima is None:
+        return Q(edad__gte=minima)
+    return Q(edad__gte=minima, edad__lte=maxima)
+
+
+def _expresiones_agregadas():
+    """Todas las métricas de la tabla como una sola pasada de agregación condicional"""
+    expresiones = {
+        'total': Count('pk'),
+        'activos': Count('pk', filter=Q(activo=True)),
+        'inactivos': Count('pk', filter=Q(activo=False)),
+        'masculino': Count('pk', filter=Q(genero='M')),
+        'femenino': Count('pk', filter=Q(genero='F')),
+        'satisfechos': Count('pk', filter=Q(nivel_de_satisfaccion__gte=4)),
+        'promedio_edad': Avg('edad'),
+        'promedio_saldo': PromedioCentavos('saldo'),
+        'saldo_total': Sum('saldo'),
+        'saldo_max': Max('saldo'),
+        'saldo_min': Min('saldo'),
+        'edad_max': Max('edad'),
+        'edad_min': Min('edad'),
+        'satisfaccion_masculino': Avg('nivel_de_satisfaccion', filter=Q(genero='M')),
+        'satisfaccion_femenino': Avg('nivel_de_satisfaccion', filter=Q(genero='F')),
+    }
+    for nivel in NIVELES_SATISFACCION:
+        expresiones[f'satisfaccion_{nivel}'] = Count('pk', filter=Q(nivel_de_satisfaccion=nivel))
+    for indice, (_, minima, maxima, _) in enumerate(RANGOS_EDAD):
+        expresiones[f'rango_edad_{indice}'] = Count('pk', filter=filtro_rango_edad(minima, maxima))
+    return expresiones
+
+
+def contar_alta_rentabilidad(queryset, total):
+    """
+    Cuenta los clientes dentro del 10% de mayor saldo.
+
+    El umbral se resuelve como subconsulta para que el conteo completo sea
+    una única consulta. Con 10 clientes o menos el umbral es 0.
+    """
+    if total <= 0:
+        return 0
+    if total > 10:
+        umbral = Subquery(
+            queryset.order_by('-saldo').values('saldo')[int(total * 0.1):int(total * 0.1) + 1]
+        )
+    else:
+        umbral = 0
+    return queryset.filter(saldo__gte=umbral).count()
+
+
+def umbral_alta_rentabilidad(sketch):
+    """Umbral aproximado del 10% de mayor saldo (misma posición que el cálculo exacto)"""
+    total = sketch.total
+    if total <= 10:
+        return 0
+    return sketch.valor_en_posicion(total - 1 - int(total * 0.1))
+
+
+def cuantiles_saldo(sketch, total):
+    """Percentiles de saldo y umbral top 10%, aproximados con el error relativo máximo indicado"""
+    def redondear(valor):
+        return round(valor, 2) if valor is not None else None
+
+    return {
+        'p50': redondear(sketch.cuantil(0.5)),
+        'p90': redondear(sketch.cuantil(0.9)),
+        'p99': redondear(sketch.cuantil(0.99)),
+        'umbral_top_10': redondear(umbral_alta_rentabilidad(sketch)) if total > 0 else None,
+        'aproximado': True,
+        'error_relativo': sketch.precision_relativa,
+    }
+
+
+def calcular_agregados(queryset):
+    """Agregados crudos de la tabla en una sola consulta"""
+    return queryset.aggregate(**_expresiones_agregadas())
+
+
+def calcular_estadisticas_generales(queryset):
+    """
+    Calcula la respuesta completa de ``estadisticas-generales``.
+
+    Usa tres consultas independientemente del tamaño de la tabla: la agregación
+    condicional, el top 5 por saldo y el conteo de alta rentabilidad.
+    """
+    return construir_respuesta(calcular_agregados(queryset), queryset)
+
+
+def construir_respuesta(agregados, queryset, sketch=None):
+    """
+    Arma el JSON de ``estadisticas-generales`` a partir de los agregados crudos.
+
+    Los agregados pueden venir de ``calcular_agregados`` o de un
+    ``EstadisticasSnapshot``; el top 5 y la alta rentabilidad (exacta, con el
+    índice de saldo) se consultan aparte. Con ``sketch`` se agregan los
+    cuantiles de saldo, los únicos campos aproximados de la respuesta.
+    """
+    total = agregados['total']
+    activos = agregados['activos']
+
+    top_5_saldo = list(queryset.order_by('-saldo')[:5].values(*CAMPOS_TOP_5))
+    clientes_saldo_alto = contar_alta_rentabilidad(queryset, total)
+    tasa_satisfaccion = round((agregados['satisfechos'] / total * 100) if total > 0 else 0, 2)
+
+    data = {
+        # Totales
+        'total_clientes': total,
+        'clientes_activos': activos,
+        'clientes_inactivos': agregados['inactivos'],
+        'porcentaje_activos': round((activos / total * 100) if total > 0 else 0, 2),
+
+        # Distribuciones
+        'por_genero': {
+            'masculino': agregados['masculino'],
+            'femenino': agregados['femenino'],
+        },
+        'por_satisfaccion': {
+            nombre: agregados[f'satisfaccion_{nivel}']
+            for nivel, nombre in NIVELES_SATISFACCION.items()
+        },
+        'por_rango_edad': {
+            etiqueta: agregados[f'rango_edad_{indice}']
+            for indice, (etiqueta, _, _, _) in enumerate(RANGOS_EDAD)
+        },
+
+        # Promedios
+        'promedio_edad': round(float(agregados['promedio_edad'] or 0), 2),
+        'promedio_saldo': round(float(agregados['promedio_saldo'] or 0), 2),
+
+        # Saldos
+        'saldo_total': round(float(agregados['saldo_total'] or 0), 2),
+        'saldo_maximo': round(float(agregados['saldo_max'] or 0), 2),
+        'saldo_minimo': round(float(agregados['saldo_min'] or 0), 2),
+
+        # Edades
+        'edad_maxima': agregados['edad_max'],
+        'edad_minima': agregados['edad_min'],
+
+        # Top 5
+        'top_5_clientes_por_saldo': top_5_saldo,
+
+        # Análisis avanzado
+        'satisfaccion_por_genero': {
+            'masculino': {
+                'promedio': round(float(agregados['satisfaccion_masculino'] or 0), 2),
+                'total_clientes': agregados['masculino'],
+            },
+            'femenino': {
+                'promedio': round(float(agregados['satisfaccion_femenino'] or 0), 2),
+                'total_clientes': agregados['femenino'],
+            },
+        },
+
+        # Métricas de negocio
+        'tasa_satisfaccion_general': tasa_satisfaccion,
+        'clientes_alta_rentabilidad': clientes_saldo_alto,
+        'porcentaje_alta_rentabilidad': round((clientes_saldo_alto / total * 100) if total > 0 else 0, 2),
+    }
+    if sketch is not None:
+        data['cuantiles_saldo'] = cuantiles_saldo(sketch, total)
+    return data
+
+
+# --- Snapshot materializado -------------------------------------------------
+
+def _en_rango_edad(edad, minima, maxima):
+    return edad >= minima and (maxima is None or edad <= maxima)
+
+
+def _expresiones_snapshot():
+    """Valores de cada campo de EstadisticasSnapshot calculados desde la tabla"""
+    expresiones = {
+        'total': Count('pk'),
+        'activos': Count('pk', filter=Q(activo=True)),
+        'masculino': Count('pk', filter=Q(genero='M')),
+        'femenino': Count('pk', filter=Q(genero='F')),
+        'suma_edad': Sum('edad', default=0),
+        'suma_saldo': Sum('saldo', default=0),
+        'suma_satisfaccion_masculino': Sum('nivel_de_satisfaccion', filter=Q(genero='M'), default=0),
+        'suma_satisfaccion_femenino': Sum('nivel_de_satisfaccion', filter=Q(genero='F'), default=0),
+        'saldo_maximo': Max('saldo'),
+        'saldo_minimo': Min('saldo'),
+        'edad_maxima': Max('edad'),
+        'edad_minima': Min('edad'),
+    }
+    for nivel in NIVELES_SATISFACCION:
+        expresiones[f'satisfaccion_{nivel}'] = Count('pk', filter=Q(nivel_de_satisfaccion=nivel))
+    for _, minima, maxima, campo in RANGOS_EDAD:
+        filtro = filtro_rango_edad(minima, maxima)
+        expresiones[campo] = Count('pk', filter=filtro)
+        expresiones[f'suma_{campo}'] = Sum('edad', filter=filtro, default=0)
+    return expresiones
+
+
+def calcular_valores_snapshot():
+    """Recalcula desde cero todos los campos del snapshot en una consulta"""
+    return Cliente.objects.aggregate(**_expresiones_snapshot())
+
+
+def _contribucion(valores):
+    """Aporte de un cliente (``Cliente.valores_estadisticos``) a cada contador"""
+    if valores is None:
+        return {}
+    edad = valores['edad']
+    nivel = valores['nivel_de_satisfaccion']
+    es_masculino = valores['genero'] == 'M'
+    es_femenino = valores['genero'] == 'F'
+    aporte = {
+        'total': 1,
+        'activos': int(bool(valores['activo'])),
+        'masculino': int(es_masculino),
+        'femenino': int(es_femenino),
+        'suma_edad': edad,
+        'suma_saldo': valores['saldo'],
+        'suma_satisfaccion_masculino': nivel if es_masculino else 0,
+        'suma_satisfaccion_femenino': nivel if es_femenino else 0,
+    }
+    if nivel in NIVELES_SATISFACCION:
+        aporte[f'satisfaccion_{nivel}'] = 1
+    for _, minima, maxima, campo in RANGOS_EDAD:
+        if _en_rango_edad(edad, minima, maxima):
+            aporte[campo] = 1
+            aporte[f'suma_{campo}'] = edad
+    return aporte
+
+
+def aplicar_delta(anterior, actual):
+    """
+    Aplica al snapshot el cambio de un cliente con una única sentencia UPDATE.
+
+    ``anterior`` y ``actual`` son ``Cliente.valores_estadisticos()`` antes y
+    después de la escritura (``None`` en una creación o eliminación). Los
+    contadores se actualizan con expresiones F para ser seguros ante escrituras
+    concurrentes. Si no existe el snapshot no hace nada: se construirá completo
+    en la siguiente lectura.
+    """
+    aplicar_deltas([(anterior, actual)])
+
+
+def aplicar_deltas(cambios_clientes):
+    """Como ``aplicar_delta`` para varios pares ``(anterior, actual)`` en un solo UPDATE"""
+    sketch = SketchCuantiles()
+    delta, delta_cubos = defaultdict(int), defaultdict(int)
+    actuales, retirados = [], []
+    for anterior, actual in cambios_clientes:
+        for campo, valor in _contribucion(actual).items():
+            delta[campo] += valor
+        for campo, valor in _contribucion(anterior).items():
+            delta[campo] -= valor
+        if actual is not None:
+            actuales.append(actual)
+            delta_cubos[sketch.indice(actual['saldo'])] += 1
+        if anterior is not None:
+            delta_cubos[sketch.indice(anterior['saldo'])] -= 1
+            if actual is None or anterior['saldo'] != actual['saldo'] or anterior['edad'] != actual['edad']:
+                retirados.append(anterior)
+    _aplicar_al_snapshot(delta, _extremos(actuales), _extremos(retirados), delta_cubos)
+
+
+def _extremos(valores_clientes):
+    """Extremos de saldo y edad de una lista de valores, o None si está vacía"""
+    if not valores_clientes:
+        return None
+    return {
+        'saldo_maximo': max(valores['saldo'] for valores in valores_clientes),
+        'saldo_minimo': min(valores['saldo'] for valores in valores_clientes),
+        'edad_maxima': max(valores['edad'] for valores in valores_clientes),
+        'edad_minima': min(valores['edad'] for valores in valores_clientes),
+    }
+
+
+Resumen = namedtuple('Resumen', ['contadores', 'extremos', 'cubos'])
+
+
+def resumir(queryset, campos):
+    """
+    Aporte conjunto de las filas de ``queryset`` al snapshot, para ``aplicar_resumenes``.
+
+    Los contadores y extremos salen de la misma agregación que
+    ``calcular_valores_snapshot``; los cubos del sketch, solo si ``campos``
+    incluye el saldo, de una agrupación por saldo. Son dos consultas sobre
+    esas filas, sin importar cuántas sean.
+    """
+    queryset = queryset.order_by()
+    contadores = queryset.aggregate(**_expresiones_snapshot())
+    extremos = {campo: contadores.pop(campo) for campo in CAMPOS_EXTREMOS}
+    cubos = Counter()
+    if 'saldo' in campos:
+        sketch = SketchCuantiles()
+        for saldo, cantidad in queryset.values_list('saldo').annotate(cantidad=Count('pk')):
+            cubos[sketch.indice(saldo)] += cantidad
+    return Resumen(contadores, extremos if contadores['total'] else None, cubos)
+
+
+def aplicar_resumenes(antes, despues, campos):
+    """
+    Aplica una actualización masiva con el ``resumir`` de sus filas antes y después.
+
+    ``campos`` son los campos escritos: solo los extremos de esos campos pueden
+    haberse retirado, y el sketch solo cambia si se escribió el saldo.
+    """
+    delta = {campo: despues.contadores[campo] - antes.contadores[campo] for campo in despues.contadores}
+    retirados = None
+    if antes.extremos is not None:
+        retirados = {campo: valor for campo, valor in antes.extremos.items() if CAMPOS_EXTREMOS[campo] in campos}
+    delta_cubos = Counter(despues.cubos)
+    delta_cubos.subtract(antes.cubos)
+    _aplicar_al_snapshot(delta, despues.extremos, retirados, delta_cubos)
+
+
+def _aplicar_al_snapshot(delta, actuales, retirados, delta_cubos):
+    """
+    Suma ``delta`` a los contadores del snapshot y ``delta_cubos`` al sketch.
+
+    ``actuales`` son los extremos de los valores escritos y ``retirados`` los
+    de los valores reemplazados o eliminados (None o vacío si no hay).
+    """
+    cambios = {campo: F(campo) + valor for campo, valor in delta.items() if valor}
+
+    if actuales:
+        for campo, valor in actuales.items():
+            extremo = Greatest if campo in MAXIMOS else Least
+            cambios[campo] = extremo(Coalesce(campo, Value(valor)), Value(valor))
+
+    if retirados:
+        # Si algún valor retirado era un extremo, min/max ya no son exactos
+        estrictamente_interior = Q(**{
+            f'{campo}__{"gt" if campo in MAXIMOS else "lt"}': valor for campo, valor in retirados.items()
+        })
+        cambios['extremos_validos'] = Case(
+            When(estrictamente_interior, then=F('extremos_validos')),
+            default=Value(False),
+        )
+
+    existe = EstadisticasSnapshot.objects.filter(pk=SNAPSHOT_PK).update(
+        **cambios, version=F('version') + 1, actualizado=timezone.now()
+    )
+    if existe:
+        _aplicar_deltas_sketch(delta_cubos)
+
+
+def _aplicar_deltas_sketch(delta_cubos):
+    """Suma ``{indice: cantidad}`` a los cubos persistidos del sketch (un UPDATE por cubo afectado)"""
+    for indice, cantidad in sorted(delta_cubos.items()):
+        if cantidad < 0:
+            CuboSaldo.objects.filter(indice=indice).update(conteo=F('conteo') + cantidad)
+        elif cantidad > 0:
+            _incrementar_cubo(indice, cantidad)
+
+
+def _incrementar_cubo(indice, cantidad):
+    if CuboSaldo.objects.filter(indice=indice).update(conteo=F('conteo') + cantidad):
+        return
+    try:
+        with transaction.atomic():
+            CuboSaldo.objects.create(indice=indice, conteo=cantidad)
+    except IntegrityError:
+        # Otro proceso creó el cubo entre ambas sentencias
+        CuboSaldo.objects.filter(indice=indice).update(conteo=F('conteo') + cantidad)
+
+
+def calcular_sketch(queryset=None, tamano_bloque=10000):
+    """Construye el sketch de saldos recorriendo la tabla por bloques y fusionándolos"""
+    queryset = Cliente.objects.all() if queryset is None else queryset
+    sketch = SketchCuantiles()
+    bloque = SketchCuantiles()
+    for i, saldo in enumerate(queryset.values_list('saldo', flat=True).iterator(chunk_size=tamano_bloque), 1):
+        bloque.agregar(saldo)
+        if i % tamano_bloque == 0:
+            sketch.fusionar(bloque)
+            bloque = SketchCuantiles()
+    return sketch.fusionar(bloque)
+
+
+def ultima_secuencia():
+    """Mayor secuencia de cambio registrada en clientes y eliminaciones"""
+    return max(
+        Cliente.objects.aggregate(maxima=Max('secuencia_cambio'))['maxima'] or 0,
+        ClienteEliminado.objects.aggregate(maxima=Max('secuencia_cambio'))['maxima'] or 0,
+    )
+
+
+def incrementar_version():
+    """Registra un cambio en Cliente que no altera los agregados"""
+    EstadisticasSnapshot.objects.filter(pk=SNAPSHOT_PK).update(
+        version=F('version') + 1, actualizado=timezone.now()
+    )
+
+
+def reconstruir_snapshot():
+    """
+    Reconstruye el snapshot desde la tabla Cliente.
+
+    La fila se bloquea antes de agregar para que los deltas concurrentes se
+    apliquen antes (y queden incluidos) o después (sobre el valor nuevo).
+    """
+    with transaction.atomic():
+        existe = EstadisticasSnapshot.objects.select_for_update().filter(pk=SNAPSHOT_PK).exists()
+        valores = calcular_valores_snapshot()
+        if existe:
+            EstadisticasSnapshot.objects.filter(pk=SNAPSHOT_PK).update(
+                **valores, extremos_validos=True, version=F('version') + 1, actualizado=timezone.now()
+            )
+        else:
+            # La versión continúa la secuencia de cambios ya asignada a las filas
+            EstadisticasSnapshot.objects.create(pk=SNAPSHOT_PK, **valores, version=ultima_secuencia() + 1)
+        CuboSaldo.objects.all().delete()
+        CuboSaldo.objects.bulk_create(
+            CuboSaldo(indice=indice, conteo=conteo) for indice, conteo in calcular_sketch().cubos.items()
+        )
+    return EstadisticasSnapshot.objects.get(pk=SNAPSHOT_PK)
+
+
+def obtener_snapshot():
+    """Lee el snapshot (una consulta), construyéndolo o refrescando extremos si hace falta"""
+    snapshot = EstadisticasSnapshot.objects.filter(pk=SNAPSHOT_PK).first()
+    if snapshot is None:
+        return reconstruir_snapshot()
+    if not snapshot.extremos_validos:
+        extremos = Cliente.objects.aggregate(
+            saldo_maximo=Max('saldo'), saldo_minimo=Min('saldo'),
+            edad_maxima=Max('edad'), edad_minima=Min('edad'),
+        )
+        # Solo se persiste si nadie escribió mientras tanto
+        EstadisticasSnapshot.objects.filter(pk=SNAPSHOT_PK, version=snapshot.version).update(
+            **extremos, extremos_validos=True
+        )
+        for campo, valor in extremos.items():
+            setattr(snapshot, campo, valor)
+        snapshot.extremos_validos = True
+    return snapshot
+
+
+def verificar_snapshot(snapshot=None):
+    """Campos con deriva: ``{campo: (almacenado, real)}``; vacío si el snapshot es exacto"""
+    snapshot = snapshot or EstadisticasSnapshot.objects.get(pk=SNAPSHOT_PK)
+    reales = calcular_valores_snapshot()
+    cubos_almacenados = dict(CuboSaldo.objects.filter(conteo__gt=0).values_list('indice', 'conteo'))
+    cubos_reales = dict(calcular_sketch().cubos)
+    deriva = {}
+    for campo, real in reales.items():
+        if campo in CAMPOS_EXTREMOS and not snapshot.extremos_validos:
+            continue
+        almacenado = getattr(snapshot, campo)
+        if almacenado != real:
+            deriva[campo] = (almacenado, real)
+    if cubos_almacenados != cubos_reales:
+        distintos = sum(
+            1 for indice in cubos_almacenados.keys() | cubos_reales.keys()
+            if cubos_almacenados.get(indice) != cubos_reales.get(indice)
+        )
+        deriva['cubos_saldo'] = (f'{len(cubos_almacenados)} cubos', f'{distintos} cubos distintos')
+    return deriva
+
+
+def agregados_desde_snapshot(snapshot):
+    """Traduce el snapshot al mismo diccionario que devuelve ``calcular_agregados``"""
+    total = snapshot.total
+    agregados = {
+        'total': total,
+        'activos': snapshot.activos,
+        'inactivos': total - snapshot.activos,
+        'masculino': snapshot.masculino,
+        'femenino': snapshot.femenino,
+        'satisfechos': snapshot.satisfaccion_4 + snapshot.satisfaccion_5,
+        'promedio_edad': snapshot.suma_edad / total if total else None,
+        'promedio_saldo': snapshot.suma_saldo / total if total else None,
+        'saldo_total': snapshot.suma_saldo if total else None,
+        'saldo_max': snapshot.saldo_maximo,
+        'saldo_min': snapshot.saldo_minimo,
+        'edad_max': snapshot.edad_maxima,
+        'edad_min': snapshot.edad_minima,
+        'satisfaccion_masculino': (
+            snapshot.suma_satisfaccion_masculino / snapshot.masculino if snapshot.masculino else None
+        ),
+        'satisfaccion_femenino': (
+            snapshot.suma_satisfaccion_femenino / snapshot.femenino if snapshot.femenino else None
+        ),
+    }
+    for nivel in NIVELES_SATISFACCION:
+        agregados[f'satisfaccion_{nivel}'] = getattr(snapshot, f'satisfaccion_{nivel}')
+    for indice, (_, _, _, campo) in enumerate(RANGOS_EDAD):
+        agregados[f'rango_edad_{indice}'] = getattr(snapshot, campo)
+    return agregados
+
+
+class SketchEnMemoria:
+    """Sketch de saldos cargado en el proceso para una versión de datos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.version = None
+        self.sketch = None
+
+    def obtener(self, version):
+        """Sketch vigente para ``version``; lee los cubos (no los clientes) si cambió"""
+        if version != self.version or self.sketch is None:
+            with self._lock:
+                if version != self.version or self.sketch is None:
+                    cubos = CuboSaldo.objects.filter(conteo__gt=0).values_list('indice', 'conteo')
+                    self.sketch = SketchCuantiles(cubos=dict(cubos))
+                    self.version = version
+        return self.sketch
+
+
+sketch_saldos = SketchEnMemoria()
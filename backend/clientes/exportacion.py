@@ -0,0 +1,75 @@
+"""
+Exportación completa de clientes en streaming (NDJSON o CSV).
+
+Las filas se leen con ``values_list().iterator(chunk_size=...)`` (cursor del
+lado del servidor en PostgreSQL) y se escriben por bloques, de modo que la
+memoria del worker no crece con el tamaño de la tabla y el primer byte sale
+apenas llega el primer bloque.
+"""
+import csv
+import io
+import json
+
+from .lectura import CAMPOS_CONSULTA, COLUMNAS, representar_fila
+
+TAMANO_BLOQUE = 2000
+
+FORMATOS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def iterar_filas(queryset, tamano_bloque=None):
+    """Representaciones de cada cliente (como en el listado), leídas por bloques"""
+    tamano_bloque = tamano_bloque or TAMANO_BLOQUE
+    filas = queryset.values_list(*CAMPOS_CONSULTA).iterator(chunk_size=tamano_bloque)
+    for fila in filas:
+        yield representar_fila(fila)
+
+
+def _por_bloques(lineas, tamano_bloque):
+    tamano_bloque = tamano_bloque or TAMANO_BLOQUE
+    bloque = []
+    for linea in lineas:
+        bloque.append(linea)
+        if len(bloque) >= tamano_bloque:
+            yield ''.join(bloque)
+            bloque = []
+    if bloque:
+        yield ''.join(bloque)
+
+
+def generar_ndjson(queryset, tamano_bloque=None):
+    """Un objeto JSON por línea, con la misma forma que el listado"""
+    lineas = (
+        json.dumps(fila, ensure_ascii=False, separators=(',', ':')) + '\n'
+        for fila in iterar_filas(queryset, tamano_bloque)
+    )
+    return _por_bloques(lineas, tamano_bloque)
+
+
+def generar_csv(queryset, tamano_bloque=None):
+    """CSV con encabezado; los booleanos como true/false y los nulos vacíos"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+
+    def linea(valores):
+        escritor.writerow(valores)
+        texto = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return texto
+
+    def lineas():
+        yield linea(COLUMNAS)
+        for fila in iterar_filas(queryset, tamano_bloque):
+            yield linea(['true' if v is True else 'false' if v is False else v for v in fila.values()])
+
+    return _por_bloques(lineas(), tamano_bloque)
+
+
+GENERADORES = {
+    'ndjson': generar_ndjson,
+    'csv': generar_csv,
+}
@@ -0,0 +1,356 @@
+"""
+Motor de importación de clientes desde CSV (``manage.py importar_clientes``).
+
+El archivo se lee por bloques con pandas, de modo que la memoria no depende
+de su tamaño. Cada bloque se convierte y valida por columnas (mismas reglas
+que ``clientes.validaciones``), descarta los IDs repetidos o ya existentes con
+una sola consulta y se inserta en su propia transacción: con ``COPY`` en
+PostgreSQL o con un ``INSERT`` por lotes (``executemany``) en los demás motores. Cada bloque
+aplica su delta al snapshot de estadísticas en la misma transacción, así la
+versión de datos que cambia con él nunca describe agregados viejos; al
+terminar se reconstruyen una vez para descartar cualquier deriva.
+
+En modo ``merge`` los clientes existentes se comparan por huella (hash de
+los campos importados) contra sus valores almacenados y solo se actualizan
+los que cambiaron; opcionalmente se eliminan los que ya no están en el archivo.
+"""
+import hashlib
+import io
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+import numpy as np
+import pandas as pd
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models.constants import OnConflict
+
+from . import validaciones
+from .cache_clientes import cache_clientes
+from .estadisticas import aplicar_deltas, reconstruir_snapshot
+from .models import Cliente
+from .versionado import reservar_secuencia
+
+TAMANO_BLOQUE = 5000
+
+COLUMNAS_CSV = ('Cliente_ID', 'Edad', 'Genero', 'Saldo', 'Activo', 'Nivel_de_Satisfaccion')
+# Campos que el archivo define para cada cliente (los que entran en la huella)
+CAMPOS_IMPORTADOS = ('edad', 'genero', 'saldo', 'activo', 'nivel_de_satisfaccion')
+# Columnas de la tabla, en el orden de COPY
+COLUMNAS_TABLA = (
+    'cliente_id', 'usuario_id', 'edad', 'genero', 'saldo', 'activo', 'nivel_de_satisfaccion', 'secuencia_cambio',
+)
+
+# Etiquetas aceptadas en la columna Genero; cualquier otro valor se importa como 'M'
+GENEROS = {'Masculino': 'M', 'Femenino': 'F', 'M': 'M', 'F': 'F'}
+GENERO_POR_DEFECTO = 'M'
+
+# (fila, cliente_id o None, mensaje); fila es 1 para la primera fila de datos
+ErrorFila = namedtuple('ErrorFila', ['fila', 'cliente_id', 'mensaje'])
+# omitidos: ya existentes (insertar) o sin cambios (merge)
+ResultadoBloque = namedtuple('ResultadoBloque', ['leidos', 'creados', 'actualizados', 'omitidos', 'errores'])
+
+_CENTAVOS = Decimal('0.01')
+
+
+def huella_archivo(ruta, tamano_lectura=1 << 20):
+    """SHA-256 del contenido, para reconocer el archivo al reanudar"""
+    huella = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        while datos := archivo.read(tamano_lectura):
+            huella.update(datos)
+    return huella.hexdigest()
+
+
+def leer_bloques(ruta, tamano_bloque=TAMANO_BLOQUE, desde=0, columnas=COLUMNAS_CSV):
+    """
+    Bloques del CSV como texto, sin inferir tipos (la conversión es explícita).
+
+    ``desde`` omite esa cantidad de filas de datos; el índice de cada bloque
+    sigue siendo la posición de la fila en el archivo (0 = primera fila de datos).
+    """
+    lector = pd.read_csv(
+        ruta, usecols=list(columnas), dtype=str, keep_default_na=False, chunksize=tamano_bloque,
+        skiprows=(lambda linea: 0 < linea <= desde) if desde else None,
+    )
+    for bloque in lector:
+        if desde:
+            bloque.index += desde
+        yield bloque
+
+
+def _saldo_redondeado(texto):
+    """Igual que la importación original: ``Decimal(str(float(x)))`` redondeado a centavos"""
+    try:
+        saldo = Decimal(str(float(texto))).quantize(_CENTAVOS, rounding=ROUND_HALF_UP)
+    except (ValueError, InvalidOperation):
+        return None
+    return f'{saldo:f}' if saldo.is_finite() else None
+
+
+def convertir_saldos(textos):
+    """
+    Saldos como texto decimal con dos decimales, o NA si no son números.
+
+    Los valores con hasta dos decimales (el caso normal) se convierten de forma
+    vectorizada y exacta; el resto se redondea valor a valor.
+    """
+    textos = textos.str.strip()
+    partes = textos.str.extract(r'^(\d+)(?:\.(\d{0,2}))?$')
+    saldos = (
+        partes[0].str.lstrip('0').replace('', '0')
+        + '.' + partes[1].fillna('').str.ljust(2, '0')
+    )
+    resto = partes[0].isna()
+    if resto.any():
+        saldos[resto] = textos[resto].map(_saldo_redondeado)
+    return saldos
+
+
+def saldos_a_centavos(saldos):
+    """Saldos de ``convertir_saldos`` como los guarda la columna (``CentavosField``: entero de centavos)"""
+    return saldos.str.replace('.', '', regex=False).astype('int64')
+
+
+def _enteros(columna):
+    """Columna numérica como float (NaN si no es un número entero)"""
+    numeros = pd.to_numeric(columna.str.strip(), errors='coerce')
+    return numeros.where(numeros % 1 == 0)
+
+
+def convertir_bloque(bloque):
+    """
+    Convierte y valida un bloque leído con ``leer_bloques``.
+
+    Devuelve ``(validos, errores)``: un DataFrame con las columnas de la tabla
+    (sin usuario ni secuencia) y los errores de las filas descartadas. Se
+    informa el primer error de cada fila.
+    """
+    errores = pd.Series(None, index=bloque.index, dtype=object)
+
+    def marcar(mascara, mensaje):
+        errores[mascara & errores.isna()] = mensaje
+
+    cliente_id = _enteros(bloque['Cliente_ID'])
+    marcar(cliente_id.isna() | (cliente_id < 1), 'Cliente_ID inválido')
+
+    edad = _enteros(bloque['Edad'])
+    marcar(edad.isna(), 'Edad inválida')
+    marcar(edad < validaciones.EDAD_MINIMA, validaciones.MENSAJE_EDAD_MINIMA)
+    marcar(edad > validaciones.EDAD_MAXIMA, validaciones.MENSAJE_EDAD_MAXIMA)
+
+    saldo = convertir_saldos(bloque['Saldo'])
+    marcar(saldo.isna(), 'Saldo inválido')
+    marcar(saldo.str.startswith('-', na=False), validaciones.MENSAJE_SALDO_NEGATIVO)
+
+    # Vacío se importa como activo, igual que el valor por defecto del modelo
+    activo = bloque['Activo'].str.strip()
+    numeros_activo = pd.to_numeric(activo, errors='coerce')
+    marcar(numeros_activo.isna() & (activo != ''), 'Activo inválido')
+
+    nivel = _enteros(bloque['Nivel_de_Satisfaccion'])
+    marcar(nivel.isna(), 'Nivel_de_Satisfaccion inválido')
+    marcar((nivel < validaciones.SATISFACCION_MINIMA) | (nivel > validaciones.SATISFACCION_MAXIMA),
+           validaciones.MENSAJE_SATISFACCION)
+
+    validos = errores.isna()
+    lista_errores = [
+        ErrorFila(indice + 1, None if pd.isna(cliente_id[indice]) else int(cliente_id[indice]), mensaje)
+        for indice, mensaje in errores[~validos].items()
+    ]
+    convertidos = pd.DataFrame({
+        'cliente_id': cliente_id[validos].astype('int64'),
+        'edad': edad[validos].astype('int64'),
+        'genero': bloque['Genero'][validos].str.strip().map(GENEROS).fillna(GENERO_POR_DEFECTO),
+        'saldo': saldo[validos],
+        'activo': numeros_activo[validos].fillna(1) != 0,
+        'nivel_de_satisfaccion': nivel[validos].astype('int64'),
+    })
+    return convertidos, lista_errores
+
+
+def descartar_existentes(convertidos):
+    """Quita los IDs repetidos en el bloque o ya presentes en la tabla (una consulta)"""
+    convertidos = convertidos[~convertidos['cliente_id'].duplicated()]
+    existentes = Cliente.objects.filter(
+        pk__in=convertidos['cliente_id'].tolist()
+    ).values_list('pk', flat=True)
+    return convertidos[~convertidos['cliente_id'].isin(list(existentes))]
+
+
+def copy_disponible():
+    return connection.vendor == 'postgresql'
+
+
+def _insertar_copy(filas):
+    """``COPY ... FROM STDIN`` con psycopg2 o psycopg 3; inserta todas las filas o falla"""
+    datos = io.StringIO()
+    filas.to_csv(datos, header=False, index=False)
+    sentencia = (
+        f'COPY {connection.ops.quote_name(Cliente._meta.db_table)} '
+        f'({", ".join(COLUMNAS_TABLA)}) FROM STDIN WITH (FORMAT csv)'
+    )
+    with connection.cursor() as cursor:
+        if hasattr(cursor.cursor, 'copy_expert'):
+            datos.seek(0)
+            cursor.cursor.copy_expert(sentencia, datos)
+        else:
+            with cursor.cursor.copy(sentencia) as copia:
+                copia.write(datos.getvalue())
+    return len(filas)
+
+
+def _insertar_sql(filas):
+    """
+    Un ``INSERT`` con ``executemany``, omitiendo los IDs ya existentes; devuelve las filas insertadas.
+
+    Las filas ya están convertidas y validadas: generar el SQL con
+    ``bulk_create`` preparando cada valor por campo costaría más que insertar.
+    """
+    columnas = [Cliente._meta.get_field(nombre) for nombre in COLUMNAS_TABLA]
+    tabla = connection.ops.quote_name(Cliente._meta.db_table)
+    sentencia = ' '.join(filter(None, [
+        connection.ops.insert_statement(on_conflict=OnConflict.IGNORE),
+        f'{tabla} ({", ".join(connection.ops.quote_name(columna.column) for columna in columnas)})',
+        f'VALUES ({", ".join(["%s"] * len(columnas))})',
+        # Un ID insertado por otra escritura desde la consulta previa se omite
+        connection.ops.on_conflict_suffix_sql(columnas, OnConflict.IGNORE, None, None),
+    ]))
+    with connection.cursor() as cursor:
+        # tolist() entrega tipos de Python, que todos los drivers aceptan
+        cursor.executemany(sentencia, list(zip(*(filas[columna].tolist() for columna in COLUMNAS_TABLA))))
+        return cursor.rowcount
+
+
+def huellas(filas):
+    """Hash de los campos importados de cada fila (los tipos deben ser los de ``convertir_bloque``)"""
+    return pd.util.hash_pandas_object(filas[list(CAMPOS_IMPORTADOS)], index=False).to_numpy()
+
+
+def separar_cambios(convertidos):
+    """
+    Divide un bloque en ``(nuevos, modificados, sin_cambios, anteriores)`` para el modo merge.
+
+    Los valores almacenados de los IDs del bloque se leen con una consulta y se
+    normalizan igual que los del archivo antes de comparar huellas; ``anteriores``
+    son los de ``modificados``, en el mismo orden. Si un ID se repite en el
+    bloque vale su última fila, igual que entre bloques.
+    """
+    convertidos = convertidos[~convertidos['cliente_id'].duplicated(keep='last')]
+    almacenados = pd.DataFrame.from_records(
+        [
+            (cliente_id, edad, genero, f'{Cliente.normalizar_saldo(saldo):f}', activo, nivel)
+            for cliente_id, edad, genero, saldo, activo, nivel in Cliente.objects.filter(
+                pk__in=convertidos['cliente_id'].tolist()
+            ).values_list('cliente_id', *CAMPOS_IMPORTADOS)
+        ],
+        columns=['cliente_id', *CAMPOS_IMPORTADOS],
+    )
+    existentes = convertidos['cliente_id'].isin(almacenados['cliente_id'])
+    nuevos = convertidos[~existentes]
+    existentes = convertidos[existentes]
+    if not len(existentes):
+        return nuevos, existentes, existentes, almacenados
+
+    almacenados = almacenados.astype(existentes.dtypes.to_dict()).set_index('cliente_id')
+    anteriores = pd.Series(huellas(almacenados), index=almacenados.index)
+    modificados = huellas(existentes) != anteriores.loc[existentes['cliente_id']].to_numpy()
+    return (nuevos, existentes[modificados], existentes[~modificados],
+            almacenados.loc[existentes['cliente_id'][modificados]])
+
+
+def valores_estadisticos(filas):
+    """Filas convertidas como ``Cliente.valores_estadisticos()``, para los deltas del snapshot"""
+    return [
+        {**valores, 'saldo': Decimal(valores['saldo'])}
+        for valores in filas[list(CAMPOS_IMPORTADOS)].to_dict('records')
+    ]
+
+
+def _actualizar_sql(filas):
+    """Un ``UPDATE`` por ID con ``executemany``; el usuario asignado no cambia. Devuelve las filas actualizadas"""
+    columnas = [*CAMPOS_IMPORTADOS, 'secuencia_cambio']
+    asignaciones = ', '.join(
+        f'{connection.ops.quote_name(Cliente._meta.get_field(nombre).column)} = %s' for nombre in columnas
+    )
+    sentencia = (
+        f'UPDATE {connection.ops.quote_name(Cliente._meta.db_table)} SET {asignaciones} '
+        f'WHERE {connection.ops.quote_name(Cliente._meta.pk.column)} = %s'
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sentencia, list(zip(*(filas[columna].tolist() for columna in [*columnas, 'cliente_id']))))
+        return cursor.rowcount
+
+
+def importar_bloque(bloque, usuario_id=None, usar_copy=False, merge=False):
+    """Convierte, filtra y escribe un bloque en su propia transacción"""
+    convertidos, errores = convertir_bloque(bloque)
+    if merge:
+        nuevos, modificados, sin_cambios, anteriores = separar_cambios(convertidos)
+        omitidos = len(convertidos) - len(nuevos) - len(modificados)
+    else:
+        nuevos, modificados = descartar_existentes(convertidos), convertidos.iloc[:0]
+        anteriores = modificados
+        omitidos = len(convertidos) - len(nuevos)
+    if len(nuevos) or len(modificados):
+        with transaction.atomic():
+            secuencia = reservar_secuencia()
+            insertados = actualizados = 0
+            if len(nuevos):
+                filas = nuevos.assign(
+                    usuario_id=usuario_id, saldo=saldos_a_centavos(nuevos['saldo']), secuencia_cambio=secuencia,
+                )[list(COLUMNAS_TABLA)]
+                insertados = _insertar_copy(filas) if usar_copy else _insertar_sql(filas)
+            if len(modificados):
+                actualizados = _actualizar_sql(modificados.assign(
+                    saldo=saldos_a_centavos(modificados['saldo']), secuencia_cambio=secuencia,
+                ))
+                cache_clientes.invalidar(modificados['cliente_id'].tolist())
+            # El delta del bloque cambia también la versión de datos (y los validadores HTTP)
+            if insertados == len(nuevos) and actualizados == len(modificados):
+                aplicar_deltas(
+                    [(None, actual) for actual in valores_estadisticos(nuevos)]
+                    + list(zip(valores_estadisticos(anteriores), valores_estadisticos(modificados)))
+                )
+            else:
+                # Otra escritura agregó o eliminó alguno de los IDs después de la consulta previa
+                reconstruir_snapshot()
+    return ResultadoBloque(len(bloque), len(nuevos), len(modificados), omitidos, errores)
+
+
+def ids_del_archivo(ruta, tamano_bloque=TAMANO_BLOQUE):
+    """IDs presentes en el archivo (aunque la fila tenga otros errores), ordenados y sin repetir"""
+    partes = [
+        _enteros(bloque['Cliente_ID']).dropna().astype('int64').to_numpy()
+        for bloque in leer_bloques(ruta, tamano_bloque, columnas=['Cliente_ID'])
+    ]
+    return np.unique(np.concatenate(partes)) if partes else np.empty(0, dtype='int64')
+
+
+def eliminar_ausentes(presentes, tamano_lote=TAMANO_BLOQUE):
+    """
+    Elimina los clientes cuyo ID no está en ``presentes`` (arreglo ordenado).
+
+    Recorre la tabla por rangos de ID; cada lote se elimina con la eliminación
+    por lotes de ClienteQuerySet (marcas de eliminación y estadísticas).
+    """
+    eliminados, ultimo = 0, None
+    ids = Cliente.objects.order_by('pk').values_list('pk', flat=True)
+    while True:
+        lote = np.array(list((ids if ultimo is None else ids.filter(pk__gt=ultimo))[:tamano_lote]), dtype='int64')
+        if not len(lote):
+            return eliminados
+        ultimo = int(lote[-1])
+        ausentes = lote[~np.isin(lote, presentes, assume_unique=True)]
+        if len(ausentes):
+            eliminados += Cliente.objects.filter(pk__in=ausentes.tolist()).delete()[0]
+
+
+def finalizar_importacion():
+    """Reinicia la secuencia de IDs (se insertaron IDs explícitos) y reconstruye las estadísticas"""
+    sentencias = connection.ops.sequence_reset_sql(no_style(), [Cliente])
+    if sentencias:
+        with connection.cursor() as cursor:
+            for sentencia in sentencias:
+                cursor.execute(sentencia)
+    return reconstruir_snapshot()
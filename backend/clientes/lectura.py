@@ -0,0 +1,63 @@
+"""
+Lectura rápida de clientes para list/retrieve y la exportación.
+
+Trabaja sobre tuplas de ``values_list`` en lugar de instancias de Cliente y
+produce exactamente la misma representación que ClienteSerializer: mismas
+claves y orden, etiquetas de choices desde tablas precalculadas y el saldo
+como texto con los decimales del campo.
+"""
+from rest_framework.settings import api_settings
+
+from .models import Cliente
+from .serializers import ClienteSerializer
+
+# Mismas claves y orden que ClienteSerializer
+COLUMNAS = (
+    'cliente_id', 'genero_display', 'nivel_satisfaccion_display', 'edad', 'genero',
+    'saldo', 'activo', 'nivel_de_satisfaccion', 'usuario',
+)
+CAMPOS_CONSULTA = ('cliente_id', 'edad', 'genero', 'saldo', 'activo', 'nivel_de_satisfaccion', 'usuario_id')
+
+ETIQUETAS_GENERO = {valor: str(etiqueta) for valor, etiqueta in Cliente.GENERO_CHOICES}
+ETIQUETAS_SATISFACCION = {valor: str(etiqueta) for valor, etiqueta in Cliente.NIVEL_SATISFACCION_CHOICES}
+
+_campo_saldo = ClienteSerializer().fields['saldo']
+_EXPONENTE_SALDO = -_campo_saldo.decimal_places
+# Con la configuración por defecto DRF devuelve '{:f}' del valor cuantizado
+_SALDO_DIRECTO = (
+    getattr(_campo_saldo, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    and not _campo_saldo.localize
+)
+
+
+def saldo_a_texto(saldo):
+    """Igual que el DecimalField del serializer, sin cuantizar si ya tiene la escala del campo"""
+    if _SALDO_DIRECTO and saldo.as_tuple().exponent == _EXPONENTE_SALDO:
+        # Con exponente negativo fijo, str() nunca usa notación científica
+        return str(saldo)
+    return _campo_saldo.to_representation(saldo)
+
+
+def representar_fila(fila):
+    """Dict idéntico a ``ClienteSerializer(cliente).data`` para una tupla de ``CAMPOS_CONSULTA``"""
+    cliente_id, edad, genero, saldo, activo, nivel, usuario_id = fila[:7]
+    etiqueta_genero = ETIQUETAS_GENERO.get(genero)
+    etiqueta_satisfaccion = ETIQUETAS_SATISFACCION.get(nivel)
+    return {
+        'cliente_id': cliente_id,
+        'genero_display': etiqueta_genero if etiqueta_genero is not None else str(genero),
+        'nivel_satisfaccion_display': (
+            etiqueta_satisfaccion if etiqueta_satisfaccion is not None else str(nivel)
+        ),
+        'edad': edad,
+        'genero': genero,
+        'saldo': saldo_a_texto(saldo),
+        'activo': activo,
+        'nivel_de_satisfaccion': nivel,
+        'usuario': usuario_id,
+    }
+
+
+def representar(filas):
+    """Lista idéntica a ``ClienteSerializer(clientes, many=True).data``"""
+    return [representar_fila(fila) for fila in filas]
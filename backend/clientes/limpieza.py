@@ -0,0 +1,267 @@
+"""
+Limpieza de CSV de clientes antes de importarlos (``manage.py limpiar_csv``).
+
+Mismo resultado que el antiguo ``analisis_datos.py`` (duplicados exactos
+fuera, filas sin Activo o Saldo fuera, Edad y Nivel_de_Satisfaccion vacíos
+con la mediana, Genero vacío con la moda, ambos enteros), pero por bloques
+para que la memoria no dependa del tamaño del archivo:
+
+1. Primera pasada: cada bloque se deduplica contra las huellas (hash de 64
+   bits) de las filas ya vistas, se valida por columnas con las reglas de
+   ``clientes.validaciones`` y las filas rechazadas van a un archivo aparte
+   con el motivo. Se cuentan los valores de Edad, Nivel y Genero de las filas
+   válidas, que se guardan en un archivo temporal.
+2. Con esos conteos se calculan la mediana y la moda exactas.
+3. Segunda pasada: el archivo temporal se completa y se escribe la salida.
+
+En memoria solo quedan las huellas (8 bytes por fila distinta) y los
+conteos, que tienen tantas entradas como valores distintos.
+"""
+import os
+import tempfile
+import time
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from . import validaciones
+from .importacion import COLUMNAS_CSV, TAMANO_BLOQUE, leer_bloques
+
+COLUMNAS_NUMERICAS = ('Cliente_ID', 'Edad', 'Saldo', 'Activo', 'Nivel_de_Satisfaccion')
+# Columnas que se completan en la segunda pasada en lugar de rechazar la fila
+COLUMNAS_IMPUTADAS = ('Edad', 'Genero', 'Nivel_de_Satisfaccion')
+
+ResumenLimpieza = namedtuple('ResumenLimpieza', [
+    'leidas', 'duplicadas', 'rechazadas', 'escritas', 'imputados', 'etapas',
+])
+# imputados: columna -> (valor usado, cantidad de filas completadas)
+
+
+class ConjuntoHuellas:
+    """
+    Conjunto de hashes de 64 bits guardados en arreglos ordenados.
+
+    Las huellas nuevas de cada bloque forman un arreglo; cuando el último es
+    más chico que el nuevo se fusionan, de modo que hay O(log n) arreglos y
+    cada huella se copia O(log n) veces. Ocupa 8 bytes por huella.
+    """
+
+    def __init__(self):
+        self.arreglos = []
+
+    def __len__(self):
+        return sum(len(arreglo) for arreglo in self.arreglos)
+
+    def contiene(self, huellas):
+        presentes = np.zeros(len(huellas), dtype=bool)
+        for arreglo in self.arreglos:
+            posiciones = np.searchsorted(arreglo, huellas).clip(max=len(arreglo) - 1)
+            presentes |= arreglo[posiciones] == huellas
+        return presentes
+
+    def agregar(self, huellas):
+        """Agrega las huellas y devuelve la máscara de las que no se habían visto (primera aparición)"""
+        nuevas = np.zeros(len(huellas), dtype=bool)
+        nuevas[np.unique(huellas, return_index=True)[1]] = True
+        nuevas &= ~self.contiene(huellas)
+        if nuevas.any():
+            arreglo = np.sort(huellas[nuevas])
+            while self.arreglos and len(self.arreglos[-1]) <= len(arreglo):
+                arreglo = np.sort(np.concatenate([self.arreglos.pop(), arreglo]))
+            self.arreglos.append(arreglo)
+        return nuevas
+
+
+class Etapas:
+    """Tiempo y filas acumulados por etapa, para informar el rendimiento de cada una"""
+
+    def __init__(self):
+        self.tiempos = {}
+        self.filas = {}
+
+    @contextmanager
+    def medir(self, nombre, filas):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tiempos[nombre] = self.tiempos.get(nombre, 0.0) + time.perf_counter() - inicio
+            self.filas[nombre] = self.filas.get(nombre, 0) + filas
+
+    def resumen(self):
+        """[(etapa, filas, segundos, filas por segundo)] en el orden en que se ejecutaron"""
+        return [
+            (nombre, self.filas[nombre], segundos, self.filas[nombre] / segundos if segundos else float('inf'))
+            for nombre, segundos in self.tiempos.items()
+        ]
+
+
+def mediana(conteos):
+    """Mediana exacta a partir de {valor: cantidad}, igual que ``Series.median`` (None si está vacío)"""
+    total = sum(conteos.values())
+    if not total:
+        return None
+    valores = sorted(conteos)
+    acumulado = np.cumsum([conteos[valor] for valor in valores])
+    # Posiciones (base 0) de los dos valores centrales; coinciden si el total es impar
+    bajo = valores[int(np.searchsorted(acumulado, (total - 1) // 2, side='right'))]
+    alto = valores[int(np.searchsorted(acumulado, total // 2, side='right'))]
+    return (bajo + alto) / 2
+
+
+def moda(conteos):
+    """Valor más frecuente; ante un empate el menor, igual que ``Series.mode()[0]``"""
+    if not conteos:
+        return None
+    maximo = max(conteos.values())
+    return min(valor for valor, cantidad in conteos.items() if cantidad == maximo)
+
+
+def convertir_bloque(bloque):
+    """Columnas numéricas como float (NaN si están vacías o no son números) y Genero vacío como NaN"""
+    convertido = pd.DataFrame(index=bloque.index)
+    for columna in COLUMNAS_CSV:
+        if columna in COLUMNAS_NUMERICAS:
+            # Siempre float: la huella depende del tipo y to_numeric da int64 si el bloque no tiene decimales
+            convertido[columna] = pd.to_numeric(bloque[columna].str.strip(), errors='coerce').astype('float64')
+        else:
+            convertido[columna] = bloque[columna].mask(bloque[columna] == '')
+    return convertido
+
+
+def motivos_rechazo(bloque, convertido):
+    """
+    Motivo de rechazo de cada fila (NaN si es válida); se informa el primero.
+
+    Los vacíos de las columnas imputadas no son un error; los valores que no
+    son números sí. Los rangos se comprueban sobre el valor entero que se
+    escribirá, con los mensajes de ``clientes.validaciones``.
+    """
+    motivos = pd.Series(np.nan, index=bloque.index, dtype=object)
+
+    def marcar(mascara, mensaje):
+        motivos[mascara & motivos.isna()] = mensaje
+
+    vacios = bloque.apply(lambda columna: columna.str.strip() == '')
+    marcar(convertido['Cliente_ID'].isna() | (convertido['Cliente_ID'] < 1), 'Cliente_ID inválido')
+    marcar(vacios['Activo'], 'Activo vacío')
+    marcar(convertido['Activo'].isna(), 'Activo inválido')
+    marcar(vacios['Saldo'], 'Saldo vacío')
+    marcar(convertido['Saldo'].isna() | np.isinf(convertido['Saldo']), 'Saldo inválido')
+    marcar(convertido['Saldo'] < 0, validaciones.MENSAJE_SALDO_NEGATIVO)
+
+    edad = np.trunc(convertido['Edad'])
+    marcar(edad.isna() & ~vacios['Edad'], 'Edad inválida')
+    marcar(edad < validaciones.EDAD_MINIMA, validaciones.MENSAJE_EDAD_MINIMA)
+    marcar(edad > validaciones.EDAD_MAXIMA, validaciones.MENSAJE_EDAD_MAXIMA)
+
+    nivel = np.trunc(convertido['Nivel_de_Satisfaccion'])
+    marcar(nivel.isna() & ~vacios['Nivel_de_Satisfaccion'], 'Nivel_de_Satisfaccion inválido')
+    marcar((nivel < validaciones.SATISFACCION_MINIMA) | (nivel > validaciones.SATISFACCION_MAXIMA),
+           validaciones.MENSAJE_SATISFACCION)
+    return motivos
+
+
+def _agregar_csv(filas, ruta, encabezado):
+    filas.to_csv(ruta, mode='w' if encabezado else 'a', header=encabezado, index=False)
+
+
+def limpiar_csv(entrada, salida, rechazados, tamano_bloque=TAMANO_BLOQUE, al_avanzar=None):
+    """
+    Limpia ``entrada`` en dos pasadas y escribe ``salida`` y ``rechazados``.
+
+    ``rechazados`` lleva las columnas originales sin modificar, la fila (1 =
+    primera fila de datos) y el motivo. ``al_avanzar(pasada, filas)`` se llama
+    después de cada bloque. Lanza ValueError si hay que imputar una columna
+    que no tiene ningún valor válido.
+    """
+    etapas = Etapas()
+    conjunto = ConjuntoHuellas()
+    conteos = {columna: Counter() for columna in COLUMNAS_IMPUTADAS}
+    leidas = duplicadas = rechazadas = validas = 0
+    directorio = os.path.dirname(os.path.abspath(salida))
+    descriptor, temporal = tempfile.mkstemp(suffix='.csv', prefix='.limpiar_csv_', dir=directorio)
+    os.close(descriptor)
+    try:
+        # Primera pasada: deduplicar, validar, contar y guardar las filas válidas
+        bloques = leer_bloques(entrada, tamano_bloque)
+        while True:
+            with etapas.medir('lectura', 0):
+                bloque = next(bloques, None)
+            if bloque is None:
+                break
+            etapas.filas['lectura'] += len(bloque)
+            leidas += len(bloque)
+
+            with etapas.medir('deduplicación', len(bloque)):
+                convertido = convertir_bloque(bloque)
+                nuevas = conjunto.agregar(pd.util.hash_pandas_object(convertido, index=False).to_numpy())
+                duplicadas += int((~nuevas).sum())
+                bloque, convertido = bloque[nuevas], convertido[nuevas]
+
+            with etapas.medir('validación', len(bloque)):
+                motivos = motivos_rechazo(bloque, convertido)
+                invalidas = motivos.notna()
+                convertido = convertido[~invalidas]
+                for columna in COLUMNAS_IMPUTADAS:
+                    conteos[columna].update(convertido[columna].dropna().value_counts().to_dict())
+
+            with etapas.medir('escritura temporal', len(bloque)):
+                if invalidas.any():
+                    filas = bloque[invalidas].assign(Fila=bloque.index[invalidas] + 1, Motivo=motivos[invalidas])
+                    _agregar_csv(filas, rechazados, encabezado=not rechazadas)
+                _agregar_csv(convertido, temporal, encabezado=not validas)
+            rechazadas += int(invalidas.sum())
+            validas += len(convertido)
+            if al_avanzar:
+                al_avanzar(1, leidas)
+
+        if not rechazadas:
+            _agregar_csv(pd.DataFrame(columns=[*COLUMNAS_CSV, 'Fila', 'Motivo']), rechazados, encabezado=True)
+
+        valores = {
+            'Edad': mediana(conteos['Edad']),
+            'Genero': moda(conteos['Genero']),
+            'Nivel_de_Satisfaccion': mediana(conteos['Nivel_de_Satisfaccion']),
+        }
+        completados = dict.fromkeys(COLUMNAS_IMPUTADAS, 0)
+
+        # Segunda pasada: completar vacíos y escribir la salida
+        if not validas:
+            _agregar_csv(pd.DataFrame(columns=list(COLUMNAS_CSV)), salida, encabezado=True)
+            bloques = iter(())
+        else:
+            bloques = pd.read_csv(
+                temporal, dtype={columna: 'float64' for columna in COLUMNAS_NUMERICAS} | {'Genero': str},
+                keep_default_na=False, na_values={columna: [''] for columna in COLUMNAS_CSV},
+                chunksize=tamano_bloque,
+            )
+        escritas = 0
+        while True:
+            with etapas.medir('lectura temporal', 0):
+                bloque = next(bloques, None)
+            if bloque is None:
+                break
+            etapas.filas['lectura temporal'] += len(bloque)
+
+            with etapas.medir('imputación', len(bloque)):
+                for columna in COLUMNAS_IMPUTADAS:
+                    vacios = int(bloque[columna].isna().sum())
+                    if vacios and valores[columna] is None:
+                        raise ValueError(f'La columna {columna} no tiene valores válidos para completar los vacíos')
+                    completados[columna] += vacios
+                    bloque[columna] = bloque[columna].fillna(valores[columna])
+                bloque = bloque.astype({'Cliente_ID': 'int64', 'Edad': 'int64', 'Nivel_de_Satisfaccion': 'int64'})
+
+            with etapas.medir('escritura', len(bloque)):
+                _agregar_csv(bloque, salida, encabezado=not escritas)
+            escritas += len(bloque)
+            if al_avanzar:
+                al_avanzar(2, escritas)
+    finally:
+        os.remove(temporal)
+
+    imputados = {columna: (valores[columna], completados[columna]) for columna in COLUMNAS_IMPUTADAS}
+    return ResumenLimpieza(leidas, duplicadas, rechazadas, escritas, imputados, etapas.resumen())
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from clientes.benchmark import SUITES, generar_clientes
+from clientes.models import Cliente
+
+
+class Command(BaseCommand):
+    help = 'Mide las rutas de lectura sobre clientes sintéticos (se revierten al terminar)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--suite',
+            action='append',
+            choices=list(SUITES),
+            help='Suite a ejecutar (repetible; por defecto todas)',
+        )
+        parser.add_argument(
+            '--filas',
+            type=int,
+            default=10000,
+            help='Clientes sintéticos y tamaño de la página medida (por defecto 10000)',
+        )
+        parser.add_argument(
+            '--repeticiones',
+            type=int,
+            default=5,
+            help='Se informa el mejor tiempo de N repeticiones (por defecto 5)',
+        )
+
+    def handle(self, *args, **kwargs):
+        filas = kwargs['filas']
+        repeticiones = max(kwargs['repeticiones'], 1)
+        suites = kwargs.get('suite') or list(SUITES)
+
+        with transaction.atomic():
+            self.stdout.write(f'🧪 Generando {filas} clientes sintéticos...')
+            generar_clientes(filas)
+            queryset = Cliente.objects.order_by('-cliente_id')[:filas]
+
+            for nombre in suites:
+                self.stdout.write(self.style.HTTP_INFO(f'\n📊 Suite: {nombre}'))
+                mediciones, verificaciones = SUITES[nombre](queryset, repeticiones)
+                referencia = mediciones[0]
+                for medicion in mediciones:
+                    self.stdout.write(
+                        f'   {medicion.nombre:<34} {filas / medicion.segundos:>12,.0f} filas/s  '
+                        f'{medicion.segundos * 1000:>9.1f} ms  {medicion.tamano:>10,} bytes  '
+                        f'x{referencia.segundos / medicion.segundos:.2f}'
+                    )
+                for descripcion, correcto in verificaciones.items():
+                    if correcto:
+                        self.stdout.write(self.style.SUCCESS(f'   ✅ {descripcion}'))
+                    else:
+                        self.stdout.write(self.style.ERROR(f'   ❌ {descripcion}'))
+
+            # Los datos sintéticos no se conservan
+            transaction.set_rollback(True)
@@ -1,11 +1,20 @@
-import pandas as pd
-from decimal import Decimal, ROUND_HALF_UP
-from django.core.management.base import BaseCommand
+import time
+
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
-from clientes.models import Cliente
+from django.db import transaction
+from django.db.models import F
+from clientes.importacion import (
+    TAMANO_BLOQUE, copy_disponible, eliminar_ausentes, finalizar_importacion, huella_archivo, ids_del_archivo,
+    importar_bloque, leer_bloques,
+)
+from clientes.models import ImportacionCheckpoint
 
 User = get_user_model()
 
+# Errores por fila que se muestran; el resto solo se cuenta
+MAXIMO_ERRORES_MOSTRADOS = 50
+
 
 class Command(BaseCommand):
     help = 'Importa datos desde un archivo CSV a la tabla Cliente'
@@ -13,12 +22,42 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('csvfile', type=str,
                             help='Ruta al archivo CSV de clientes')
+        parser.add_argument('--modo', choices=['insertar', 'merge'], default='insertar',
+                            help='insertar: solo crea los IDs nuevos (por defecto); '
+                                 'merge: además actualiza los clientes cuyos datos cambiaron')
+        parser.add_argument('--eliminar-ausentes', action='store_true',
+                            help='Con --modo=merge, elimina los clientes que no aparecen en el archivo')
+        parser.add_argument('--reiniciar', action='store_true',
+                            help='Ignora el avance de una ejecución interrumpida y empieza desde el principio')
+        parser.add_argument('--tamano-bloque', type=int, default=TAMANO_BLOQUE,
+                            help=f'Filas leídas y confirmadas por bloque (por defecto {TAMANO_BLOQUE})')
+        parser.add_argument('--sin-copy', action='store_true',
+                            help='Usar INSERT por lotes aunque la base de datos sea PostgreSQL')
+
+    def _checkpoint(self, csv_file, modo, reiniciar):
+        """Checkpoint pendiente del mismo archivo y modo, o uno nuevo"""
+        huella = huella_archivo(csv_file)
+        pendientes = ImportacionCheckpoint.objects.filter(huella_archivo=huella, modo=modo, completado=False)
+        if reiniciar:
+            pendientes.delete()
+        checkpoint = pendientes.order_by('-iniciado').first()
+        if checkpoint is not None:
+            self.stdout.write(self.style.WARNING(
+                f"↩️  Reanudando la importación interrumpida desde la fila {checkpoint.filas_confirmadas + 1}"
+            ))
+            return checkpoint
+        return ImportacionCheckpoint.objects.create(archivo=csv_file, huella_archivo=huella, modo=modo)
 
     def handle(self, *args, **kwargs):
         csv_file = kwargs['csvfile']
+        merge = kwargs['modo'] == 'merge'
+        if kwargs['eliminar_ausentes'] and not merge:
+            raise CommandError('--eliminar-ausentes requiere --modo=merge')
+        tamano_bloque = max(kwargs['tamano_bloque'], 1)
 
         try:
-            df = pd.read_csv(csv_file)
+            checkpoint = self._checkpoint(csv_file, kwargs['modo'], kwargs['reiniciar'])
+            bloques = leer_bloques(csv_file, tamano_bloque, desde=checkpoint.filas_confirmadas)
         except FileNotFoundError:
             self.stderr.write(self.style.ERROR(
                 f"❌ El archivo {csv_file} no fue encontrado."))
@@ -38,72 +77,75 @@ class Command(BaseCommand):
             }
         )
 
-        self.stdout.write(f"📊 Procesando {len(df)} registros del CSV...")
-
-        success_count = 0
-        error_count = 0
-        skip_count = 0
-
-        for index, row in df.iterrows():
-            try:
-                # Convertir género de "Masculino"/"Femenino" a "M"/"F"
-                genero_map = {
-                    'Masculino': 'M',
-                    'Femenino': 'F',
-                    'M': 'M',
-                    'F': 'F'
-                }
-                genero = genero_map.get(str(row['Genero']).strip(), 'M')
-
-                # Convertir activo (1.0/0.0 o True/False)
-                activo = bool(float(row['Activo']))
-
-                # Verificar si el cliente ya existe
-                cliente_id = int(row['Cliente_ID'])
-                if Cliente.objects.filter(cliente_id=cliente_id).exists():
-                    skip_count += 1
-                    continue
-
-                # Convertir saldo a Decimal con exactamente 2 decimales
-                # Esto evita problemas de precisión de punto flotante
-                saldo_raw = float(row['Saldo'])
-                saldo_decimal = Decimal(str(saldo_raw)).quantize(
-                    Decimal('0.01'),
-                    rounding=ROUND_HALF_UP
-                )
-
-                # Crear cliente
-                Cliente.objects.create(
-                    cliente_id=cliente_id,
-                    usuario=admin_user,
-                    edad=int(row['Edad']),
-                    genero=genero,
-                    saldo=saldo_decimal,
-                    activo=activo,
-                    nivel_de_satisfaccion=int(row['Nivel_de_Satisfaccion'])
-                )
-                success_count += 1
-
-                # Mostrar progreso cada 500 registros
-                if (index + 1) % 500 == 0:
-                    self.stdout.write(f"   Procesados: {index + 1}/{len(df)}")
+        usar_copy = copy_disponible() and not kwargs['sin_copy']
+        self.stdout.write(
+            f"📊 Procesando {csv_file} por bloques en modo {kwargs['modo']} "
+            f"({'COPY' if usar_copy else 'INSERT por lotes'})..."
+        )
 
-            except Exception as e:
-                error_count += 1
-                self.stderr.write(self.style.WARNING(
-                    f"⚠️  Error en fila {index + 1} (ID: {row.get('Cliente_ID', 'N/A')}): {e}"
-                ))
+        leidos = mostrados = 0
+        interrumpida = False
+        inicio = time.perf_counter()
+        try:
+            for bloque in bloques:
+                # El bloque y el avance se confirman juntos: al reanudar no se repite ni se pierde nada
+                with transaction.atomic():
+                    resultado = importar_bloque(bloque, admin_user.pk, usar_copy, merge)
+                    ImportacionCheckpoint.objects.filter(pk=checkpoint.pk).update(
+                        filas_confirmadas=F('filas_confirmadas') + resultado.leidos,
+                        creados=F('creados') + resultado.creados,
+                        actualizados=F('actualizados') + resultado.actualizados,
+                        omitidos=F('omitidos') + resultado.omitidos,
+                        errores=F('errores') + len(resultado.errores),
+                    )
+                leidos += resultado.leidos
+                for error in resultado.errores[:max(MAXIMO_ERRORES_MOSTRADOS - mostrados, 0)]:
+                    self.stderr.write(self.style.WARNING(
+                        f"⚠️  Error en fila {error.fila} (ID: {error.cliente_id or 'N/A'}): {error.mensaje}"
+                    ))
+                mostrados += len(resultado.errores)
+                self.stdout.write(f"   Procesados: {leidos} ({leidos / (time.perf_counter() - inicio):,.0f} filas/s)")
+
+            if kwargs['eliminar_ausentes']:
+                presentes = ids_del_archivo(csv_file, tamano_bloque)
+                if len(presentes):
+                    eliminados = eliminar_ausentes(presentes)
+                    ImportacionCheckpoint.objects.filter(pk=checkpoint.pk).update(eliminados=eliminados)
+                else:
+                    self.stderr.write(self.style.WARNING(
+                        "⚠️  El archivo no tiene IDs válidos: no se elimina ningún cliente"))
+            ImportacionCheckpoint.objects.filter(pk=checkpoint.pk).update(completado=True)
+        except Exception as e:
+            interrumpida = True
+            self.stderr.write(self.style.ERROR(
+                f"❌ Importación interrumpida: {e} (los bloques anteriores ya se guardaron; "
+                f"vuelve a ejecutar el comando para continuar)"))
+        finally:
+            # También tras un error (o al reanudar una ejecución que no llegó a
+            # este punto), para que las estadísticas reflejen lo importado
+            checkpoint.refresh_from_db()
+            if checkpoint.creados or checkpoint.actualizados or checkpoint.eliminados:
+                finalizar_importacion()
 
         # Resumen
         self.stdout.write("")
         self.stdout.write(self.style.SUCCESS("═" * 60))
-        self.stdout.write(self.style.SUCCESS(
-            f"✅ Importación completada"))
-        self.stdout.write(self.style.SUCCESS(f"   Registros creados:  {success_count}"))
-        if skip_count > 0:
+        duracion = time.perf_counter() - inicio
+        if interrumpida:
+            self.stdout.write(self.style.WARNING(f"⚠️  Importación interrumpida tras {duracion:.1f} s"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ Importación completada en {duracion:.1f} s"))
+        self.stdout.write(self.style.SUCCESS(f"   Registros creados:  {checkpoint.creados}"))
+        if merge:
+            self.stdout.write(self.style.SUCCESS(f"   Registros actualizados: {checkpoint.actualizados}"))
+        if checkpoint.omitidos > 0:
+            motivo = 'sin cambios' if merge else 'ya existían'
+            self.stdout.write(self.style.WARNING(
+                f"   Registros omitidos: {checkpoint.omitidos} ({motivo})"))
+        if checkpoint.eliminados > 0:
             self.stdout.write(self.style.WARNING(
-                f"   Registros omitidos: {skip_count} (ya existían)"))
-        if error_count > 0:
+                f"   Registros eliminados: {checkpoint.eliminados} (ausentes del archivo)"))
+        if checkpoint.errores > 0:
             self.stdout.write(self.style.ERROR(
-                f"   Registros con error: {error_count}"))
+                f"   Registros con error: {checkpoint.errores}"))
         self.stdout.write(self.style.SUCCESS("═" * 60))
@@ -1,6 +1,11 @@
+import time
+
 from django.core.management.base import BaseCommand
 from clientes.models import Cliente
 
+# Clientes por lote cuando no se puede truncar la tabla
+TAMANO_LOTE = 5000
+
 
 class Command(BaseCommand):
     help = 'Elimina todos los clientes de la base de datos'
@@ -11,6 +16,38 @@ class Command(BaseCommand):
             action='store_true',
             help='Confirma que deseas eliminar todos los clientes',
         )
+        parser.add_argument(
+            '--por-lotes',
+            action='store_true',
+            help='Elimina por lotes de IDs aunque se pueda truncar la tabla (no reinicia los IDs)',
+        )
+        parser.add_argument(
+            '--tamano-lote',
+            type=int,
+            default=TAMANO_LOTE,
+            help=f'Clientes por lote al eliminar por lotes (por defecto {TAMANO_LOTE})',
+        )
+
+    def eliminar_por_lotes(self, total, tamano_lote):
+        """
+        Elimina por lotes de IDs, cada uno en su transacción.
+
+        Cada lote pasa por ``ClienteQuerySet.delete``: sin instanciar si es seguro,
+        o con la eliminación estándar (señales y cascadas) acotada al lote.
+        """
+        ids = Cliente.objects.order_by('pk').values_list('pk', flat=True)
+        eliminados, ultimo = 0, None
+        inicio = time.perf_counter()
+        while True:
+            lote = list((ids if ultimo is None else ids.filter(pk__gt=ultimo))[:tamano_lote])
+            if not lote:
+                return eliminados
+            eliminados += Cliente.objects.filter(pk__in=lote).delete()[0]
+            ultimo = lote[-1]
+            self.stdout.write(
+                f'   Eliminados: {eliminados}/{total} '
+                f'({eliminados / (time.perf_counter() - inicio):,.0f} clientes/s)'
+            )
 
     def handle(self, *args, **kwargs):
         confirmar = kwargs.get('confirmar', False)
@@ -38,9 +75,15 @@ class Command(BaseCommand):
             f'Se eliminarán {count} clientes'
         ))
 
-        # Eliminar todos los clientes
-        Cliente.objects.all().delete()
+        # Truncar si ningún handler ni relación depende de las filas; si no, por lotes
+        inicio = time.perf_counter()
+        eliminados = None if kwargs['por_lotes'] else Cliente.objects.all().truncar()
+        if eliminados is None:
+            self.stdout.write('🗑️  Eliminando por lotes...')
+            eliminados = self.eliminar_por_lotes(count, max(kwargs['tamano_lote'], 1))
+        else:
+            self.stdout.write('🗑️  Tabla truncada (los IDs se reinician)')
 
         self.stdout.write(self.style.SUCCESS(
-            f'✅ {count} clientes eliminados exitosamente'
+            f'✅ {eliminados} clientes eliminados exitosamente en {time.perf_counter() - inicio:.1f} s'
         ))
@@ -0,0 +1,52 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from clientes.importacion import TAMANO_BLOQUE
+from clientes.limpieza import limpiar_csv
+
+
+class Command(BaseCommand):
+    help = 'Limpia un CSV de clientes por bloques (duplicados, vacíos y rangos) antes de importarlo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('entrada', nargs='?', default='clientes_banco.csv',
+                            help='CSV original (por defecto clientes_banco.csv)')
+        parser.add_argument('salida', nargs='?', default='clientes_limpios.csv',
+                            help='CSV limpio (por defecto clientes_limpios.csv)')
+        parser.add_argument('--rechazados',
+                            help='CSV con las filas rechazadas y su motivo (por defecto <salida>_rechazados.csv)')
+        parser.add_argument('--tamano-bloque', type=int, default=TAMANO_BLOQUE,
+                            help=f'Filas procesadas por bloque (por defecto {TAMANO_BLOQUE})')
+
+    def handle(self, *args, **kwargs):
+        entrada, salida = kwargs['entrada'], kwargs['salida']
+        rechazados = kwargs['rechazados'] or f'{os.path.splitext(salida)[0]}_rechazados.csv'
+        if not os.path.exists(entrada):
+            raise CommandError(f'❌ El archivo {entrada} no fue encontrado.')
+
+        self.stdout.write(f'🧹 Limpiando {entrada} por bloques...')
+
+        def al_avanzar(pasada, filas):
+            self.stdout.write(f'   Pasada {pasada}: {filas} filas')
+
+        try:
+            resumen = limpiar_csv(entrada, salida, rechazados, max(kwargs['tamano_bloque'], 1), al_avanzar)
+        except (ValueError, KeyError) as e:
+            # KeyError: faltan columnas; ValueError: CSV ilegible o sin valores para imputar
+            raise CommandError(f'❌ Error al limpiar el archivo CSV: {e}')
+
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS('═' * 60))
+        self.stdout.write(self.style.SUCCESS(f'✅ {resumen.escritas} filas limpias en {salida}'))
+        self.stdout.write(f'   Filas leídas:      {resumen.leidas}')
+        self.stdout.write(f'   Duplicadas:        {resumen.duplicadas}')
+        if resumen.rechazadas:
+            self.stdout.write(self.style.WARNING(f'   Rechazadas:        {resumen.rechazadas} (ver {rechazados})'))
+        for columna, (valor, cantidad) in resumen.imputados.items():
+            if cantidad:
+                self.stdout.write(f'   {columna} completados: {cantidad} (con {valor})')
+        self.stdout.write('')
+        self.stdout.write('⏱️  Rendimiento por etapa:')
+        for etapa, filas, segundos, por_segundo in resumen.etapas:
+            self.stdout.write(f'   {etapa:<20} {filas:>10} filas  {segundos:8.2f} s  {por_segundo:>12,.0f} filas/s')
+        self.stdout.write(self.style.SUCCESS('═' * 60))
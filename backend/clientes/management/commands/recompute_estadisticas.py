@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from clientes.estadisticas import obtener_snapshot, reconstruir_snapshot, verificar_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el snapshot de estadísticas desde la tabla Cliente y detecta deriva'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Solo compara el snapshot con la tabla, sin reconstruirlo',
+        )
+
+    def handle(self, *args, **kwargs):
+        deriva = verificar_snapshot(obtener_snapshot())
+
+        if deriva:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️  Deriva detectada en {len(deriva)} campos:'
+            ))
+            for campo, (almacenado, real) in deriva.items():
+                self.stdout.write(f'   {campo}: snapshot={almacenado} real={real}')
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ El snapshot coincide con la tabla Cliente'))
+
+        if kwargs.get('verificar'):
+            return
+
+        snapshot = reconstruir_snapshot()
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Snapshot reconstruido (versión {snapshot.version}, {snapshot.total} clientes)'
+        ))
@@ -0,0 +1,261 @@
+"""
+Escritura masiva de clientes (``POST /api/v1/clientes/bulk/``).
+
+Las filas se validan por columnas en una sola pasada, sin instanciar un
+serializer ni un Cliente por fila: cada columna usa un chequeo rápido para
+los valores ya canónicos y recurre al campo de ClienteSerializer (mismos
+mensajes) solo para convertir o rechazar el resto. Las filas válidas se
+aplican en una transacción con ``bulk_create``/``bulk_update``/``delete``,
+que mantienen la secuencia de cambios y el snapshot de estadísticas.
+
+También valida los valores de las acciones por filtro (``actualizar-masivo``).
+"""
+from django.contrib.auth.models import User
+from django.db import transaction
+from rest_framework import serializers
+
+from .models import Cliente
+from .serializers import ClienteSerializer
+from .versionado import reservar_secuencia
+
+OPERACIONES = ('create', 'upsert', 'delete')
+MAXIMO_FILAS = 10000
+TAMANO_LOTE = 1000
+
+CAMPOS_REQUERIDOS = ('edad', 'genero', 'saldo', 'nivel_de_satisfaccion')
+CAMPOS_ACTUALIZABLES = CAMPOS_REQUERIDOS + ('activo', 'usuario')
+
+# Valores que no necesitan conversión ni validación adicional
+VALORES_CANONICOS = {
+    'edad': lambda valor: type(valor) is int and 18 <= valor <= 120,
+    'genero': lambda valor: valor in ('M', 'F'),
+    'activo': lambda valor: type(valor) is bool,
+    'nivel_de_satisfaccion': lambda valor: type(valor) is int and 1 <= valor <= 5,
+}
+
+
+def parsear_solicitud(data):
+    """Valida la forma del cuerpo; lanza ValidationError (400) si no es válida"""
+    if not isinstance(data, dict):
+        raise serializers.ValidationError({'non_field_errors': ['Se esperaba un objeto JSON']})
+    operacion = data.get('operacion')
+    if operacion not in OPERACIONES:
+        raise serializers.ValidationError({'operacion': [f"Opciones: {', '.join(OPERACIONES)}"]})
+    filas = data.get('clientes')
+    if not isinstance(filas, list) or not filas:
+        raise serializers.ValidationError({'clientes': ['Se esperaba una lista no vacía']})
+    if len(filas) > MAXIMO_FILAS:
+        raise serializers.ValidationError({'clientes': [f'Máximo {MAXIMO_FILAS} filas por solicitud']})
+    try:
+        atomico = serializers.BooleanField().run_validation(data.get('atomico', False))
+    except serializers.ValidationError as exc:
+        raise serializers.ValidationError({'atomico': exc.detail})
+    return operacion, filas, atomico
+
+
+def _validar_valor(campo, validar, valor):
+    """Convierte y valida ``valor`` como el serializer: campo y luego ``validate_<campo>``"""
+    valor = campo.run_validation(valor)
+    return validar(valor) if validar else valor
+
+
+def validar_cambios(cambios):
+    """
+    Valores de una actualización por filtro, con las reglas del serializer.
+
+    Lanza ValidationError (400) con los errores por campo, igual que un PATCH.
+    """
+    if not isinstance(cambios, dict) or not cambios:
+        raise serializers.ValidationError({'cambios': ['Se esperaba un objeto con los campos a modificar']})
+    serializer = ClienteSerializer()
+    limpios, errores = {}, {}
+    for nombre, valor in cambios.items():
+        if nombre not in CAMPOS_ACTUALIZABLES:
+            errores[nombre] = [f"Campo no modificable. Opciones: {', '.join(CAMPOS_ACTUALIZABLES)}"]
+            continue
+        try:
+            limpios[nombre] = _validar_valor(
+                serializer.fields[nombre], getattr(serializer, f'validate_{nombre}', None), valor
+            )
+        except serializers.ValidationError as exc:
+            errores[nombre] = list(exc.detail)
+    if errores:
+        raise serializers.ValidationError(errores)
+    return limpios
+
+
+def _agregar_error(errores, indice, campo, mensajes):
+    errores.setdefault(indice, {})[campo] = list(mensajes)
+
+
+def _validar_columnas(filas, errores, parciales=()):
+    """
+    Valores limpios por fila, validando una columna a la vez.
+
+    Las filas de ``parciales`` (actualizaciones) solo validan los campos enviados.
+    """
+    serializer = ClienteSerializer()
+    limpias = [{} for _ in filas]
+    for indice, fila in enumerate(filas):
+        if not isinstance(fila, dict):
+            _agregar_error(errores, indice, 'non_field_errors', ['Se esperaba un objeto'])
+
+    for nombre in CAMPOS_REQUERIDOS + ('activo',):
+        campo = serializer.fields[nombre]
+        validar = getattr(serializer, f'validate_{nombre}', None)
+        canonico = VALORES_CANONICOS.get(nombre)
+        for indice, fila in enumerate(filas):
+            if indice in errores and 'non_field_errors' in errores[indice]:
+                continue
+            if nombre not in fila:
+                if nombre in CAMPOS_REQUERIDOS and indice not in parciales:
+                    _agregar_error(errores, indice, nombre, [campo.error_messages['required']])
+                continue
+            valor = fila[nombre]
+            if canonico is not None and canonico(valor):
+                limpias[indice][nombre] = valor
+                continue
+            try:
+                limpias[indice][nombre] = _validar_valor(campo, validar, valor)
+            except serializers.ValidationError as exc:
+                _agregar_error(errores, indice, nombre, exc.detail)
+
+    # usuario: todas las referencias se verifican con una consulta
+    campo = serializer.fields['usuario']
+    referencias = {}
+    for indice, fila in enumerate(filas):
+        if isinstance(fila, dict) and fila.get('usuario') is not None:
+            valor = fila['usuario']
+            if type(valor) is int:
+                referencias[indice] = valor
+            else:
+                _agregar_error(errores, indice, 'usuario', [
+                    campo.error_messages['incorrect_type'].format(data_type=type(valor).__name__)
+                ])
+        elif isinstance(fila, dict) and 'usuario' in fila:
+            limpias[indice]['usuario_id'] = None
+    existentes = set(User.objects.filter(pk__in=set(referencias.values())).values_list('pk', flat=True))
+    for indice, usuario_id in referencias.items():
+        if usuario_id in existentes:
+            limpias[indice]['usuario_id'] = usuario_id
+        else:
+            _agregar_error(errores, indice, 'usuario', [campo.error_messages['does_not_exist'].format(pk_value=usuario_id)])
+    return limpias
+
+
+def _identificadores(filas, errores, requerido):
+    """``cliente_id`` de cada fila (o None), marcando inválidos y repetidos"""
+    ids, vistos = [], set()
+    for indice, fila in enumerate(filas):
+        cliente_id = fila.get('cliente_id') if isinstance(fila, dict) else fila
+        if cliente_id is None and not requerido:
+            ids.append(None)
+            continue
+        if type(cliente_id) is not int:
+            _agregar_error(errores, indice, 'cliente_id', ['Se requiere un ID de cliente entero'])
+            cliente_id = None
+        elif cliente_id in vistos:
+            _agregar_error(errores, indice, 'cliente_id', ['ID repetido en la solicitud'])
+            cliente_id = None
+        else:
+            vistos.add(cliente_id)
+        ids.append(cliente_id)
+    return ids
+
+
+def _resultado(indice, estado, cliente_id=None, errores=None):
+    resultado = {'indice': indice, 'estado': estado}
+    if cliente_id is not None:
+        resultado['cliente_id'] = cliente_id
+    if errores:
+        resultado['errores'] = errores
+    return resultado
+
+
+def _rechazados(errores, total):
+    return [
+        _resultado(indice, 'error', errores=errores[indice]) if indice in errores
+        else _resultado(indice, 'omitido')
+        for indice in range(total)
+    ]
+
+
+def aplicar(operacion, filas, usuario=None, atomico=False):
+    """
+    Valida y aplica ``filas`` en una transacción.
+
+    - ``create``: crea todas las filas (``cliente_id`` se ignora).
+    - ``upsert``: actualiza las filas con ``cliente_id`` existente y crea las
+      que no lo traen; un ``cliente_id`` inexistente es un error, porque los
+      IDs los asigna la base de datos.
+    - ``delete``: ``clientes`` es una lista de IDs (o de objetos con ``cliente_id``).
+
+    Con ``atomico`` no se aplica nada si alguna fila tiene errores. Devuelve
+    ``(resultados, aplicado)``, con un resultado por fila en el orden recibido.
+    """
+    errores = {}
+    if operacion == 'delete':
+        ids = _identificadores(filas, errores, requerido=True)
+        limpias = None
+    else:
+        ids = _identificadores(filas, errores, requerido=False) if operacion == 'upsert' else [None] * len(filas)
+        parciales = {indice for indice, cliente_id in enumerate(ids) if cliente_id is not None}
+        limpias = _validar_columnas(filas, errores, parciales)
+
+    if atomico and errores:
+        return _rechazados(errores, len(filas)), False
+
+    resultados = {}
+    with transaction.atomic():
+        # Bloquea el snapshot: ninguna otra escritura de Cliente se intercala
+        reservar_secuencia()
+        solicitados = [cliente_id for indice, cliente_id in enumerate(ids)
+                       if cliente_id is not None and indice not in errores]
+        existentes = {}
+        for inicio in range(0, len(solicitados), TAMANO_LOTE):
+            existentes.update(
+                Cliente.objects.select_for_update().in_bulk(solicitados[inicio:inicio + TAMANO_LOTE])
+            )
+
+        for indice, cliente_id in enumerate(ids):
+            if cliente_id is not None and indice not in errores and cliente_id not in existentes:
+                errores[indice] = {'cliente_id': ['Cliente no encontrado']}
+        if atomico and errores:
+            return _rechazados(errores, len(filas)), False
+
+        nuevos, modificados, eliminar, campos_modificados = [], [], [], set()
+        for indice, cliente_id in enumerate(ids):
+            if indice in errores:
+                continue
+            if operacion == 'delete':
+                eliminar.append((indice, cliente_id))
+            elif cliente_id is not None:
+                cliente = existentes[cliente_id]
+                for campo, valor in limpias[indice].items():
+                    setattr(cliente, campo, valor)
+                campos_modificados.update(limpias[indice])
+                modificados.append((indice, cliente))
+            else:
+                if usuario is not None:
+                    limpias[indice]['usuario_id'] = usuario.pk
+                nuevos.append((indice, Cliente(**limpias[indice])))
+
+        if nuevos:
+            Cliente.objects.bulk_create([cliente for _, cliente in nuevos], batch_size=TAMANO_LOTE)
+            resultados.update((indice, _resultado(indice, 'creado', cliente.pk)) for indice, cliente in nuevos)
+        if modificados:
+            Cliente.objects.bulk_update(
+                [cliente for _, cliente in modificados], sorted(campos_modificados), batch_size=TAMANO_LOTE
+            )
+            resultados.update(
+                (indice, _resultado(indice, 'actualizado', cliente.pk)) for indice, cliente in modificados
+            )
+        if eliminar:
+            Cliente.objects.filter(pk__in=[cliente_id for _, cliente_id in eliminar]).delete()
+            resultados.update(
+                (indice, _resultado(indice, 'eliminado', cliente_id)) for indice, cliente_id in eliminar
+            )
+
+    for indice, detalle in errores.items():
+        resultados[indice] = _resultado(indice, 'error', errores=detalle)
+    return [resultados[indice] for indice in range(len(filas))], True
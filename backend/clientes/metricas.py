@@ -0,0 +1,34 @@
+"""
+Contadores de las cachés de la API, por proceso.
+
+Cada evento es ``<caché>.<evento>`` (por ejemplo ``respuestas.aciertos``);
+``metricas-cache`` los resume con ``resumen_metricas``.
+"""
+import threading
+from collections import Counter
+
+
+class Metricas:
+    """Contadores de las cachés de la API en este proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.contadores = Counter()
+
+    def registrar(self, evento, cantidad=1):
+        with self._lock:
+            self.contadores[evento] += cantidad
+
+    def resumen(self, prefijo):
+        """``{evento: cantidad}`` de los eventos ``<prefijo>.<evento>``"""
+        with self._lock:
+            return {
+                evento.removeprefix(f'{prefijo}.'): cantidad
+                for evento, cantidad in self.contadores.items() if evento.startswith(f'{prefijo}.')
+            }
+
+
+metricas = Metricas()
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.3 on 2026-10-17 18:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0005_alter_cliente_usuario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticasSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.PositiveBigIntegerField(default=0)),
+                ('activos', models.PositiveBigIntegerField(default=0)),
+                ('masculino', models.PositiveBigIntegerField(default=0)),
+                ('femenino', models.PositiveBigIntegerField(default=0)),
+                ('satisfaccion_1', models.PositiveBigIntegerField(default=0)),
+                ('satisfaccion_2', models.PositiveBigIntegerField(default=0)),
+                ('satisfaccion_3', models.PositiveBigIntegerField(default=0)),
+                ('satisfaccion_4', models.PositiveBigIntegerField(default=0)),
+                ('satisfaccion_5', models.PositiveBigIntegerField(default=0)),
+                ('edad_18_30', models.PositiveBigIntegerField(default=0)),
+                ('edad_31_45', models.PositiveBigIntegerField(default=0)),
+                ('edad_46_60', models.PositiveBigIntegerField(default=0)),
+                ('edad_61_80', models.PositiveBigIntegerField(default=0)),
+                ('edad_81_mas', models.PositiveBigIntegerField(default=0)),
+                ('suma_edad_18_30', models.PositiveBigIntegerField(default=0)),
+                ('suma_edad_31_45', models.PositiveBigIntegerField(default=0)),
+                ('suma_edad_46_60', models.PositiveBigIntegerField(default=0)),
+                ('suma_edad_61_80', models.PositiveBigIntegerField(default=0)),
+                ('suma_edad_81_mas', models.PositiveBigIntegerField(default=0)),
+                ('suma_edad', models.BigIntegerField(default=0)),
+                ('suma_saldo', models.DecimalField(decimal_places=2, default=0, max_digits=100)),
+                ('suma_satisfaccion_masculino', models.BigIntegerField(default=0)),
+                ('suma_satisfaccion_femenino', models.BigIntegerField(default=0)),
+                ('saldo_maximo', models.DecimalField(blank=True, decimal_places=2, max_digits=100, null=True)),
+                ('saldo_minimo', models.DecimalField(blank=True, decimal_places=2, max_digits=100, null=True)),
+                ('edad_maxima', models.IntegerField(blank=True, null=True)),
+                ('edad_minima', models.IntegerField(blank=True, null=True)),
+                ('extremos_validos', models.BooleanField(default=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Snapshot de estadísticas',
+                'verbose_name_plural': 'Snapshots de estadísticas',
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='cliente',
+            options={'ordering': ['-cliente_id'], 'verbose_name': 'Cliente', 'verbose_name_plural': 'Clientes'},
+        ),
+    ]
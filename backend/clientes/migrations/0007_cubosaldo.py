@@ -0,0 +1,24 @@
+# Generated by Django 5.1.3 on 2026-10-17 18:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0006_estadisticassnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CuboSaldo',
+            fields=[
+                ('indice', models.IntegerField(primary_key=True, serialize=False)),
+                ('conteo', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Cubo de saldo',
+                'verbose_name_plural': 'Cubos de saldo',
+            },
+        ),
+    ]
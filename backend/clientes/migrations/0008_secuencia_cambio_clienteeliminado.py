@@ -0,0 +1,30 @@
+# Generated by Django 5.1.3 on 2026-10-17 18:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0007_cubosaldo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClienteEliminado',
+            fields=[
+                ('cliente_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('secuencia_cambio', models.BigIntegerField(db_index=True)),
+                ('eliminado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Cliente eliminado',
+                'verbose_name_plural': 'Clientes eliminados',
+            },
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='secuencia_cambio',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+    ]
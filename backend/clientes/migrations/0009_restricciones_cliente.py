@@ -0,0 +1,127 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:14
+
+import sys
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Las reglas de clientes.validaciones tal como existen en esta migración
+EDAD_MINIMA, EDAD_MAXIMA = 18, 120
+SATISFACCION_MINIMA, SATISFACCION_MAXIMA = 1, 5
+IDS_MOSTRADOS = 50
+
+
+def motivos_invalidos(fila):
+    motivos = []
+    if not EDAD_MINIMA <= fila['edad'] <= EDAD_MAXIMA:
+        motivos.append(f"edad {fila['edad']} fuera de {EDAD_MINIMA}-{EDAD_MAXIMA}")
+    if fila['saldo'] < 0:
+        motivos.append(f"saldo {fila['saldo']} negativo")
+    if not SATISFACCION_MINIMA <= fila['nivel_de_satisfaccion'] <= SATISFACCION_MAXIMA:
+        motivos.append(
+            f"nivel_de_satisfaccion {fila['nivel_de_satisfaccion']} fuera de {SATISFACCION_MINIMA}-{SATISFACCION_MAXIMA}"
+        )
+    return motivos
+
+
+def apartar_invalidos(apps, schema_editor):
+    """
+    Mueve a ClienteCuarentena los clientes que violarían las restricciones CHECK.
+
+    Sin este paso ``migrate`` falla con un IntegrityError a mitad del despliegue
+    si la tabla ya tiene datos fuera de rango. Cada cliente apartado deja su
+    marca de eliminación (para los consumidores de ``cambios/``) y el snapshot
+    y los cubos se descartan para que la siguiente lectura los reconstruya.
+    """
+    Cliente = apps.get_model('clientes', 'Cliente')
+    ClienteCuarentena = apps.get_model('clientes', 'ClienteCuarentena')
+    ClienteEliminado = apps.get_model('clientes', 'ClienteEliminado')
+    EstadisticasSnapshot = apps.get_model('clientes', 'EstadisticasSnapshot')
+    CuboSaldo = apps.get_model('clientes', 'CuboSaldo')
+
+    fuera_de_rango = (
+        models.Q(edad__lt=EDAD_MINIMA) | models.Q(edad__gt=EDAD_MAXIMA) | models.Q(saldo__lt=0)
+        | models.Q(nivel_de_satisfaccion__lt=SATISFACCION_MINIMA)
+        | models.Q(nivel_de_satisfaccion__gt=SATISFACCION_MAXIMA)
+    )
+    filas = list(Cliente.objects.filter(fuera_de_rango).order_by('pk').values(
+        'cliente_id', 'usuario_id', 'edad', 'genero', 'saldo', 'activo', 'nivel_de_satisfaccion',
+    ))
+    if not filas:
+        return
+
+    ids = [fila['cliente_id'] for fila in filas]
+    ClienteCuarentena.objects.bulk_create([
+        ClienteCuarentena(
+            cliente_id=fila['cliente_id'],
+            datos={**fila, 'saldo': f"{fila['saldo']:f}"},
+            motivos=motivos_invalidos(fila),
+        )
+        for fila in filas
+    ])
+    secuencia = 1 + max(
+        Cliente.objects.aggregate(maxima=models.Max('secuencia_cambio'))['maxima'] or 0,
+        ClienteEliminado.objects.aggregate(maxima=models.Max('secuencia_cambio'))['maxima'] or 0,
+        EstadisticasSnapshot.objects.aggregate(maxima=models.Max('version'))['maxima'] or 0,
+    )
+    ClienteEliminado.objects.bulk_create(
+        [ClienteEliminado(cliente_id=cliente_id, secuencia_cambio=secuencia) for cliente_id in ids],
+        update_conflicts=True, unique_fields=['cliente_id'], update_fields=['secuencia_cambio'],
+    )
+    Cliente.objects.filter(pk__in=ids).delete()
+    EstadisticasSnapshot.objects.all().delete()
+    CuboSaldo.objects.all().delete()
+
+    mostrados = ', '.join(str(cliente_id) for cliente_id in ids[:IDS_MOSTRADOS])
+    resto = f' y {len(ids) - IDS_MOSTRADOS} más' if len(ids) > IDS_MOSTRADOS else ''
+    sys.stdout.write(
+        f'\n  {len(ids)} cliente(s) fuera de las reglas movidos a ClienteCuarentena: {mostrados}{resto}\n'
+    )
+
+
+def restaurar_apartados(apps, schema_editor):
+    """Devuelve a Cliente los apartados (las restricciones ya se quitaron al revertir)"""
+    Cliente = apps.get_model('clientes', 'Cliente')
+    ClienteCuarentena = apps.get_model('clientes', 'ClienteCuarentena')
+    ClienteEliminado = apps.get_model('clientes', 'ClienteEliminado')
+    apartados = list(ClienteCuarentena.objects.all())
+    Cliente.objects.bulk_create([Cliente(**apartado.datos) for apartado in apartados])
+    ClienteEliminado.objects.filter(pk__in=[apartado.cliente_id for apartado in apartados]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0008_secuencia_cambio_clienteeliminado'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClienteCuarentena',
+            fields=[
+                ('cliente_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('datos', models.JSONField()),
+                ('motivos', models.JSONField()),
+                ('apartado', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Cliente en cuarentena',
+                'verbose_name_plural': 'Clientes en cuarentena',
+            },
+        ),
+        # Antes de las restricciones: con filas fuera de rango fallarían con un IntegrityError
+        migrations.RunPython(apartar_invalidos, restaurar_apartados),
+        migrations.AddConstraint(
+            model_name='cliente',
+            constraint=models.CheckConstraint(condition=models.Q(('edad__gte', 18), ('edad__lte', 120)), name='cliente_edad_rango', violation_error_message='La edad debe estar entre 18 y 120 años'),
+        ),
+        migrations.AddConstraint(
+            model_name='cliente',
+            constraint=models.CheckConstraint(condition=models.Q(('saldo__gte', 0)), name='cliente_saldo_no_negativo', violation_error_message='El saldo no puede ser negativo'),
+        ),
+        migrations.AddConstraint(
+            model_name='cliente',
+            constraint=models.CheckConstraint(condition=models.Q(('nivel_de_satisfaccion__gte', 1), ('nivel_de_satisfaccion__lte', 5)), name='cliente_satisfaccion_rango', violation_error_message='El nivel de satisfacción debe estar entre 1 y 5'),
+        ),
+    ]
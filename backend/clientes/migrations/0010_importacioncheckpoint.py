@@ -0,0 +1,35 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0009_restricciones_cliente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportacionCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('archivo', models.CharField(max_length=500)),
+                ('huella_archivo', models.CharField(db_index=True, max_length=64)),
+                ('modo', models.CharField(choices=[('insertar', 'Insertar nuevos'), ('merge', 'Merge (insertar, actualizar y eliminar ausentes)')], max_length=10)),
+                ('filas_confirmadas', models.PositiveBigIntegerField(default=0)),
+                ('creados', models.PositiveBigIntegerField(default=0)),
+                ('actualizados', models.PositiveBigIntegerField(default=0)),
+                ('omitidos', models.PositiveBigIntegerField(default=0)),
+                ('errores', models.PositiveBigIntegerField(default=0)),
+                ('eliminados', models.PositiveBigIntegerField(default=0)),
+                ('completado', models.BooleanField(default=False)),
+                ('iniciado', models.DateTimeField(auto_now_add=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Checkpoint de importación',
+                'verbose_name_plural': 'Checkpoints de importación',
+            },
+        ),
+    ]
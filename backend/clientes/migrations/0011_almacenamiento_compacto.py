@@ -0,0 +1,64 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:40
+
+import clientes.campos
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0010_importacioncheckpoint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cliente',
+            name='edad',
+            field=models.PositiveSmallIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name='cliente',
+            name='nivel_de_satisfaccion',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Muy Insatisfecho'), (2, 'Insatisfecho'), (3, 'Neutral'), (4, 'Satisfecho'), (5, 'Muy Satisfecho')]),
+        ),
+        # saldo NUMERIC(100,2) -> BIGINT de centavos, copiando los datos en ambos sentidos
+        migrations.RemoveConstraint(
+            model_name='cliente',
+            name='cliente_saldo_no_negativo',
+        ),
+        migrations.AlterField(
+            model_name='cliente',
+            name='saldo',
+            field=models.DecimalField(decimal_places=2, max_digits=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='saldo_centavos',
+            field=clientes.campos.CentavosField(decimal_places=2, max_digits=18, null=True),
+        ),
+        # Un solo UPDATE en cada sentido. ROUND evita que un saldo guardado como
+        # REAL (SQLite) quede un centavo abajo; el literal 100.0 es NUMERIC en
+        # PostgreSQL (división exacta) y REAL en SQLite (el double más cercano)
+        migrations.RunSQL(
+            sql='UPDATE clientes_cliente SET saldo_centavos = ROUND(saldo * 100)',
+            reverse_sql='UPDATE clientes_cliente SET saldo = saldo_centavos / 100.0',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='saldo',
+        ),
+        migrations.RenameField(
+            model_name='cliente',
+            old_name='saldo_centavos',
+            new_name='saldo',
+        ),
+        migrations.AlterField(
+            model_name='cliente',
+            name='saldo',
+            field=clientes.campos.CentavosField(decimal_places=2, max_digits=18),
+        ),
+        migrations.AddConstraint(
+            model_name='cliente',
+            constraint=models.CheckConstraint(condition=models.Q(('saldo__gte', 0)), name='cliente_saldo_no_negativo', violation_error_message='El saldo no puede ser negativo'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0011_almacenamiento_compacto'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['saldo', 'cliente_id'], name='cliente_saldo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['edad', 'cliente_id'], name='cliente_edad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['saldo', 'cliente_id'], name='cliente_activos_saldo_idx'),
+        ),
+    ]
@@ -1,9 +1,211 @@
-from django.db import models
+from decimal import Decimal
+from django.db import connections, models, transaction
+from django.db.backends.utils import format_number
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.dispatch import Signal
+from django.utils import timezone
+
+from . import validaciones
+from .campos import CentavosField
 
 # Create your models here.
 
+# Escrituras masivas que no emiten post_save/post_delete por instancia.
+# Argumentos: ``operacion`` ('bulk_create', 'bulk_update', 'update' o 'delete'),
+# ``pares`` (lista de ``(anterior, actual)`` de valores estadísticos, o None si
+# no se conocen las filas afectadas), ``campos`` (campos escritos, o None si
+# son todos) y, en 'update' de campos estadísticos, ``resumenes``: el
+# ``estadisticas.resumir`` de las filas afectadas antes y después de escribir.
+cambios_masivos = Signal()
+
+# Filas por sentencia en las eliminaciones por lote
+TAMANO_LOTE_ELIMINACION = 1000
+# Más allá de esta cantidad de filas, una eliminación reconstruye el snapshot
+# en lugar de acumular deltas en memoria
+MAXIMO_PARES_ELIMINACION = 50000
+
+
+class ClienteQuerySet(models.QuerySet):
+    """
+    QuerySet que numera y notifica las escrituras masivas.
+
+    Cada operación reserva una secuencia de cambio (ver
+    ``versionado.reservar_secuencia``) dentro de su transacción, la asigna a
+    las filas escritas y emite ``cambios_masivos`` para mantener las
+    estructuras derivadas. Los valores se validan con las mismas reglas que
+    ``Cliente.clean()`` antes de escribir (ver ``clientes.validaciones``).
+    """
+
+    def update(self, **kwargs):
+        from .estadisticas import resumir
+        from .versionado import reservar_secuencia
+
+        errores = validaciones.errores(kwargs)
+        if errores:
+            raise ValidationError(errores)
+        estadisticos = set(kwargs) & set(self.model.CAMPOS_ESTADISTICOS)
+        with transaction.atomic(using=self.db):
+            secuencia = reservar_secuencia()
+            # El aporte de las filas antes y después da el delta sin recorrer la tabla
+            antes = resumir(self, estadisticos) if estadisticos else None
+            filas = super().update(secuencia_cambio=secuencia, **kwargs)
+            if filas:
+                resumenes = None
+                if estadisticos:
+                    # El filtro pudo dejar de cumplirse; la secuencia identifica las filas escritas
+                    escritas = models.QuerySet(model=self.model, using=self.db).filter(secuencia_cambio=secuencia)
+                    resumenes = (antes, resumir(escritas, estadisticos))
+                cambios_masivos.send(sender=self.model, operacion='update', pares=None, campos=set(kwargs),
+                                     resumenes=resumenes)
+        return filas
+
+    def bulk_create(self, objs, batch_size=None, ignore_conflicts=False, update_conflicts=False,
+                    update_fields=None, unique_fields=None):
+        from .versionado import reservar_secuencia
+
+        objs = list(objs)
+        validaciones.validar_objetos(objs)
+        if update_conflicts and update_fields:
+            update_fields = [*update_fields, 'secuencia_cambio']
+        with transaction.atomic(using=self.db):
+            secuencia = reservar_secuencia()
+            for objeto in objs:
+                objeto.secuencia_cambio = secuencia
+            objetos = super().bulk_create(
+                objs, batch_size=batch_size, ignore_conflicts=ignore_conflicts, update_conflicts=update_conflicts,
+                update_fields=update_fields, unique_fields=unique_fields,
+            )
+            if objetos:
+                pares = None
+                if not (ignore_conflicts or update_conflicts):
+                    # Sin conflictos posibles, todas las filas son nuevas
+                    pares = [(None, objeto.valores_estadisticos()) for objeto in objetos]
+                cambios_masivos.send(sender=self.model, operacion='bulk_create', pares=pares, campos=None)
+                self._fijar_valores_originales(objetos, pares is not None)
+        return objetos
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        from .versionado import reservar_secuencia
+
+        objs = list(objs)
+        validaciones.validar_objetos(objs)
+        # Los UPDATE por lote de Django no notifican: se emite una sola señal al final
+        base = models.QuerySet(model=self.model, query=self.query.chain(), using=self._db, hints=self._hints)
+        with transaction.atomic(using=self.db):
+            secuencia = reservar_secuencia()
+            for objeto in objs:
+                objeto.secuencia_cambio = secuencia
+            filas = base.bulk_update(objs, [*fields, 'secuencia_cambio'], batch_size=batch_size)
+            if filas:
+                pares = [(objeto.valores_originales(), objeto.valores_estadisticos()) for objeto in objs]
+                # Solo hay delta si se conocen los valores previos de cada fila, sin repetidas
+                if (filas != len(objs) or len({objeto.pk for objeto in objs}) != len(objs)
+                        or any(anterior is None for anterior, _ in pares)):
+                    pares = None
+                cambios_masivos.send(sender=self.model, operacion='bulk_update', pares=pares, campos=set(fields))
+                self._fijar_valores_originales(objs, True)
+        return filas
+
+    def delete(self):
+        """
+        Elimina por lotes de IDs sin instanciar cada cliente.
+
+        Registra las marcas de eliminación y notifica un único ``cambios_masivos``.
+        Si hay otros handlers de pre/post_delete o relaciones inversas, usa la
+        eliminación estándar de Django (una señal por instancia).
+        """
+        from .signals import eliminacion_por_lotes_segura
+        from .versionado import reservar_secuencia
+
+        if (self.query.is_sliced or self.query.distinct or self._fields is not None
+                or not eliminacion_por_lotes_segura()):
+            return super().delete()
+
+        campos = self.model.CAMPOS_ESTADISTICOS
+        pendientes = self.order_by('pk').values_list('pk', *campos)
+        base = models.QuerySet(model=self.model, using=self.db)
+        eliminados, pares, ultimo = 0, [], None
+        with transaction.atomic(using=self.db):
+            secuencia = reservar_secuencia()
+            while True:
+                lote = pendientes if ultimo is None else pendientes.filter(pk__gt=ultimo)
+                filas = list(lote[:TAMANO_LOTE_ELIMINACION])
+                if not filas:
+                    break
+                ids = [fila[0] for fila in filas]
+                ClienteEliminado.objects.using(self.db).bulk_create(
+                    [ClienteEliminado(cliente_id=pk, secuencia_cambio=secuencia) for pk in ids],
+                    update_conflicts=True, unique_fields=['cliente_id'],
+                    update_fields=['secuencia_cambio', 'eliminado'],
+                )
+                eliminados += base.filter(pk__in=ids)._raw_delete(self.db)
+                if pares is not None:
+                    pares += [(self.model.valores_desde_fila(fila[1:]), None) for fila in filas]
+                    if len(pares) > MAXIMO_PARES_ELIMINACION:
+                        pares = None
+                ultimo = ids[-1]
+            if eliminados:
+                cambios_masivos.send(sender=self.model, operacion='delete', pares=pares, campos=None)
+        if not eliminados:
+            return 0, {}
+        return eliminados, {self.model._meta.label: eliminados}
+
+    def truncar(self):
+        """
+        Vacía la tabla con las sentencias de ``flush`` del motor y reinicia los IDs.
+
+        En PostgreSQL es ``TRUNCATE ... RESTART IDENTITY``; en SQLite un DELETE
+        sin WHERE (que SQLite resuelve sin recorrer filas) y el reinicio de
+        ``sqlite_sequence``. Las marcas de eliminación se registran con un solo
+        ``INSERT ... SELECT`` y las estadísticas se reconstruyen con
+        ``cambios_masivos``. Devuelve la cantidad eliminada, o None si el
+        queryset está filtrado o ``eliminacion_por_lotes_segura()`` no lo permite.
+        """
+        from .signals import eliminacion_por_lotes_segura
+        from .versionado import reservar_secuencia
+
+        if self.query.where or self.query.is_sliced or not eliminacion_por_lotes_segura():
+            return None
+
+        conexion = connections[self.db]
+        tabla = conexion.ops.quote_name(self.model._meta.db_table)
+        marcas = ClienteEliminado._meta
+        columnas = [conexion.ops.quote_name(marcas.get_field(campo).column)
+                    for campo in ('cliente_id', 'secuencia_cambio', 'eliminado')]
+        with transaction.atomic(using=self.db):
+            secuencia = reservar_secuencia()
+            eliminados = self.count()
+            if not eliminados:
+                return 0
+            # Las marcas previas de IDs que vuelven a eliminarse se reemplazan
+            ClienteEliminado.objects.using(self.db).filter(
+                cliente_id__in=models.QuerySet(model=self.model, using=self.db).values('pk')
+            )._raw_delete(self.db)
+            with conexion.cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {conexion.ops.quote_name(marcas.db_table)} '
+                    f'({", ".join(columnas)}) '
+                    f'SELECT {conexion.ops.quote_name(self.model._meta.pk.column)}, %s, %s FROM {tabla}',
+                    [secuencia, conexion.ops.adapt_datetimefield_value(timezone.now())],
+                )
+                for sentencia in conexion.ops.sql_flush(no_style(), [self.model._meta.db_table],
+                                                         reset_sequences=True):
+                    cursor.execute(sentencia)
+            cambios_masivos.send(sender=self.model, operacion='delete', pares=None, campos=None)
+        return eliminados
+
+    @staticmethod
+    def _fijar_valores_originales(objetos, conocidos):
+        """Tras escribir, los valores actuales de cada instancia son los de la base de datos"""
+        for objeto in objetos:
+            if conocidos:
+                objeto._valores_originales = objeto.valores_estadisticos()
+            else:
+                # Con conflictos la fila pudo quedar distinta a la instancia
+                objeto.__dict__.pop('_valores_originales', None)
+
 
 class Cliente(models.Model):
     GENERO_CHOICES = [
@@ -20,43 +222,245 @@ class Cliente(models.Model):
 
     usuario = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     cliente_id = models.AutoField(primary_key=True)
-    edad = models.IntegerField()
+    edad = models.PositiveSmallIntegerField()
     genero = models.CharField(max_length=1, choices=GENERO_CHOICES)
-    saldo = models.DecimalField(max_digits=100, decimal_places=2)
+    # Entero de centavos en la base de datos, Decimal en Python (ver clientes.campos)
+    saldo = CentavosField(max_digits=18, decimal_places=2)
     activo = models.BooleanField(default=True)
-    nivel_de_satisfaccion = models.IntegerField(
+    nivel_de_satisfaccion = models.PositiveSmallIntegerField(
         choices=NIVEL_SATISFACCION_CHOICES)
+    # Secuencia de la última escritura sobre la fila (ver ClienteQuerySet)
+    secuencia_cambio = models.BigIntegerField(default=0, editable=False, db_index=True)
+
+    objects = ClienteQuerySet.as_manager()
+
+    # Campos que alimentan EstadisticasSnapshot
+    CAMPOS_ESTADISTICOS = ('edad', 'genero', 'saldo', 'activo', 'nivel_de_satisfaccion')
 
     def __str__(self):
         return f"Cliente {self.cliente_id}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Conserva los valores cargados para calcular deltas de estadísticas al guardar"""
+        instancia = super().from_db(db, field_names, values)
+        instancia._valores_cargados = (field_names, values)
+        return instancia
+
+    @classmethod
+    def normalizar_saldo(cls, valor):
+        """Saldo como Decimal con la misma precisión con la que se almacena"""
+        campo = cls._meta.get_field('saldo')
+        return Decimal(format_number(campo.to_python(valor), campo.max_digits, campo.decimal_places))
+
+    @classmethod
+    def valores_desde_fila(cls, fila):
+        """Valores estadísticos de una tupla de ``values_list(*CAMPOS_ESTADISTICOS)``"""
+        valores = dict(zip(cls.CAMPOS_ESTADISTICOS, fila))
+        valores['saldo'] = cls.normalizar_saldo(valores['saldo'])
+        return valores
+
+    def valores_estadisticos(self):
+        """Valores actuales de los campos estadísticos"""
+        return {
+            'edad': self.edad,
+            'genero': self.genero,
+            'saldo': self.normalizar_saldo(self.saldo),
+            'activo': self.activo,
+            'nivel_de_satisfaccion': self.nivel_de_satisfaccion,
+        }
+
+    def valores_originales(self):
+        """Valores estadísticos tal como están en la base de datos, o None si no se conocen"""
+        if hasattr(self, '_valores_originales'):
+            return self._valores_originales
+        cargados = getattr(self, '_valores_cargados', None)
+        if cargados is None:
+            return None
+        valores = dict(zip(*cargados))
+        if not all(campo in valores for campo in self.CAMPOS_ESTADISTICOS):
+            return None
+        return {campo: valores[campo] for campo in self.CAMPOS_ESTADISTICOS}
     
     def clean(self):
-        """Validaciones personalizadas del modelo"""
-        errors = {}
-        
-        # Validar edad
-        if self.edad < 18:
-            errors['edad'] = 'El cliente debe ser mayor de 18 años'
-        elif self.edad > 120:
-            errors['edad'] = 'La edad no puede ser mayor a 120 años'
-        
-        # Validar saldo
-        if self.saldo < 0:
-            errors['saldo'] = 'El saldo no puede ser negativo'
-        
-        # Validar nivel de satisfacción
-        if self.nivel_de_satisfaccion < 1 or self.nivel_de_satisfaccion > 5:
-            errors['nivel_de_satisfaccion'] = 'El nivel de satisfacción debe estar entre 1 y 5'
-        
+        """Validaciones personalizadas del modelo (ver clientes.validaciones)"""
+        errors = validaciones.errores(self)
         if errors:
             raise ValidationError(errors)
     
     def save(self, *args, **kwargs):
         """Override save para ejecutar validaciones"""
-        self.full_clean()
-        super().save(*args, **kwargs)
+        # Unicidad (solo la PK) y restricciones CHECK las garantiza la base de
+        # datos; validarlas aquí costaría consultas en cada escritura
+        self.full_clean(validate_unique=False, validate_constraints=False)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = [*update_fields, 'secuencia_cambio']
+        # La secuencia reservada en pre_save bloquea hasta el commit
+        with transaction.atomic():
+            super().save(*args, **kwargs)
     
     class Meta:
         ordering = ['-cliente_id']
         verbose_name = 'Cliente'
         verbose_name_plural = 'Clientes'
+        constraints = validaciones.restricciones()
+        # Cada índice cubre una ruta de la API (ver tests/test_indices.py);
+        # cliente_id al final da el desempate de la paginación por cursor
+        indexes = [
+            # Top 5, umbral del 10% y conteo saldo >= umbral; ordering=±saldo
+            models.Index(fields=['saldo', 'cliente_id'], name='cliente_saldo_idx'),
+            # ordering=±edad y conteos por rango de edad
+            models.Index(fields=['edad', 'cliente_id'], name='cliente_edad_idx'),
+            # Sin índices para genero, activo ni nivel_de_satisfaccion: con 2 a 5
+            # valores cada filtro devuelve una fracción grande de la tabla y el
+            # recorrido completo es más barato que ir y volver desde el índice
+            # Ranking por saldo de los activos (?activo=true&ordering=-saldo)
+            # sin recorrer los inactivos; parcial, solo filas con activo
+            models.Index(fields=['saldo', 'cliente_id'], condition=models.Q(activo=True),
+                         name='cliente_activos_saldo_idx'),
+        ]
+
+
+class ClienteEliminado(models.Model):
+    """Marca de eliminación de un cliente, para la sincronización incremental"""
+    cliente_id = models.IntegerField(primary_key=True)
+    secuencia_cambio = models.BigIntegerField(db_index=True)
+    eliminado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Cliente {self.cliente_id} eliminado (secuencia {self.secuencia_cambio})"
+
+    class Meta:
+        verbose_name = 'Cliente eliminado'
+        verbose_name_plural = 'Clientes eliminados'
+
+
+class ClienteCuarentena(models.Model):
+    """
+    Cliente apartado al crear las restricciones CHECK (migración 0009).
+
+    Guarda los valores de la fila tal como estaban y las reglas que violaba,
+    para revisarlo y, si corresponde, volver a crearlo corregido.
+    """
+    cliente_id = models.IntegerField(primary_key=True)
+    datos = models.JSONField()
+    motivos = models.JSONField()
+    apartado = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Cliente {self.cliente_id} en cuarentena: {'; '.join(self.motivos)}"
+
+    class Meta:
+        verbose_name = 'Cliente en cuarentena'
+        verbose_name_plural = 'Clientes en cuarentena'
+
+
+class EstadisticasSnapshot(models.Model):
+    """
+    Agregados materializados de la tabla Cliente (fila única).
+
+    Los handlers de post_save/post_delete de Cliente lo mantienen con aritmética
+    de deltas; ``recompute_estadisticas`` lo reconstruye desde cero. Los extremos
+    (min/max) no admiten deltas al eliminar, por eso se marcan como inválidos y
+    se recalculan al leer.
+    """
+    total = models.PositiveBigIntegerField(default=0)
+    activos = models.PositiveBigIntegerField(default=0)
+    masculino = models.PositiveBigIntegerField(default=0)
+    femenino = models.PositiveBigIntegerField(default=0)
+
+    # Conteo por nivel de satisfacción
+    satisfaccion_1 = models.PositiveBigIntegerField(default=0)
+    satisfaccion_2 = models.PositiveBigIntegerField(default=0)
+    satisfaccion_3 = models.PositiveBigIntegerField(default=0)
+    satisfaccion_4 = models.PositiveBigIntegerField(default=0)
+    satisfaccion_5 = models.PositiveBigIntegerField(default=0)
+
+    # Conteo y suma de edades por rango de edad
+    edad_18_30 = models.PositiveBigIntegerField(default=0)
+    edad_31_45 = models.PositiveBigIntegerField(default=0)
+    edad_46_60 = models.PositiveBigIntegerField(default=0)
+    edad_61_80 = models.PositiveBigIntegerField(default=0)
+    edad_81_mas = models.PositiveBigIntegerField(default=0)
+    suma_edad_18_30 = models.PositiveBigIntegerField(default=0)
+    suma_edad_31_45 = models.PositiveBigIntegerField(default=0)
+    suma_edad_46_60 = models.PositiveBigIntegerField(default=0)
+    suma_edad_61_80 = models.PositiveBigIntegerField(default=0)
+    suma_edad_81_mas = models.PositiveBigIntegerField(default=0)
+
+    # Sumas para promedios
+    suma_edad = models.BigIntegerField(default=0)
+    suma_saldo = models.DecimalField(max_digits=100, decimal_places=2, default=0)
+    suma_satisfaccion_masculino = models.BigIntegerField(default=0)
+    suma_satisfaccion_femenino = models.BigIntegerField(default=0)
+
+    # Extremos
+    saldo_maximo = models.DecimalField(max_digits=100, decimal_places=2, null=True, blank=True)
+    saldo_minimo = models.DecimalField(max_digits=100, decimal_places=2, null=True, blank=True)
+    edad_maxima = models.IntegerField(null=True, blank=True)
+    edad_minima = models.IntegerField(null=True, blank=True)
+    extremos_validos = models.BooleanField(default=True)
+
+    version = models.PositiveBigIntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Snapshot v{self.version} ({self.total} clientes)"
+
+    class Meta:
+        verbose_name = 'Snapshot de estadísticas'
+        verbose_name_plural = 'Snapshots de estadísticas'
+
+
+class CuboSaldo(models.Model):
+    """
+    Conteo de un cubo del sketch de cuantiles de saldo (ver ``clientes.sketch``).
+
+    Se mantiene junto con EstadisticasSnapshot para que todos los workers
+    carguen el mismo sketch.
+    """
+    indice = models.IntegerField(primary_key=True)
+    conteo = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Cubo {self.indice}: {self.conteo}"
+
+    class Meta:
+        verbose_name = 'Cubo de saldo'
+        verbose_name_plural = 'Cubos de saldo'
+
+
+class ImportacionCheckpoint(models.Model):
+    """
+    Avance de una importación de CSV (``importar_clientes``).
+
+    Se actualiza en la misma transacción que cada bloque importado, de modo
+    que una ejecución interrumpida se reanuda justo después del último bloque
+    confirmado. El archivo se identifica por el hash de su contenido.
+    """
+    MODO_CHOICES = [
+        ('insertar', 'Insertar nuevos'),
+        ('merge', 'Merge (insertar, actualizar y eliminar ausentes)'),
+    ]
+
+    archivo = models.CharField(max_length=500)
+    huella_archivo = models.CharField(max_length=64, db_index=True)
+    modo = models.CharField(max_length=10, choices=MODO_CHOICES)
+    filas_confirmadas = models.PositiveBigIntegerField(default=0)
+    creados = models.PositiveBigIntegerField(default=0)
+    actualizados = models.PositiveBigIntegerField(default=0)
+    omitidos = models.PositiveBigIntegerField(default=0)
+    errores = models.PositiveBigIntegerField(default=0)
+    eliminados = models.PositiveBigIntegerField(default=0)
+    completado = models.BooleanField(default=False)
+    iniciado = models.DateTimeField(auto_now_add=True)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        estado = 'completada' if self.completado else f'{self.filas_confirmadas} filas confirmadas'
+        return f"Importación {self.modo} de {self.archivo} ({estado})"
+
+    class Meta:
+        verbose_name = 'Checkpoint de importación'
+        verbose_name_plural = 'Checkpoints de importación'
@@ -1,4 +1,13 @@
-from rest_framework.pagination import PageNumberPagination
+import binascii
+import json
+from base64 import b64decode, b64encode
+from decimal import Decimal
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class ClientePagination(PageNumberPagination):
@@ -11,3 +20,142 @@ class ClientePagination(PageNumberPagination):
     page_size = 20  # Tamaño por defecto
     page_size_query_param = 'page_size'  # Permite al cliente especificar page_size
     max_page_size = 10000  # Máximo permitido
+
+
+class ClienteCursorPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) para clientes.
+
+    Cada página se obtiene con ``WHERE (campo, cliente_id) < (valor, id)`` y
+    ``LIMIT``, sin OFFSET ni COUNT(*): el costo es el mismo en la página 1 y en
+    la página 10.000. Se activa con ``?paginacion=cursor`` (o al enviar un
+    ``cursor``); sin ello se mantiene ``ClientePagination``.
+
+    Ordenamientos: ``-cliente_id`` (por defecto), ``cliente_id``, ``saldo``,
+    ``-saldo``, ``edad``, ``-edad``; ``cliente_id`` desempata. Los cursores son
+    opacos y llevan su ordenamiento, por lo que siguen siendo estables aunque
+    se inserten o eliminen clientes entre peticiones.
+    """
+    cursor_query_param = 'cursor'
+    modo_query_param = 'paginacion'
+    ordering_query_param = 'ordering'
+    page_size = ClientePagination.page_size
+    page_size_query_param = ClientePagination.page_size_query_param
+    max_page_size = ClientePagination.max_page_size
+    ordenamientos = ('-cliente_id', 'cliente_id', 'saldo', '-saldo', 'edad', '-edad')
+    invalid_cursor_message = 'Cursor inválido'
+
+    @classmethod
+    def solicitada(cls, request):
+        """Indica si la petición pide paginación por cursor"""
+        return (request.query_params.get(cls.modo_query_param) == 'cursor'
+                or cls.cursor_query_param in request.query_params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        posicion = self.decode_cursor(request)
+
+        if posicion is None:
+            self.ordenamiento = self.get_ordering(request)
+            hacia_atras = False
+        else:
+            self.ordenamiento = posicion['o']
+            hacia_atras = posicion['d'] == 'prev'
+
+        campo = self.ordenamiento.lstrip('-')
+        descendente = self.ordenamiento.startswith('-')
+        # Al retroceder se recorre en sentido inverso y luego se invierte la página
+        if hacia_atras:
+            descendente = not descendente
+
+        if posicion is not None:
+            queryset = queryset.filter(self._despues_de(campo, descendente, posicion['v'], posicion['id']))
+        orden = [f'-{campo}' if descendente else campo]
+        if campo != 'cliente_id':
+            orden.append('-cliente_id' if descendente else 'cliente_id')
+        resultados = list(queryset.order_by(*orden)[:self.page_size + 1])
+
+        hay_mas = len(resultados) > self.page_size
+        self.page = resultados[:self.page_size]
+        if hacia_atras:
+            self.page.reverse()
+            self.hay_siguiente, self.hay_anterior = True, hay_mas
+        else:
+            self.hay_siguiente, self.hay_anterior = hay_mas, posicion is not None
+        return self.page
+
+    def _despues_de(self, campo, descendente, valor, cliente_id):
+        comparacion = 'lt' if descendente else 'gt'
+        if campo == 'cliente_id':
+            return Q(**{f'cliente_id__{comparacion}': cliente_id})
+        return (Q(**{f'{campo}__{comparacion}': valor})
+                | Q(**{campo: valor, f'cliente_id__{comparacion}': cliente_id}))
+
+    def get_page_size(self, request):
+        try:
+            tamano = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(tamano, self.max_page_size) if tamano > 0 else self.page_size
+
+    def get_ordering(self, request):
+        ordenamiento = request.query_params.get(self.ordering_query_param, self.ordenamientos[0])
+        return ordenamiento if ordenamiento in self.ordenamientos else self.ordenamientos[0]
+
+    def decode_cursor(self, request):
+        codificado = request.query_params.get(self.cursor_query_param)
+        if not codificado:
+            return None
+        try:
+            posicion = json.loads(b64decode(codificado.encode('ascii'), altchars=b'-_'))
+            if posicion['o'] not in self.ordenamientos or posicion['d'] not in ('next', 'prev'):
+                raise ValueError
+            posicion['id'] = int(posicion['id'])
+            if posicion['o'].lstrip('-') == 'saldo':
+                posicion['v'] = Decimal(posicion['v'])
+        except (TypeError, ValueError, KeyError, ArithmeticError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        return posicion
+
+    def encode_cursor(self, cliente, direccion):
+        campo = self.ordenamiento.lstrip('-')
+        valor = getattr(cliente, campo)
+        posicion = {
+            'o': self.ordenamiento,
+            'v': str(valor) if isinstance(valor, Decimal) else valor,
+            'id': cliente.cliente_id,
+            'd': direccion,
+        }
+        codificado = b64encode(json.dumps(posicion, separators=(',', ':')).encode(), altchars=b'-_')
+        url = remove_query_param(self.base_url, self.ordering_query_param)
+        return replace_query_param(url, self.cursor_query_param, codificado.decode('ascii'))
+
+    def get_next_link(self):
+        if not self.hay_siguiente or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], 'next')
+
+    def get_previous_link(self):
+        if not self.hay_anterior or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], 'prev')
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,132 @@
+"""
+Índice de ranking de saldos en memoria (uno por proceso).
+
+Mantiene un arreglo ordenado de saldos para responder rankings y percentiles
+con ``bisect`` en O(log n), y los promedios del sistema sin consultar la tabla.
+Se carga completo una vez; después, cuando cambia la versión de
+``EstadisticasSnapshot`` (que se incrementa con cada escritura sobre Cliente),
+aplica solo los cambios de esa ventana de secuencias, leídos de
+``Cliente.secuencia_cambio`` y ``ClienteEliminado`` como en la sincronización
+incremental (ver ``clientes.cambios``). Para eso guarda además el saldo y la
+edad de cada cliente por ID.
+"""
+import threading
+from array import array
+from bisect import bisect_left, bisect_right, insort
+
+from .estadisticas import obtener_snapshot
+from .models import Cliente, ClienteEliminado
+
+# Con más cambios que estos se reordena el arreglo una vez en lugar de moverlo por cada uno
+MAXIMO_CAMBIOS_UNITARIOS = 64
+
+
+def _centavos(saldo):
+    return int(saldo.scaleb(2))
+
+
+class IndiceSaldos:
+    """Saldos ordenados y sumas de la tabla Cliente para una versión de datos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Descarta el contenido; la siguiente sincronización recarga desde la tabla"""
+        self.version = None
+        self.saldos = array('d')
+        # cliente_id -> (saldo en centavos, edad)
+        self.clientes = {}
+        self.suma_centavos = 0
+        self.suma_edad = 0
+
+    def __len__(self):
+        return len(self.saldos)
+
+    def sincronizar(self, version):
+        """Lleva el índice a ``version``: carga completa la primera vez, después solo los cambios"""
+        if version is None:
+            # Sin snapshot todavía: se construye para fijar una versión
+            version = obtener_snapshot().version
+        if self.version is not None and version <= self.version:
+            return
+        with self._lock:
+            if self.version is None:
+                self._recargar(version)
+            elif version > self.version:
+                self._aplicar_cambios(version)
+
+    def _recargar(self, version):
+        self.clientes = {
+            cliente_id: (_centavos(saldo), edad)
+            for cliente_id, saldo, edad in Cliente.objects.order_by('saldo').values_list(
+                'cliente_id', 'saldo', 'edad'
+            ).iterator(chunk_size=10000)
+        }
+        self._reordenar()
+        self.version = version
+
+    def _reordenar(self):
+        # Con la carga ordenada por saldo, sorted() recorre la lista una sola vez
+        self.saldos = array('d', sorted(centavos / 100 for centavos, _ in self.clientes.values()))
+        self.suma_centavos = sum(centavos for centavos, _ in self.clientes.values())
+        self.suma_edad = sum(edad for _, edad in self.clientes.values())
+
+    def _aplicar_cambios(self, version):
+        """
+        Aplica las escrituras con secuencia en ``(self.version, version]``.
+
+        Las secuencias se confirman en orden, así que todas ya son visibles.
+        Aplicar un cambio dos veces no altera el resultado: la carga completa
+        pudo incluir filas posteriores a su versión.
+        """
+        ventana = {'secuencia_cambio__gt': self.version, 'secuencia_cambio__lte': version}
+        cambios = sorted(
+            [(secuencia, cliente_id, (_centavos(saldo), edad)) for secuencia, cliente_id, saldo, edad in
+             Cliente.objects.filter(**ventana).values_list('secuencia_cambio', 'cliente_id', 'saldo', 'edad')]
+            + [(secuencia, cliente_id, None) for secuencia, cliente_id in
+               ClienteEliminado.objects.filter(**ventana).values_list('secuencia_cambio', 'cliente_id')],
+            key=lambda cambio: cambio[:2],
+        )
+        unitarios = len(cambios) <= MAXIMO_CAMBIOS_UNITARIOS
+        for _, cliente_id, actual in cambios:
+            anterior = self.clientes.pop(cliente_id, None)
+            if anterior is not None:
+                self.suma_centavos -= anterior[0]
+                self.suma_edad -= anterior[1]
+                if unitarios:
+                    del self.saldos[bisect_left(self.saldos, anterior[0] / 100)]
+            if actual is not None:
+                self.clientes[cliente_id] = actual
+                self.suma_centavos += actual[0]
+                self.suma_edad += actual[1]
+                if unitarios:
+                    insort(self.saldos, actual[0] / 100)
+        if not unitarios:
+            self._reordenar()
+        self.version = version
+
+    def mayores_que(self, saldo):
+        """Cantidad de clientes con saldo estrictamente mayor"""
+        return len(self.saldos) - bisect_right(self.saldos, float(saldo))
+
+    def percentil(self, saldo):
+        """Porcentaje de clientes con saldo menor o igual, redondeado a un decimal"""
+        total = len(self.saldos)
+        if total == 0:
+            return 0
+        return round((1 - (self.mayores_que(saldo) / total)) * 100, 1)
+
+    def promedios(self):
+        """Promedio de edad y saldo del sistema (``None`` si no hay clientes)"""
+        total = len(self.saldos)
+        if total == 0:
+            return {'promedio_edad': None, 'promedio_saldo': None}
+        return {
+            'promedio_edad': self.suma_edad / total,
+            'promedio_saldo': self.suma_centavos / 100 / total,
+        }
+
+
+indice_saldos = IndiceSaldos()
@@ -0,0 +1,86 @@
+"""
+Renderers de alto rendimiento, elegidos con ``Accept`` o ``?format=``.
+
+- ``ORJSONRenderer`` (``json``): reemplaza a JSONRenderer con orjson y la misma
+  salida; lo que orjson codificaría distinto (fechas, Decimal, textos
+  diferidos) se delega al encoder de DRF. Solo los floats en notación
+  exponencial pueden diferir en forma (``1e-5`` en vez de ``1e-05``).
+- ``ColumnarJSONRenderer`` (``columnas``): cada lista de objetos se envía como
+  un arreglo por campo en lugar de repetir las claves en cada fila.
+- ``MessagePackRenderer`` (``msgpack``): binario; requiere el paquete
+  ``msgpack`` y se omite si no está instalado.
+"""
+import orjson
+from rest_framework.utils import encoders
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dependencia opcional
+    msgpack = None
+
+_OPCIONES_ORJSON = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def a_columnas(data):
+    """Cada lista de objetos (la respuesta o un valor de primer nivel) como un arreglo por campo"""
+    if isinstance(data, list):
+        return _columnas(data)
+    if isinstance(data, dict):
+        return {clave: _columnas(valor) if isinstance(valor, list) else valor for clave, valor in data.items()}
+    return data
+
+
+def _columnas(filas):
+    if not filas:
+        return {}
+    if not isinstance(filas[0], dict):
+        return filas
+    claves = filas[0].keys()
+    if any(not isinstance(fila, dict) or fila.keys() != claves for fila in filas):
+        return filas
+    return {clave: [fila[clave] for fila in filas] for clave in claves}
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer con orjson; recurre al de DRF para indentación o ensure_ascii"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=_OPCIONES_ORJSON)
+        except orjson.JSONEncodeError:
+            # Enteros de más de 64 bits u otros tipos: misma salida (o error) que DRF
+            return super().render(data, accepted_media_type, renderer_context)
+        # Igual que JSONRenderer: JSON que también es JavaScript válido
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class ColumnarJSONRenderer(ORJSONRenderer):
+    """JSON por columnas: ``{"results": {"cliente_id": [...], "edad": [...], ...}}``"""
+    media_type = 'application/vnd.clientes.columnas+json'
+    format = 'columnas'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(a_columnas(data), accepted_media_type, renderer_context)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """MessagePack con las mismas conversiones de tipos que el JSON de DRF"""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encoders.JSONEncoder().default, use_bin_type=True)
+
+
+# Formatos adicionales para ClienteViewSet (ORJSONRenderer es el JSON por defecto)
+RENDERERS_ADICIONALES = [ColumnarJSONRenderer] + ([MessagePackRenderer] if msgpack is not None else [])
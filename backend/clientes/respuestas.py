@@ -0,0 +1,98 @@
+"""
+Caché de respuestas de la API por versión de datos.
+
+La clave combina la versión de ``EstadisticasSnapshot`` (que cambia con cada
+escritura sobre Cliente) con la URL normalizada: host, ruta y parámetros
+ordenados. Una escritura invalida todas las respuestas sin recorrer ni
+borrar claves: las peticiones siguientes usan claves nuevas y las viejas
+salen por LRU (ver ``clientes.cache``).
+
+Se guarda ``response.data`` antes de renderizar, así una entrada sirve para
+cualquier ``Accept``, y junto a ella los bytes renderizados y comprimidos de
+cada tipo de medio pedido (ver ``clientes.compresion``). El almacén es el
+alias ``respuestas`` de ``CACHES``: memoria del proceso por defecto o un
+directorio compartido por los workers.
+"""
+import hashlib
+import os
+from functools import wraps
+
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from .compresion import guardar_al_renderizar, respuesta_guardada
+from .metricas import metricas
+from .versionado import obtener_version
+
+CACHE_RESPUESTAS = 'respuestas'
+
+
+def huella_url(request):
+    """Hash de la URL normalizada de ``request``: host, ruta y parámetros ordenados"""
+    parametros = sorted((clave, sorted(valores)) for clave, valores in request.GET.lists())
+    url = request.build_absolute_uri(request.path)
+    return hashlib.sha1(f'{url}|{parametros!r}'.encode()).hexdigest()
+
+
+def clave_respuesta(request, version):
+    """Clave de la respuesta a ``request`` para la versión de datos ``version``"""
+    return f'respuesta:{version}:{huella_url(request)}'
+
+
+def respuesta_cacheada(metodo):
+    """
+    Decora una acción GET del ViewSet para servir ``response.data`` desde la caché.
+
+    Va debajo de ``respuesta_condicional``: en un acierto informa la versión
+    leída en ``self.version_datos``; en un fallo guarda la respuesta bajo la
+    versión que la acción leyó junto con los datos (o la leída antes, si no
+    la informó). Un acierto con los bytes ya renderizados no serializa. La
+    cabecera ``X-Cache`` indica ``HIT`` o ``MISS``.
+    """
+    @wraps(metodo)
+    def envoltura(self, request, *args, **kwargs):
+        almacen = caches[CACHE_RESPUESTAS]
+        previa = obtener_version()
+        clave = clave_respuesta(request, previa[0])
+        response = respuesta_guardada(almacen, request, clave)
+        if response is None:
+            data = almacen.get(clave)
+            response = None if data is None else guardar_al_renderizar(Response(data), almacen, request, clave)
+        if response is not None:
+            metricas.registrar('respuestas.aciertos')
+            self.version_datos = previa
+            response['X-Cache'] = 'HIT'
+            return response
+
+        metricas.registrar('respuestas.fallos')
+        response = metodo(self, request, *args, **kwargs)
+        if response.status_code == 200:
+            version = (self.version_datos or previa)[0]
+            clave = None
+            if version is not None:
+                clave = clave_respuesta(request, version)
+                almacen.set(clave, response.data)
+                metricas.registrar('respuestas.almacenadas')
+            guardar_al_renderizar(response, almacen, request, clave)
+            response['X-Cache'] = 'MISS'
+        return response
+
+    return envoltura
+
+
+def resumen_metricas(almacenes):
+    """Contadores del proceso y ocupación de cada caché de ``{nombre: alias}`` (alias None: sin ocupación)"""
+    resumen = {'proceso': os.getpid()}
+    for nombre, alias in almacenes.items():
+        contadores = {'aciertos': 0, 'fallos': 0, **metricas.resumen(nombre)}
+        consultas = contadores['aciertos'] + contadores['fallos']
+        contadores['tasa_aciertos'] = round(contadores['aciertos'] / consultas * 100, 2) if consultas else 0
+        resumen[nombre] = contadores
+        if alias is None:
+            # Comparte el almacén de otra entrada: solo contadores
+            continue
+        almacen = caches[alias]
+        contadores['backend'] = type(almacen).__name__
+        if hasattr(almacen, 'bytes_usados'):
+            contadores.update(entradas=len(almacen), bytes=almacen.bytes_usados, max_bytes=almacen.max_bytes)
+    return resumen
@@ -0,0 +1,193 @@
+"""
+Estadísticas con stale-while-revalidate.
+
+Las acciones de estadísticas guardan su ``response.data`` en la caché
+``respuestas`` por URL normalizada (sin la versión), junto con la versión de
+los datos que describe y el momento del cálculo. Si la versión no cambió la
+entrada está fresca. Si cambió, se sirve la entrada obsoleta sin esperar y un
+hilo del worker la recalcula (uno por URL y proceso).
+
+La obsolescencia se cuenta desde que una petición vio la entrada desactualizada
+por primera vez, con una marca aparte por cálculo (``marcar_obsoleto``) para
+que solo ``guardar`` escriba los cálculos; pasados ``ESTADISTICAS_MAX_OBSOLETA`` segundos (por ejemplo,
+si el recálculo falla) la petición vuelve a calcular en línea, y con 0 nunca se
+sirven datos obsoletos. ``Age`` informa los segundos desde el cálculo y
+``X-Cache`` indica ``HIT``, ``STALE`` o ``MISS``. Cada cálculo guarda además
+sus bytes comprimidos (ver ``clientes.compresion``).
+
+Los cálculos concurrentes de una misma URL se coalescen (ver
+``clientes.coalescencia``): uno calcula y los demás esperan su resultado hasta
+``ESTADISTICAS_ESPERA_MAXIMA`` segundos.
+"""
+import copy
+import logging
+import threading
+import time
+from collections import namedtuple
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from rest_framework.response import Response
+
+from .coalescencia import Coalescedor
+from .compresion import guardar_al_renderizar, respuesta_guardada
+from .respuestas import CACHE_RESPUESTAS, huella_url, metricas
+from .versionado import obtener_version
+
+logger = logging.getLogger(__name__)
+
+Calculo = namedtuple('Calculo', ['data', 'version', 'actualizado', 'calculado'])
+
+# Claves con un recálculo en curso en este proceso
+_en_curso = set()
+_lock = threading.Lock()
+# Un solo cálculo por URL a la vez, en el worker y entre workers
+coalescedor = Coalescedor('estadisticas')
+
+
+def clave_estadisticas(request):
+    return f'estadisticas:{huella_url(request)}'
+
+
+def guardar(clave, data, version_datos):
+    """Guarda el cálculo salvo que ya haya uno de una versión más nueva"""
+    if version_datos is None or version_datos[0] is None:
+        return
+    version, actualizado = version_datos
+    almacen = caches[CACHE_RESPUESTAS]
+    actual = almacen.get(clave)
+    if actual is not None and actual.version > version:
+        return
+    almacen.set(clave, Calculo(data, version, actualizado, time.time()))
+
+
+def marcar_obsoleto(clave, calculo, ahora):
+    """
+    Momento en que se vio obsoleto por primera vez el cálculo de ``clave`` en su versión.
+
+    La marca va en su propia clave y se crea con ``add``: la primera petición
+    fija el inicio y las siguientes lo leen. Escribir el cálculo con la marca
+    podría pisar uno más nuevo que un recálculo acaba de guardar.
+    """
+    almacen = caches[CACHE_RESPUESTAS]
+    marca = f'{clave}:obsoleto:{calculo.version}'
+    almacen.add(marca, ahora)
+    return almacen.get(marca, ahora)
+
+
+def base_bytes(clave, version):
+    """Base de los bytes comprimidos del cálculo de ``clave`` en ``version``"""
+    return f'{clave}:{version}'
+
+
+def servir(vista, clave, calculo, estado, ahora):
+    """Respuesta desde un cálculo guardado; informa su versión a ``respuesta_condicional``"""
+    vista.version_datos = (calculo.version, calculo.actualizado)
+    almacen = caches[CACHE_RESPUESTAS]
+    base = base_bytes(clave, calculo.version)
+    response = respuesta_guardada(almacen, vista.request, base)
+    if response is None:
+        response = guardar_al_renderizar(Response(calculo.data), almacen, vista.request, base)
+    response['Age'] = str(max(0, int(ahora - calculo.calculado)))
+    response['X-Cache'] = estado
+    return response
+
+
+def leer_nuevo(vista, clave, anterior):
+    """Respuesta desde el cálculo que guardó otro hilo o worker, si es posterior a ``anterior``"""
+    calculo = caches[CACHE_RESPUESTAS].get(clave)
+    if calculo is None or (anterior is not None and calculo.version <= anterior.version):
+        return None
+    return servir(vista, clave, calculo, 'HIT', time.time())
+
+
+def calcular(vista, clave, request, metodo, args, kwargs, anterior):
+    """Ejecuta la acción y guarda el resultado; si otro hilo o worker ya lo calcula, lo espera"""
+    def ejecutar():
+        vista.version_datos = None
+        response = metodo(vista, request, *args, **kwargs)
+        if response.status_code == 200:
+            guardar(clave, response.data, vista.version_datos)
+            version = (vista.version_datos or (None,))[0]
+            base = None if version is None else base_bytes(clave, version)
+            guardar_al_renderizar(response, caches[CACHE_RESPUESTAS], request, base)
+            response['X-Cache'] = 'MISS'
+        return response
+
+    return coalescedor.ejecutar(
+        clave, ejecutar, lambda: leer_nuevo(vista, clave, anterior), settings.ESTADISTICAS_ESPERA_MAXIMA,
+    )
+
+
+def en_segundo_plano(funcion, *args):
+    """Ejecuta ``funcion`` en un hilo del worker con sus propias conexiones"""
+    def ejecutar():
+        try:
+            funcion(*args)
+        finally:
+            connections.close_all()
+
+    threading.Thread(target=ejecutar, name='revalidar-estadisticas', daemon=True).start()
+
+
+def recalcular(clave, vista, request, metodo, args, kwargs, anterior):
+    try:
+        response = calcular(vista, clave, request, metodo, args, kwargs, anterior)
+        if response.get('X-Cache') == 'MISS':
+            metricas.registrar('estadisticas.revalidadas')
+    except Exception:
+        metricas.registrar('estadisticas.revalidaciones_fallidas')
+        logger.exception('No se pudo recalcular %s', request.path)
+    finally:
+        with _lock:
+            _en_curso.discard(clave)
+
+
+def revalidar(clave, vista, request, metodo, args, kwargs, anterior):
+    """Lanza el recálculo de ``clave`` salvo que ya haya uno en curso en este proceso"""
+    with _lock:
+        if clave in _en_curso:
+            return
+        _en_curso.add(clave)
+    # Copia de la vista: la petición actual sigue usando ``version_datos``
+    en_segundo_plano(recalcular, clave, copy.copy(vista), request, metodo, args, kwargs, anterior)
+
+
+def respuesta_revalidada(metodo):
+    """
+    Decora una acción GET de estadísticas con stale-while-revalidate.
+
+    Va debajo de ``respuesta_condicional``, que arma los validadores con la
+    versión del cálculo servido. La acción informa en ``self.version_datos``
+    la versión que leyó junto con los datos; el resultado se guarda bajo ella
+    (sin versión no se guarda). Las métricas ``estadisticas.*`` cuentan como
+    aciertos las respuestas frescas y las obsoletas, y estas además como
+    ``obsoletas``; ``vencidas`` son las que superaron la obsolescencia máxima
+    y ``coalescidas`` las que esperaron el cálculo de otra petición.
+    """
+    @wraps(metodo)
+    def envoltura(self, request, *args, **kwargs):
+        almacen = caches[CACHE_RESPUESTAS]
+        clave = clave_estadisticas(request)
+        calculo = almacen.get(clave)
+        ahora = time.time()
+        # Sin cálculo guardado no hace falta consultar la versión antes de calcular
+        if calculo is not None and calculo.version == obtener_version()[0]:
+            metricas.registrar('estadisticas.aciertos')
+            return servir(self, clave, calculo, 'HIT', ahora)
+
+        maximo = settings.ESTADISTICAS_MAX_OBSOLETA
+        if calculo is not None and maximo > 0:
+            if ahora - marcar_obsoleto(clave, calculo, ahora) <= maximo:
+                metricas.registrar('estadisticas.aciertos')
+                metricas.registrar('estadisticas.obsoletas')
+                revalidar(clave, self, request, metodo, args, kwargs, calculo)
+                return servir(self, clave, calculo, 'STALE', ahora)
+            metricas.registrar('estadisticas.vencidas')
+
+        metricas.registrar('estadisticas.fallos')
+        return calcular(self, clave, request, metodo, args, kwargs, calculo)
+
+    return envoltura
@@ -1,7 +1,16 @@
 from rest_framework import serializers
+from . import validaciones
 from .models import Cliente
 
 
+def _validar(regla, value):
+    """Aplica una regla de clientes.validaciones con el mensaje como error del campo"""
+    mensaje = regla(value)
+    if mensaje is not None:
+        raise serializers.ValidationError(mensaje)
+    return value
+
+
 class ClienteSerializer(serializers.ModelSerializer):
     """
     Serializer para el modelo Cliente con validaciones adicionales
@@ -14,25 +23,21 @@ class ClienteSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Cliente
-        fields = '__all__'  # Incluye todos los campos del modelo Cliente
+        # Todos los campos del modelo Cliente salvo la secuencia interna de cambios
+        exclude = ['secuencia_cambio']
         read_only_fields = ['cliente_id']
+        # Los límites del tipo de columna no se exponen: los rangos y sus
+        # mensajes son los de clientes.validaciones
+        extra_kwargs = {'edad': {'min_value': None, 'max_value': None}}
     
     def validate_edad(self, value):
         """Validación de edad"""
-        if value < 18:
-            raise serializers.ValidationError("El cliente debe ser mayor de 18 años")
-        if value > 120:
-            raise serializers.ValidationError("La edad no puede ser mayor a 120 años")
-        return value
+        return _validar(validaciones.error_edad, value)
     
     def validate_saldo(self, value):
         """Validación de saldo"""
-        if value < 0:
-            raise serializers.ValidationError("El saldo no puede ser negativo")
-        return value
+        return _validar(validaciones.error_saldo, value)
     
     def validate_nivel_de_satisfaccion(self, value):
         """Validación de nivel de satisfacción"""
-        if value < 1 or value > 5:
-            raise serializers.ValidationError("El nivel de satisfacción debe estar entre 1 y 5")
-        return value
+        return _validar(validaciones.error_nivel_de_satisfaccion, value)
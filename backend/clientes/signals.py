@@ -0,0 +1,104 @@
+"""
+Handlers de señales de Cliente que mantienen las estructuras derivadas
+"""
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .cache_clientes import cache_clientes
+from .estadisticas import (
+    aplicar_delta, aplicar_deltas, aplicar_resumenes, incrementar_version, reconstruir_snapshot,
+)
+from .models import Cliente, ClienteEliminado, cambios_masivos
+from .versionado import reservar_secuencia
+
+
+@receiver(pre_save, sender=Cliente, dispatch_uid='clientes_capturar_valores_originales')
+def capturar_valores_originales(sender, instance, raw=False, **kwargs):
+    """Obtiene los valores previos si la instancia no se cargó desde la base de datos"""
+    if raw or instance.pk is None or instance.valores_originales() is not None:
+        return
+    anterior = Cliente.objects.filter(pk=instance.pk).values(*Cliente.CAMPOS_ESTADISTICOS).first()
+    if anterior is not None:
+        anterior['saldo'] = Cliente.normalizar_saldo(anterior['saldo'])
+    instance._valores_originales = anterior
+
+
+@receiver(pre_save, sender=Cliente, dispatch_uid='clientes_asignar_secuencia_cambio')
+def asignar_secuencia_cambio(sender, instance, raw=False, **kwargs):
+    """Numera la escritura; Cliente.save la envuelve en una transacción"""
+    if raw:
+        return
+    instance.secuencia_cambio = reservar_secuencia()
+
+
+@receiver(post_save, sender=Cliente, dispatch_uid='clientes_actualizar_snapshot_guardado')
+def actualizar_snapshot_guardado(sender, instance, created, raw=False, **kwargs):
+    """Aplica al snapshot el delta de una creación o actualización"""
+    if raw:
+        return
+    actual = instance.valores_estadisticos()
+    anterior = None if created else instance.valores_originales()
+    if not created and anterior is None:
+        # Sin valores previos no hay delta posible
+        reconstruir_snapshot()
+    else:
+        aplicar_delta(anterior, actual)
+    instance._valores_originales = actual
+
+
+@receiver(post_delete, sender=Cliente, dispatch_uid='clientes_actualizar_snapshot_eliminado')
+def actualizar_snapshot_eliminado(sender, instance, **kwargs):
+    """Registra la eliminación y retira del snapshot el aporte del cliente"""
+    ClienteEliminado.objects.update_or_create(
+        cliente_id=instance.pk, defaults={'secuencia_cambio': reservar_secuencia()}
+    )
+    aplicar_delta(instance.valores_originales() or instance.valores_estadisticos(), None)
+
+
+@receiver(cambios_masivos, sender=Cliente, dispatch_uid='clientes_actualizar_snapshot_masivo')
+def actualizar_snapshot_masivo(sender, operacion, pares, campos, resumenes=None, **kwargs):
+    """Aplica una escritura masiva: delta de sus filas (por pares o resúmenes), o reconstrucción"""
+    if campos is not None and not campos & set(Cliente.CAMPOS_ESTADISTICOS):
+        # Los agregados no cambian, pero sí los datos
+        incrementar_version()
+    elif pares is not None:
+        aplicar_deltas(pares)
+    elif resumenes is not None:
+        aplicar_resumenes(*resumenes, campos)
+    else:
+        reconstruir_snapshot()
+
+
+@receiver(post_save, sender=Cliente, dispatch_uid='clientes_invalidar_cache_guardado')
+@receiver(post_delete, sender=Cliente, dispatch_uid='clientes_invalidar_cache_eliminado')
+def invalidar_cache_cliente(sender, instance, **kwargs):
+    """Descarta la entrada del cliente en la caché por objeto"""
+    cache_clientes.invalidar([instance.pk])
+
+
+@receiver(cambios_masivos, sender=Cliente, dispatch_uid='clientes_invalidar_cache_masivo')
+def invalidar_cache_masivo(sender, **kwargs):
+    """Las escrituras masivas no informan los IDs: se vacía la caché por objeto"""
+    cache_clientes.vaciar()
+
+
+# Handlers de post_delete que cubre la señal cambios_masivos de las eliminaciones por lotes
+HANDLERS_REEMPLAZADOS = (actualizar_snapshot_eliminado, invalidar_cache_cliente)
+
+
+def eliminacion_por_lotes_segura():
+    """
+    Indica si se puede eliminar clientes sin instanciarlos.
+
+    Requiere que los únicos handlers de pre/post_delete de Cliente sean los de
+    este módulo (los de post_delete se reemplazan por ``cambios_masivos``) y
+    que ningún modelo referencie a Cliente.
+    """
+    if Cliente._meta.related_objects:
+        return False
+    for signal in (pre_delete, post_delete):
+        sincronos, asincronos = signal._live_receivers(Cliente)
+        if asincronos or any(handler not in HANDLERS_REEMPLAZADOS for handler in sincronos):
+            return False
+    return True
+
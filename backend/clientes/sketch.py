@@ -0,0 +1,91 @@
+"""
+Sketch de cuantiles con error relativo acotado (estilo DDSketch).
+
+Cada valor positivo ``x`` cae en el cubo ``ceil(log_gamma(x))`` con
+``gamma = (1 + alpha) / (1 - alpha)``; el cubo se representa por
+``2 * gamma**i / (gamma + 1)``. Garantía: para cualquier cuantil q, el valor
+devuelto ``v`` cumple ``|v - x_q| <= alpha * x_q``, donde ``x_q`` es el valor
+exacto en la posición ``floor(q * (n - 1))`` de los datos ordenados.
+
+A diferencia de t-digest o KLL, los cubos son contadores: el sketch admite
+eliminaciones exactas (restar del cubo) y dos sketches con el mismo ``alpha``
+se fusionan sumando contadores, por lo que es idéntico sin importar el orden
+en que se agregaron los valores. El número de cubos depende del rango de
+valores (``log(max / min) / log(gamma)``), no de la cantidad de valores.
+"""
+import math
+from collections import Counter
+
+# Error relativo por defecto: 1%
+PRECISION_RELATIVA = 0.01
+
+# Cubo reservado para valores <= 0 (y menores que un centavo)
+INDICE_CERO = -(10 ** 6)
+VALOR_MINIMO = 0.005
+
+
+class SketchCuantiles:
+    """Histograma logarítmico de conteos, fusionable y con eliminación"""
+
+    def __init__(self, precision_relativa=PRECISION_RELATIVA, cubos=None):
+        self.precision_relativa = precision_relativa
+        self.gamma = (1 + precision_relativa) / (1 - precision_relativa)
+        self._log_gamma = math.log(self.gamma)
+        self.cubos = Counter()
+        for indice, conteo in (cubos or {}).items():
+            if conteo:
+                self.cubos[indice] = conteo
+
+    def __len__(self):
+        return self.total
+
+    @property
+    def total(self):
+        return sum(self.cubos.values())
+
+    def indice(self, valor):
+        """Cubo al que pertenece ``valor``"""
+        valor = float(valor)
+        if valor < VALOR_MINIMO:
+            return INDICE_CERO
+        return math.ceil(math.log(valor) / self._log_gamma)
+
+    def valor_representativo(self, indice):
+        """Valor que representa al cubo (a distancia relativa <= alpha de cualquier miembro)"""
+        if indice == INDICE_CERO:
+            return 0.0
+        return 2 * self.gamma ** indice / (self.gamma + 1)
+
+    def agregar(self, valor, conteo=1):
+        self.cubos[self.indice(valor)] += conteo
+
+    def quitar(self, valor, conteo=1):
+        indice = self.indice(valor)
+        restante = self.cubos[indice] - conteo
+        if restante > 0:
+            self.cubos[indice] = restante
+        else:
+            del self.cubos[indice]
+
+    def fusionar(self, otro):
+        """Suma los cubos de otro sketch con la misma precisión"""
+        if otro.precision_relativa != self.precision_relativa:
+            raise ValueError('Solo se pueden fusionar sketches con la misma precisión relativa')
+        self.cubos.update(otro.cubos)
+        return self
+
+    def valor_en_posicion(self, posicion):
+        """Valor aproximado en la posición ``posicion`` (base 0) de los datos ordenados"""
+        acumulado = 0
+        for indice in sorted(self.cubos):
+            acumulado += self.cubos[indice]
+            if acumulado > posicion:
+                return self.valor_representativo(indice)
+        return None
+
+    def cuantil(self, q):
+        """Cuantil ``q`` en [0, 1], o ``None`` si el sketch está vacío"""
+        total = self.total
+        if total == 0:
+            return None
+        return self.valor_en_posicion(math.floor(q * (total - 1)))
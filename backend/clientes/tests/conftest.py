@@ -0,0 +1,37 @@
+"""
+Fixtures compartidas por los tests de clientes
+"""
+import pytest
+from django.core.cache import cache, caches
+from clientes.cache_clientes import CACHE_CLIENTES
+from clientes.estadisticas import sketch_saldos
+from clientes.ranking import indice_saldos
+from clientes.respuestas import CACHE_RESPUESTAS, metricas
+
+
+@pytest.fixture(autouse=True)
+def estado_por_proceso():
+    """Los tests revierten la base de datos; el estado en memoria del proceso también"""
+    cache.clear()
+    caches[CACHE_RESPUESTAS].clear()
+    caches[CACHE_CLIENTES].clear()
+    metricas.reiniciar()
+    indice_saldos.reiniciar()
+    sketch_saldos.reiniciar()
+    yield
+    indice_saldos.reiniciar()
+    sketch_saldos.reiniciar()
+
+
+@pytest.fixture
+def cache_en_disco(settings, tmp_path):
+    """La caché de clientes como queda con CACHE_DIR: en disco, compartida por los workers"""
+    settings.CACHE_DIR = str(tmp_path)
+    settings.CACHES = {
+        **settings.CACHES,
+        CACHE_CLIENTES: {
+            **settings.CACHES[CACHE_CLIENTES],
+            'BACKEND': 'clientes.cache.ArchivoLRUCache',
+            'LOCATION': str(tmp_path / 'clientes'),
+        },
+    }
@@ -0,0 +1,85 @@
+"""
+Tests para el endpoint de agregados por grupo
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+import pytest
+from rest_framework import status
+from clientes.models import Cliente
+
+
+@pytest.mark.django_db
+class TestAgregados:
+    """Tests para /api/v1/clientes/agregados/"""
+
+    @pytest.fixture
+    def clientes(self):
+        return [
+            Cliente.objects.create(
+                edad=18 + (i * 11) % 80,
+                genero='MF'[i % 2],
+                saldo=Decimal((i * 3371) % 120000),
+                activo=i % 3 != 0,
+                nivel_de_satisfaccion=1 + i % 5,
+            )
+            for i in range(40)
+        ]
+
+    def test_agrupa_por_columnas_y_rangos(self, client, clientes, django_assert_num_queries):
+        """Test: Una sola consulta devuelve conteo y promedio por grupo"""
+        with django_assert_num_queries(1):
+            response = client.get('/api/v1/clientes/agregados/', {
+                'group_by': 'genero,edad_bucket', 'metrics': 'count,avg_edad',
+            })
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['columnas'] == ['genero', 'edad_bucket', 'count', 'avg_edad']
+
+        esperado = defaultdict(list)
+        for cliente in clientes:
+            rango = next(etiqueta for etiqueta, minima, maxima in [
+                ('18-30', 18, 30), ('31-45', 31, 45), ('46-60', 46, 60), ('61-80', 61, 80), ('81+', 81, 999)
+            ] if minima <= cliente.edad <= maxima)
+            esperado[(cliente.genero, rango)].append(cliente.edad)
+        obtenido = {(genero, rango): (conteo, promedio) for genero, rango, conteo, promedio in response.data['filas']}
+        assert obtenido == {
+            clave: (len(edades), round(sum(edades) / len(edades), 2)) for clave, edades in esperado.items()
+        }
+
+    def test_rangos_de_saldo_y_suma(self, client, clientes):
+        """Test: Los rangos de saldo suman el saldo total"""
+        response = client.get('/api/v1/clientes/agregados/', {
+            'group_by': 'saldo_bucket', 'metrics': 'count,sum_saldo',
+        })
+
+        filas = response.data['filas']
+        assert sum(fila[1] for fila in filas) == len(clientes)
+        assert round(sum(fila[2] for fila in filas), 2) == float(sum(c.saldo for c in clientes))
+        assert {fila[0] for fila in filas} <= {'0-10k', '10k-25k', '25k-50k', '50k-75k', '75k-100k', '100k+'}
+
+    def test_rangos_en_orden_numerico(self, client, clientes):
+        """Test: Los rangos salen en el orden de sus límites, no alfabético ('100k+' al final)"""
+        response = client.get('/api/v1/clientes/agregados/', {'group_by': 'activo,saldo_bucket'})
+
+        filas = [fila[:2] for fila in response.data['filas']]
+        assert filas == [[activo, rango] for activo in (False, True) for rango in
+                         ['0-10k', '10k-25k', '25k-50k', '50k-75k', '75k-100k', '100k+']]
+
+    def test_sin_group_by_y_con_filtros(self, client, clientes):
+        """Test: Sin dimensiones devuelve una fila total y respeta los filtros del listado"""
+        response = client.get('/api/v1/clientes/agregados/', {'genero': 'F', 'metrics': 'count,avg_saldo'})
+
+        femeninos = [c for c in clientes if c.genero == 'F']
+        promedio = round(float(sum(c.saldo for c in femeninos)) / len(femeninos), 2)
+        assert response.data['filas'] == [[len(femeninos), promedio]]
+
+    def test_parametros_invalidos(self, client):
+        """Test: Dimensiones o métricas desconocidas devuelven 400"""
+        response = client.get('/api/v1/clientes/agregados/', {'group_by': 'usuario'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'group_by' in response.data
+
+        response = client.get('/api/v1/clientes/agregados/', {'metrics': 'max_saldo'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'metrics' in response.data
@@ -0,0 +1,202 @@
+"""
+Tests para la caché por objeto de clientes (detalle y estadísticas individuales)
+"""
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db.models import F, QuerySet
+from rest_framework import status
+from rest_framework.test import APIClient
+from clientes.cache import ArchivoLRUCache
+from clientes.cache_clientes import CACHE_CLIENTES, MAXIMO_CALENTAR, cache_clientes
+from clientes.estadisticas import obtener_snapshot
+from clientes.models import Cliente
+from clientes.respuestas import metricas
+
+
+def en_cache(cliente_id):
+    return caches[CACHE_CLIENTES].get(cache_clientes.clave(cliente_id)) is not None
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('cache_en_disco')
+class TestCacheClientes:
+    """Tests para la lectura a través de la caché y su invalidación"""
+
+    @pytest.fixture
+    def api_client(self):
+        return APIClient()
+
+    @pytest.fixture
+    def admin_client(self, api_client):
+        api_client.force_authenticate(User.objects.create_superuser('admin', 'a@a.com', 'x'))
+        return api_client
+
+    @pytest.fixture
+    def clientes(self):
+        obtener_snapshot()
+        return [
+            Cliente.objects.create(edad=25 + i, genero='MF'[i % 2], saldo=Decimal(f'{i * 100}.50'),
+                                   nivel_de_satisfaccion=1 + i % 5)
+            for i in range(4)
+        ]
+
+    def test_detalle_en_cache_sin_consultas(self, api_client, clientes, django_assert_num_queries):
+        """Test: El segundo detalle del mismo cliente no consulta la base de datos"""
+        url = f'/api/v1/clientes/{clientes[1].pk}/'
+        primera = api_client.get(url)
+        assert primera.status_code == status.HTTP_200_OK
+
+        with django_assert_num_queries(0):
+            segunda = api_client.get(url)
+        assert segunda.content == primera.content
+        assert segunda.data['saldo'] == '100.50'
+        assert metricas.resumen('clientes')['aciertos'] == 1
+
+    def test_etag_por_cliente(self, api_client, clientes, django_assert_num_queries):
+        """Test: Modificar otro cliente no cambia el ETag del detalle"""
+        url = f'/api/v1/clientes/{clientes[0].pk}/'
+        etag = api_client.get(url)['ETag']
+        otro = clientes[1]
+        otro.edad = 80
+        otro.save()
+
+        with django_assert_num_queries(0):
+            response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_guardar_invalida_solo_ese_cliente(self, api_client, clientes):
+        """Test: post_save descarta la entrada del cliente guardado y no las demás"""
+        for cliente in clientes[:2]:
+            api_client.get(f'/api/v1/clientes/{cliente.pk}/')
+        etag = api_client.get(f'/api/v1/clientes/{clientes[0].pk}/')['ETag']
+
+        clientes[0].edad = 70
+        clientes[0].save()
+
+        assert not en_cache(clientes[0].pk)
+        assert en_cache(clientes[1].pk)
+        response = api_client.get(f'/api/v1/clientes/{clientes[0].pk}/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['edad'] == 70
+
+    def test_invalidacion_entre_workers(self, api_client, clientes, settings):
+        """Test: Con CACHE_DIR la caché está en disco y otro worker ve la invalidación sin esperar al TIMEOUT"""
+        configuracion = settings.CACHES[CACHE_CLIENTES]
+        otro_worker = ArchivoLRUCache(configuracion['LOCATION'], configuracion)
+        clave = cache_clientes.clave(clientes[0].pk)
+        api_client.get(f'/api/v1/clientes/{clientes[0].pk}/')
+        assert otro_worker.get(clave).datos['edad'] == 25
+
+        clientes[0].edad = 70
+        clientes[0].save()
+        assert otro_worker.get(clave) is None
+
+    def test_eliminar_invalida(self, api_client, clientes):
+        """Test: Un cliente eliminado deja de estar en caché y responde 404"""
+        url = f'/api/v1/clientes/{clientes[2].pk}/'
+        api_client.get(url)
+        clientes[2].delete()
+
+        assert not en_cache(clientes[2].pk)
+        assert api_client.get(url).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_update_masivo_vacia_la_cache(self, api_client, clientes, admin_client):
+        """Test: Las escrituras masivas sin IDs vacían la caché"""
+        api_client.get(f'/api/v1/clientes/{clientes[0].pk}/')
+        response = admin_client.post('/api/v1/clientes/actualizar-masivo/?todos=true',
+                                     {'cambios': {'activo': False}}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+
+        assert not en_cache(clientes[0].pk)
+        assert api_client.get(f'/api/v1/clientes/{clientes[0].pk}/').data['activo'] is False
+
+    def test_importacion_merge_invalida_los_actualizados(self, api_client, tmp_path):
+        """Test: El merge descarta las entradas de los clientes que actualiza"""
+        encabezado = 'Cliente_ID,Edad,Genero,Saldo,Activo,Nivel_de_Satisfaccion\n'
+        inicial = tmp_path / 'dia1.csv'
+        inicial.write_text(encabezado + '1,30,Femenino,100,1,3\n2,40,Masculino,200,0,4\n')
+        call_command('importar_clientes', str(inicial), stdout=StringIO(), stderr=StringIO())
+        for cliente_id in (1, 2):
+            api_client.get(f'/api/v1/clientes/{cliente_id}/')
+
+        cambios = tmp_path / 'dia2.csv'
+        cambios.write_text(encabezado + '1,30,Femenino,100,1,3\n2,40,Masculino,250,0,4\n')
+        call_command('importar_clientes', str(cambios), '--modo', 'merge', stdout=StringIO(), stderr=StringIO())
+
+        assert en_cache(1)
+        assert not en_cache(2)
+        assert api_client.get('/api/v1/clientes/2/').data['saldo'] == '250.00'
+
+    def test_estadisticas_usan_la_cache(self, api_client, clientes):
+        """Test: Las estadísticas del cliente leen y cargan la misma entrada"""
+        response = api_client.get(f'/api/v1/clientes/{clientes[3].pk}/estadisticas/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['saldo'] == Decimal('300.50')
+        assert en_cache(clientes[3].pk)
+        assert api_client.get('/api/v1/clientes/999999/estadisticas/').status_code == status.HTTP_404_NOT_FOUND
+
+    def test_calentar_cache(self, api_client, admin_client, clientes, django_assert_num_queries):
+        """Test: calentar-cache carga la lista en una consulta y solo lo usa un admin"""
+        ids = [cliente.pk for cliente in clientes] + [999999]
+        assert APIClient().post('/api/v1/clientes/calentar-cache/', {'ids': ids},
+                                format='json').status_code in (status.HTTP_401_UNAUTHORIZED,
+                                                               status.HTTP_403_FORBIDDEN)
+
+        with django_assert_num_queries(1):
+            response = cache_clientes.calentar(ids)
+        assert sorted(response) == ids[:-1]
+
+        caches[CACHE_CLIENTES].clear()
+        response = admin_client.post('/api/v1/clientes/calentar-cache/', {'ids': ids}, format='json')
+        assert response.data == {'calentados': len(clientes)}
+        assert all(en_cache(cliente.pk) for cliente in clientes)
+
+    @pytest.mark.parametrize('ids', [[], 'x', [1, 'a'], [True], list(range(MAXIMO_CALENTAR + 1))])
+    def test_calentar_cache_valida_ids(self, admin_client, ids):
+        """Test: calentar-cache rechaza listas vacías, no enteras o demasiado largas"""
+        response = admin_client.post('/api/v1/clientes/calentar-cache/', {'ids': ids}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_metricas_con_limite_de_bytes(self, api_client, admin_client, clientes):
+        """Test: Las métricas informan aciertos y ocupación acotada de la caché por cliente"""
+        for _ in range(2):
+            api_client.get(f'/api/v1/clientes/{clientes[0].pk}/')
+
+        resumen = admin_client.get('/api/v1/clientes/metricas-cache/').data['clientes']
+        assert resumen['aciertos'] == 1 and resumen['fallos'] == 1
+        assert resumen['entradas'] == 1
+        assert 0 < resumen['bytes'] <= resumen['max_bytes']
+
+
+@pytest.mark.django_db
+class TestCacheClientesEnMemoria:
+    """Tests para la caché de cada proceso, la que se usa sin CACHE_DIR"""
+
+    @pytest.fixture
+    def cliente(self):
+        obtener_snapshot()
+        return Cliente.objects.create(edad=30, genero='F', saldo=Decimal('10.00'), nivel_de_satisfaccion=3)
+
+    def test_sin_cache_dir_queda_en_memoria(self, settings):
+        """Test: Sin CACHE_DIR la caché de clientes no escribe archivos"""
+        assert not settings.CACHE_DIR
+        assert not cache_clientes.compartida
+
+    def test_acierto_confirma_la_secuencia(self, cliente, django_assert_num_queries):
+        """Test: Un acierto se confirma con una consulta y no sirve lo que cambió otro worker"""
+        url = f'/api/v1/clientes/{cliente.pk}/'
+        api_client = APIClient()
+        api_client.get(url)
+        with django_assert_num_queries(1):
+            assert api_client.get(url).data['edad'] == 30
+
+        # Escritura de otro worker: no pasa por las señales de este proceso
+        QuerySet.update(Cliente.objects.filter(pk=cliente.pk), edad=70, secuencia_cambio=F('secuencia_cambio') + 1)
+
+        assert api_client.get(url).data['edad'] == 70
+        assert metricas.resumen('clientes')['fallos'] == 2
@@ -0,0 +1,84 @@
+"""
+Tests para la sincronización incremental (/api/v1/clientes/cambios/)
+"""
+from decimal import Decimal
+
+import pytest
+from rest_framework import status
+from clientes.estadisticas import obtener_snapshot
+from clientes.models import Cliente, ClienteEliminado
+
+
+def nuevo_cliente(i, **campos):
+    return Cliente(edad=20 + i, genero='MF'[i % 2], saldo=Decimal(f'{i * 10}.00'),
+                   nivel_de_satisfaccion=1 + i % 5, **campos)
+
+
+@pytest.mark.django_db
+class TestCambios:
+    """Tests para la secuencia de cambios, las marcas de eliminación y el endpoint"""
+
+    url = '/api/v1/clientes/cambios/'
+
+    @pytest.fixture
+    def clientes(self):
+        return [Cliente.objects.create(**{
+            'edad': 30 + i, 'genero': 'MF'[i % 2], 'saldo': Decimal('100.00'), 'nivel_de_satisfaccion': 3,
+        }) for i in range(4)]
+
+    def test_secuencia_coincide_con_la_version(self, clientes):
+        """Test: Cada escritura numera la fila con la versión resultante"""
+        cliente = clientes[0]
+        cliente.saldo = Decimal('5.00')
+        cliente.save()
+
+        assert Cliente.objects.get(pk=cliente.pk).secuencia_cambio == obtener_snapshot().version
+        assert len({c.secuencia_cambio for c in Cliente.objects.all()}) == 4
+
+        eliminado_id = clientes[1].pk
+        clientes[1].delete()
+        marca = ClienteEliminado.objects.get(cliente_id=eliminado_id)
+        assert marca.secuencia_cambio == obtener_snapshot().version
+
+    def test_sincronizacion_completa_e_incremental(self, client, clientes):
+        """Test: Sin desde trae todo; con desde solo altas, modificaciones y eliminaciones"""
+        inicial = client.get(self.url).json()
+        assert len(inicial['clientes']) == 4
+        assert inicial['eliminados'] == []
+
+        clientes[0].activo = False
+        clientes[0].save()
+        eliminado_id = clientes[1].pk
+        clientes[1].delete()
+        nuevo = Cliente.objects.create(edad=44, genero='F', saldo=Decimal('1.00'), nivel_de_satisfaccion=2)
+
+        cambios = client.get(self.url, {'desde': inicial['hasta']}).json()
+        assert [c['cliente_id'] for c in cambios['clientes']] == [clientes[0].pk, nuevo.pk]
+        assert cambios['clientes'][0]['activo'] is False
+        assert cambios['eliminados'] == [eliminado_id]
+        assert cambios['hasta'] == obtener_snapshot().version
+
+        sin_cambios = client.get(self.url, {'desde': cambios['hasta']}).json()
+        assert sin_cambios['clientes'] == [] and sin_cambios['eliminados'] == []
+
+    def test_operaciones_masivas_y_paginas(self, client, clientes):
+        """Test: update y bulk_create se sincronizan, paginados sin repetidos ni omisiones"""
+        desde = client.get(self.url).json()['hasta']
+        Cliente.objects.filter(genero='M').update(nivel_de_satisfaccion=5)
+        creados = Cliente.objects.bulk_create([nuevo_cliente(i) for i in range(5)])
+
+        recibidos, url, params = [], self.url, {'desde': desde, 'limite': 2}
+        while url:
+            data = client.get(url, params).json()
+            recibidos += [c['cliente_id'] for c in data['clientes']]
+            url, params = data['siguiente'], None
+
+        esperados = [c.pk for c in clientes if c.genero == 'M'] + [c.pk for c in creados]
+        assert sorted(recibidos) == sorted(esperados)
+        assert len(recibidos) == len(set(recibidos))
+        assert data['hasta'] == obtener_snapshot().version
+
+    def test_parametros_invalidos(self, client):
+        """Test: desde no numérico o despues_de sin desde devuelven 400"""
+        assert client.get(self.url, {'desde': 'abc'}).status_code == status.HTTP_400_BAD_REQUEST
+        assert client.get(self.url, {'despues_de': 3}).status_code == status.HTTP_400_BAD_REQUEST
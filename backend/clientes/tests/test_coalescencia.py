@@ -0,0 +1,179 @@
+"""
+Tests para la coalescencia de cálculos concurrentes
+"""
+import fcntl
+import os
+import threading
+import time
+
+import pytest
+from clientes.coalescencia import Coalescedor, ruta_bloqueo
+from clientes.respuestas import metricas
+
+
+class Calculo:
+    """Cálculo que se bloquea hasta que el test lo libera y guarda su resultado"""
+
+    def __init__(self, resultado='calculado'):
+        self.resultado = resultado
+        self.guardado = None
+        self.llamadas = 0
+        self.empezo = threading.Event()
+        self.liberar = threading.Event()
+        self._lock = threading.Lock()
+
+    def calcular(self):
+        with self._lock:
+            self.llamadas += 1
+        self.empezo.set()
+        assert self.liberar.wait(5)
+        self.guardado = self.resultado
+        return self.resultado
+
+    def leer(self):
+        return self.guardado
+
+
+def en_hilos(cantidad, funcion):
+    resultados = []
+    hilos = [threading.Thread(target=lambda: resultados.append(funcion())) for _ in range(cantidad)]
+    for hilo in hilos:
+        hilo.start()
+    return hilos, resultados
+
+
+class TestCoalescedor:
+    """Tests para un cálculo por clave dentro del worker"""
+
+    @pytest.fixture(autouse=True)
+    def sin_cache_compartida(self, settings):
+        settings.CACHE_DIR = ''
+
+    def test_un_solo_calculo_por_clave(self):
+        """Test: Varios hilos con la misma clave comparten un cálculo"""
+        coalescedor = Coalescedor('pruebas')
+        calculo = Calculo()
+        hilos, resultados = en_hilos(8, lambda: coalescedor.ejecutar('k', calculo.calcular, calculo.leer, 5))
+        assert calculo.empezo.wait(5)
+        # Los demás hilos ya esperan el cálculo en curso
+        while metricas.resumen('pruebas').get('coalescidas', 0) < 7:
+            time.sleep(0.01)
+
+        calculo.liberar.set()
+        for hilo in hilos:
+            hilo.join(5)
+
+        assert calculo.llamadas == 1
+        assert resultados == ['calculado'] * 8
+
+    def test_claves_distintas_en_paralelo(self):
+        """Test: Claves distintas no se esperan entre sí"""
+        coalescedor = Coalescedor('pruebas')
+        primero, segundo = Calculo('a'), Calculo('b')
+        hilos, resultados = en_hilos(1, lambda: coalescedor.ejecutar('a', primero.calcular, primero.leer, 5))
+        assert primero.empezo.wait(5)
+
+        segundo.liberar.set()
+        assert coalescedor.ejecutar('b', segundo.calcular, segundo.leer, 5) == 'b'
+        primero.liberar.set()
+        hilos[0].join(5)
+        assert resultados == ['a']
+
+    def test_espera_maxima(self):
+        """Test: Quien espera más que el máximo calcula por su cuenta"""
+        coalescedor = Coalescedor('pruebas')
+        lento = Calculo('lento')
+        hilos, _ = en_hilos(1, lambda: coalescedor.ejecutar('k', lento.calcular, lento.leer, 5))
+        assert lento.empezo.wait(5)
+
+        assert coalescedor.ejecutar('k', lambda: 'propio', lento.leer, 0.05) == 'propio'
+        assert metricas.resumen('pruebas')['esperas_vencidas'] == 1
+        lento.liberar.set()
+        hilos[0].join(5)
+
+    def test_falla_del_que_calcula(self):
+        """Test: Si el cálculo falla, quien esperaba calcula por su cuenta y el error es del primero"""
+        coalescedor = Coalescedor('pruebas')
+        empezo, liberar = threading.Event(), threading.Event()
+        errores = []
+
+        def fallar():
+            empezo.set()
+            liberar.wait(5)
+            raise RuntimeError('falla')
+
+        def primero():
+            try:
+                coalescedor.ejecutar('k', fallar, lambda: None, 5)
+            except RuntimeError as error:
+                errores.append(error)
+
+        hilo = threading.Thread(target=primero)
+        hilo.start()
+        assert empezo.wait(5)
+        hilos, resultados = en_hilos(1, lambda: coalescedor.ejecutar('k', lambda: 'reintento', lambda: None, 5))
+        while not metricas.resumen('pruebas').get('coalescidas'):
+            time.sleep(0.01)
+        liberar.set()
+        for h in (hilo, *hilos):
+            h.join(5)
+
+        assert len(errores) == 1
+        assert resultados == ['reintento']
+        # La clave queda libre para el siguiente
+        assert coalescedor.ejecutar('k', lambda: 'nuevo', lambda: None, 5) == 'nuevo'
+
+
+class TestEntreWorkers:
+    """Tests para el archivo de bloqueo compartido por los workers"""
+
+    @pytest.fixture
+    def otro_worker(self, settings, tmp_path):
+        """Simula otro worker que tiene tomado el bloqueo de la clave"""
+        settings.CACHE_DIR = str(tmp_path)
+        ruta = ruta_bloqueo('k')
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with open(ruta, 'a') as archivo:
+            fcntl.flock(archivo, fcntl.LOCK_EX)
+            yield archivo
+
+    def test_sin_cache_compartida_no_hay_archivo(self, settings):
+        """Test: Sin CACHE_DIR no se usan archivos de bloqueo"""
+        settings.CACHE_DIR = ''
+        assert ruta_bloqueo('k') is None
+
+    def test_franjas_acotadas(self, settings, tmp_path):
+        """Test: Las claves comparten una cantidad fija de archivos"""
+        settings.CACHE_DIR = str(tmp_path)
+        assert len({ruta_bloqueo(f'clave{indice}') for indice in range(2000)}) <= 256
+
+    def test_lee_el_resultado_del_otro_worker(self, otro_worker):
+        """Test: Al liberarse el bloqueo se usa lo que guardó el otro worker sin calcular"""
+        guardado = []
+        llamadas = []
+        hilos, resultados = en_hilos(1, lambda: Coalescedor('pruebas').ejecutar(
+            'k', lambda: llamadas.append(1) or 'propio', lambda: guardado[0] if guardado else None, 5))
+        time.sleep(0.2)
+        assert not resultados
+
+        guardado.append('del otro worker')
+        fcntl.flock(otro_worker, fcntl.LOCK_UN)
+        hilos[0].join(5)
+
+        assert resultados == ['del otro worker']
+        assert not llamadas
+        assert metricas.resumen('pruebas')['coalescidas'] == 1
+
+    def test_espera_maxima_entre_workers(self, otro_worker):
+        """Test: Si el otro worker no termina a tiempo se calcula sin el bloqueo"""
+        resultado = Coalescedor('pruebas').ejecutar('k', lambda: 'propio', lambda: None, 0.1)
+        assert resultado == 'propio'
+        assert metricas.resumen('pruebas')['esperas_vencidas'] == 1
+
+    def test_calcula_si_el_otro_no_guardo(self, otro_worker):
+        """Test: Si el otro worker no dejó resultado se calcula con el bloqueo tomado"""
+        hilos, resultados = en_hilos(1, lambda: Coalescedor('pruebas').ejecutar('k', lambda: 'propio', lambda: None, 5))
+        time.sleep(0.1)
+        fcntl.flock(otro_worker, fcntl.LOCK_UN)
+        hilos[0].join(5)
+        assert resultados == ['propio']
@@ -0,0 +1,186 @@
+"""
+Tests para los bytes comprimidos de las respuestas en caché
+"""
+import gzip
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import RequestFactory
+from rest_framework import status
+from rest_framework.test import APIClient
+from clientes import compresion
+from clientes.estadisticas import obtener_snapshot
+from clientes.models import Cliente
+from clientes.renderers import ORJSONRenderer
+from clientes.respuestas import CACHE_RESPUESTAS
+
+LISTADO = '/api/v1/clientes/'
+
+
+class TestAceptadas:
+    """Tests para la negociación de Accept-Encoding"""
+
+    @pytest.mark.parametrize('cabecera, esperadas', [
+        ('gzip, deflate', ['gzip']),
+        ('gzip;q=0, deflate', []),
+        ('GZIP;q=0.5', ['gzip']),
+        ('*', list(compresion.CODIFICACIONES)),
+        ('*, gzip;q=0', [c for c in compresion.CODIFICACIONES if c != 'gzip']),
+        ('identity', []),
+        ('gzip;q=x', []),
+        ('', []),
+    ])
+    def test_codificaciones(self, cabecera, esperadas):
+        """Test: Se respetan los pesos q y el comodín"""
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=cabecera)
+        assert compresion.aceptadas(request) == esperadas
+
+    def test_brotli_preferido(self):
+        """Test: Con brotli instalado se prefiere br a gzip"""
+        pytest.importorskip('brotli')
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip, br')
+        assert compresion.aceptadas(request) == ['br', 'gzip']
+
+
+@pytest.mark.django_db
+class TestCompresion:
+    """Tests para servir los aciertos con bytes ya comprimidos"""
+
+    @pytest.fixture
+    def api_client(self):
+        return APIClient()
+
+    @pytest.fixture
+    def clientes(self):
+        obtener_snapshot()
+        return [
+            Cliente.objects.create(edad=20 + i % 60, genero='MF'[i % 2], saldo=Decimal(f'{i * 137}.25'),
+                                   nivel_de_satisfaccion=1 + i % 5)
+            for i in range(40)
+        ]
+
+    @pytest.fixture
+    def trabajo(self, monkeypatch):
+        """Cuenta serializaciones y compresiones"""
+        llamadas = {'render': 0, 'comprimir': 0}
+        render, comprimir = ORJSONRenderer.render, compresion.comprimir
+
+        def contar_render(*args, **kwargs):
+            llamadas['render'] += 1
+            return render(*args, **kwargs)
+
+        def contar_comprimir(*args, **kwargs):
+            llamadas['comprimir'] += 1
+            return comprimir(*args, **kwargs)
+
+        monkeypatch.setattr(ORJSONRenderer, 'render', contar_render)
+        monkeypatch.setattr(compresion, 'comprimir', contar_comprimir)
+        return llamadas
+
+    def test_fallo_comprime_y_acierto_sin_cpu(self, api_client, clientes, trabajo):
+        """Test: El fallo comprime una vez; el acierto envía los bytes guardados sin serializar ni comprimir"""
+        plano = api_client.get(LISTADO)
+        assert not plano.has_header('Content-Encoding')
+        caches[CACHE_RESPUESTAS].clear()
+
+        primera = api_client.get(LISTADO, HTTP_ACCEPT_ENCODING='gzip')
+        assert primera['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(primera.content) == plano.content
+        # Cada fallo renderiza una vez y comprime con todas las codificaciones
+        assert trabajo == {'render': 2, 'comprimir': 2 * len(compresion.CODIFICACIONES)}
+
+        antes = dict(trabajo)
+        segunda = api_client.get(LISTADO, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        assert segunda['X-Cache'] == 'HIT'
+        assert segunda['Content-Encoding'] == 'gzip'
+        assert segunda.content == primera.content
+        assert trabajo == antes
+        assert 'Accept-Encoding' in segunda['Vary']
+
+    def test_acierto_brotli(self, api_client, clientes):
+        """Test: Con brotli instalado el acierto envía los bytes br guardados"""
+        brotli = pytest.importorskip('brotli')
+        plano = api_client.get(LISTADO)
+
+        segunda = api_client.get(LISTADO, HTTP_ACCEPT_ENCODING='gzip, br')
+        assert segunda['X-Cache'] == 'HIT'
+        assert segunda['Content-Encoding'] == 'br'
+        assert brotli.decompress(segunda.content) == plano.content
+
+    def test_acierto_sin_compresion(self, api_client, clientes, trabajo):
+        """Test: Sin Accept-Encoding el acierto envía los bytes sin comprimir, también sin serializar"""
+        primera = api_client.get(LISTADO)
+        renders = trabajo['render']
+
+        segunda = api_client.get(LISTADO)
+        assert not segunda.has_header('Content-Encoding')
+        assert segunda.content == primera.content
+        assert segunda['Content-Type'] == primera['Content-Type']
+        assert trabajo['render'] == renders
+
+    def test_por_tipo_de_medio(self, api_client, clientes):
+        """Test: Cada formato tiene sus propios bytes"""
+        json = api_client.get(LISTADO, HTTP_ACCEPT_ENCODING='gzip')
+        columnas = api_client.get(LISTADO, {'format': 'columnas'}, HTTP_ACCEPT_ENCODING='gzip')
+        assert gzip.decompress(columnas.content) != gzip.decompress(json.content)
+        assert api_client.get(LISTADO, {'format': 'columnas'},
+                              HTTP_ACCEPT_ENCODING='gzip').content == columnas.content
+
+    def test_respuestas_chicas_sin_comprimir(self, api_client, clientes):
+        """Test: Debajo de MINIMO_BYTES no se comprime"""
+        response = api_client.get(LISTADO, {'page_size': 1}, HTTP_ACCEPT_ENCODING='gzip')
+        assert len(response.content) < compresion.MINIMO_BYTES
+        assert not response.has_header('Content-Encoding')
+        assert api_client.get(LISTADO, {'page_size': 1},
+                              HTTP_ACCEPT_ENCODING='gzip').content == response.content
+
+    def test_etag_debil_y_304(self, api_client, clientes):
+        """Test: La respuesta comprimida lleva un ETag débil que sirve para el 304"""
+        for _ in range(2):
+            response = api_client.get(LISTADO, HTTP_ACCEPT_ENCODING='gzip')
+            assert response['ETag'].startswith('W/"')
+        plano = api_client.get(LISTADO)
+        assert response['ETag'] == f'W/{plano["ETag"]}'
+
+        no_modificado = api_client.get(LISTADO, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        assert no_modificado.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_api_navegable_no_se_guarda(self, api_client, clientes):
+        """Test: El HTML de la API navegable no se guarda como bytes"""
+        assert api_client.get(LISTADO, HTTP_ACCEPT='text/html')['Content-Type'].startswith('text/html')
+        # Solo los datos de la página
+        assert len(caches[CACHE_RESPUESTAS]) == 1
+
+    def test_estadisticas_comprimidas(self, api_client, clientes, trabajo):
+        """Test: Los aciertos de estadisticas-generales también se sirven comprimidos"""
+        primera = api_client.get('/api/v1/clientes/estadisticas-generales/', HTTP_ACCEPT_ENCODING='gzip')
+        assert primera['Content-Encoding'] == 'gzip'
+        antes = dict(trabajo)
+
+        segunda = api_client.get('/api/v1/clientes/estadisticas-generales/', HTTP_ACCEPT_ENCODING='gzip')
+        assert segunda['X-Cache'] == 'HIT'
+        assert segunda.content == primera.content
+        assert trabajo == antes
+
+    def test_exportacion_gzip_en_streaming(self, api_client, clientes):
+        """Test: La exportación se comprime por bloques sin dejar de ser streaming"""
+        plano = b''.join(api_client.get('/api/v1/clientes/export/', {'formato': 'csv'}).streaming_content)
+
+        response = api_client.get('/api/v1/clientes/export/', {'formato': 'csv'}, HTTP_ACCEPT_ENCODING='gzip')
+        assert response.streaming
+        assert response['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response['Vary']
+        assert gzip.decompress(b''.join(response.streaming_content)) == plano
+
+    def test_metricas_de_bytes(self, api_client, clientes):
+        """Test: metricas-cache informa los bytes sin comprimir y los enviados"""
+        for _ in range(3):
+            api_client.get(LISTADO, HTTP_ACCEPT_ENCODING='gzip')
+
+        api_client.force_authenticate(User.objects.create_superuser('admin', 'a@a.com', 'x'))
+        resumen = api_client.get('/api/v1/clientes/metricas-cache/').data['compresion']
+        assert resumen['aciertos'] == 2 and resumen['fallos'] == 1
+        assert resumen['bytes_enviados'] < resumen['bytes_sin_comprimir'] / 3
+        assert resumen['microsegundos'] > 0
@@ -0,0 +1,87 @@
+"""
+Tests para el GET condicional (ETag / Last-Modified)
+"""
+from decimal import Decimal
+
+import pytest
+from django.utils.http import http_date
+from rest_framework import status
+from clientes.estadisticas import obtener_snapshot
+from clientes.models import Cliente
+
+
+@pytest.mark.django_db
+class TestRespuestaCondicional:
+    """Tests para los validadores del listado, detalle y estadísticas"""
+
+    @pytest.fixture
+    def clientes(self):
+        obtener_snapshot()
+        return [
+            Cliente.objects.create(edad=25 + i, genero='MF'[i % 2], saldo=Decimal(f'{i * 100}.00'),
+                                   nivel_de_satisfaccion=1 + i % 5)
+            for i in range(6)
+        ]
+
+    @pytest.mark.parametrize('ruta, consultas', [
+        ('/api/v1/clientes/', 1),
+        # La secuencia de cambio del cliente sale de la caché por objeto compartida
+        ('/api/v1/clientes/{id}/', 0),
+        ('/api/v1/clientes/{id}/estadisticas/', 1),
+        ('/api/v1/clientes/estadisticas-generales/', 1),
+    ])
+    @pytest.mark.usefixtures('cache_en_disco')
+    def test_304_sin_consultar_clientes(self, client, clientes, ruta, consultas, django_assert_num_queries):
+        """Test: Con el ETag vigente se responde 304 consultando a lo sumo la versión"""
+        url = ruta.format(id=clientes[0].cliente_id)
+        response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'].startswith('"')
+        assert 'no-cache' in response['Cache-Control']
+
+        with django_assert_num_queries(consultas):
+            no_modificado = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert no_modificado.status_code == status.HTTP_304_NOT_MODIFIED
+        assert no_modificado['ETag'] == response['ETag']
+        assert no_modificado.content == b''
+
+    def test_escritura_cambia_el_etag(self, client, clientes):
+        """Test: Crear, actualizar masivamente o eliminar invalida el ETag"""
+        etag = client.get('/api/v1/clientes/')['ETag']
+
+        escrituras = [
+            lambda: Cliente.objects.create(edad=50, genero='F', saldo=Decimal('5.00'), nivel_de_satisfaccion=3),
+            lambda: Cliente.objects.filter(genero='M').update(activo=False),
+            lambda: Cliente.objects.order_by('cliente_id').first().delete(),
+        ]
+        for escribir in escrituras:
+            escribir()
+            response = client.get('/api/v1/clientes/', HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == status.HTTP_200_OK
+            assert response['ETag'] != etag
+            etag = response['ETag']
+
+    def test_etag_depende_de_los_parametros(self, client, clientes):
+        """Test: Otra página o filtro tiene otro ETag"""
+        etag = client.get('/api/v1/clientes/')['ETag']
+
+        response = client.get('/api/v1/clientes/', {'genero': 'F'}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+    def test_if_modified_since(self, client, clientes):
+        """Test: If-Modified-Since se respeta cuando no hay If-None-Match"""
+        response = client.get('/api/v1/clientes/estadisticas-generales/')
+        ultima = response['Last-Modified']
+
+        assert client.get('/api/v1/clientes/estadisticas-generales/',
+                          HTTP_IF_MODIFIED_SINCE=ultima).status_code == status.HTTP_304_NOT_MODIFIED
+        anterior = http_date(0)
+        assert client.get('/api/v1/clientes/estadisticas-generales/',
+                          HTTP_IF_MODIFIED_SINCE=anterior).status_code == status.HTTP_200_OK
+
+    def test_detalle_inexistente_sin_validadores(self, client, clientes):
+        """Test: Un 404 no lleva ETag"""
+        response = client.get('/api/v1/clientes/999999/')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert not response.has_header('ETag')
@@ -0,0 +1,225 @@
+"""
+Tests para el motor de agregación de estadísticas
+"""
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.db.models import Avg, F, Max, Min, Q, Sum
+from django.core.management import call_command
+from clientes.campos import PromedioCentavos
+from clientes.estadisticas import (
+    SNAPSHOT_PK, calcular_estadisticas_generales, obtener_snapshot, verificar_snapshot,
+)
+from clientes.models import Cliente, EstadisticasSnapshot
+
+
+def estadisticas_referencia(queryset):
+    """Implementación original (una consulta por métrica) usada como referencia"""
+    total = queryset.count()
+    activos = queryset.filter(activo=True).count()
+    niveles = {1: 'muy_insatisfecho', 2: 'insatisfecho', 3: 'neutral', 4: 'satisfecho', 5: 'muy_satisfecho'}
+    agregados = queryset.aggregate(
+        promedio_edad=Avg('edad'), promedio_saldo=PromedioCentavos('saldo'), saldo_total=Sum('saldo'),
+        saldo_max=Max('saldo'), saldo_min=Min('saldo'), edad_max=Max('edad'), edad_min=Min('edad'),
+    )
+    if total > 0:
+        threshold = queryset.order_by('-saldo')[int(total * 0.1) if int(total * 0.1) > 0 else 0].saldo if total > 10 else 0
+        saldo_alto = queryset.filter(saldo__gte=threshold).count()
+    else:
+        saldo_alto = 0
+    satisfechos = queryset.filter(nivel_de_satisfaccion__gte=4).count()
+    promedio_m = queryset.filter(genero='M').aggregate(avg=Avg('nivel_de_satisfaccion'))['avg'] or 0
+    promedio_f = queryset.filter(genero='F').aggregate(avg=Avg('nivel_de_satisfaccion'))['avg'] or 0
+    return {
+        'total_clientes': total,
+        'clientes_activos': activos,
+        'clientes_inactivos': queryset.filter(activo=False).count(),
+        'porcentaje_activos': round((activos / total * 100) if total > 0 else 0, 2),
+        'por_genero': {
+            'masculino': queryset.filter(genero='M').count(),
+            'femenino': queryset.filter(genero='F').count(),
+        },
+        'por_satisfaccion': {
+            nombre: queryset.filter(nivel_de_satisfaccion=nivel).count() for nivel, nombre in niveles.items()
+        },
+        'por_rango_edad': {
+            '18-30': queryset.filter(edad__gte=18, edad__lte=30).count(),
+            '31-45': queryset.filter(edad__gte=31, edad__lte=45).count(),
+            '46-60': queryset.filter(edad__gte=46, edad__lte=60).count(),
+            '61-80': queryset.filter(edad__gte=61, edad__lte=80).count(),
+            '81+': queryset.filter(edad__gte=81).count(),
+        },
+        'promedio_edad': round(float(agregados['promedio_edad'] or 0), 2),
+        'promedio_saldo': round(float(agregados['promedio_saldo'] or 0), 2),
+        'saldo_total': round(float(agregados['saldo_total'] or 0), 2),
+        'saldo_maximo': round(float(agregados['saldo_max'] or 0), 2),
+        'saldo_minimo': round(float(agregados['saldo_min'] or 0), 2),
+        'edad_maxima': agregados['edad_max'],
+        'edad_minima': agregados['edad_min'],
+        'top_5_clientes_por_saldo': list(queryset.order_by('-saldo')[:5].values(
+            'cliente_id', 'edad', 'genero', 'saldo', 'nivel_de_satisfaccion')),
+        'satisfaccion_por_genero': {
+            'masculino': {'promedio': round(float(promedio_m), 2),
+                          'total_clientes': queryset.filter(genero='M').count()},
+            'femenino': {'promedio': round(float(promedio_f), 2),
+                         'total_clientes': queryset.filter(genero='F').count()},
+        },
+        'tasa_satisfaccion_general': round((satisfechos / total * 100) if total > 0 else 0, 2),
+        'clientes_alta_rentabilidad': saldo_alto,
+        'porcentaje_alta_rentabilidad': round((saldo_alto / total * 100) if total > 0 else 0, 2),
+    }
+
+
+def crear_clientes(cantidad):
+    for i in range(cantidad):
+        Cliente.objects.create(
+            edad=18 + (i * 7) % 90,
+            genero='M' if i % 3 else 'F',
+            saldo=Decimal(f'{(i * 7919) % 100000}.{i % 100:02d}'),
+            activo=i % 4 != 0,
+            nivel_de_satisfaccion=1 + i % 5,
+        )
+
+
+@pytest.mark.django_db
+class TestEstadisticasGenerales:
+    """Tests para calcular_estadisticas_generales"""
+
+    @pytest.mark.parametrize('cantidad', [0, 1, 7, 10, 11, 37])
+    def test_coincide_con_implementacion_original(self, cantidad):
+        """Test: La respuesta es idéntica a la implementación de una consulta por métrica"""
+        crear_clientes(cantidad)
+        queryset = Cliente.objects.all()
+
+        assert calcular_estadisticas_generales(queryset) == estadisticas_referencia(queryset)
+
+    def test_cantidad_de_consultas_constante(self, django_assert_num_queries):
+        """Test: El número de consultas no depende del tamaño de la tabla"""
+        crear_clientes(40)
+
+        with django_assert_num_queries(3):
+            calcular_estadisticas_generales(Cliente.objects.all())
+
+    def test_endpoint_usa_agregacion(self, django_assert_max_num_queries, client):
+        """Test: El endpoint público responde con el mismo número acotado de consultas"""
+        obtener_snapshot()
+        crear_clientes(15)
+
+        # Snapshot, cubos del sketch, top 5 y conteo exacto de alta rentabilidad
+        with django_assert_max_num_queries(4):
+            response = client.get('/api/v1/clientes/estadisticas-generales/')
+
+        assert response.status_code == 200
+        assert response.json()['total_clientes'] == 15
+
+
+@pytest.mark.django_db
+class TestEstadisticasSnapshot:
+    """Tests para el snapshot mantenido por deltas"""
+
+    @pytest.fixture(autouse=True)
+    def snapshot_inicial(self):
+        return obtener_snapshot()
+
+    def test_deltas_de_creacion_actualizacion_y_eliminacion(self):
+        """Test: Tras crear, modificar y eliminar, el snapshot coincide con la tabla"""
+        crear_clientes(30)
+        cliente = Cliente.objects.order_by('cliente_id').first()
+        cliente.saldo = Decimal('123.45')
+        cliente.edad = 85
+        cliente.genero = 'F'
+        cliente.save()
+        Cliente.objects.order_by('-cliente_id').first().delete()
+
+        assert verificar_snapshot(obtener_snapshot()) == {}
+
+    def test_actualizacion_con_campos_diferidos(self):
+        """Test: Guardar una instancia cargada con campos diferidos consulta los valores previos"""
+        original = Cliente.objects.create(edad=40, genero='M', saldo=100, nivel_de_satisfaccion=2)
+        parcial = Cliente.objects.only('cliente_id').get(pk=original.pk)
+        parcial.edad = 20
+        parcial.genero = 'F'
+        parcial.save()
+
+        snapshot = obtener_snapshot()
+        assert snapshot.total == 1
+        assert verificar_snapshot(snapshot) == {}
+
+    def test_operaciones_masivas(self):
+        """Test: bulk_create, update y bulk_update mantienen el snapshot y su versión"""
+        version = obtener_snapshot().version
+        Cliente.objects.bulk_create([
+            Cliente(edad=20 + i * 7, genero='MF'[i % 2], saldo=Decimal(f'{i * 750}.25'),
+                    nivel_de_satisfaccion=1 + i % 5)
+            for i in range(12)
+        ])
+        assert verificar_snapshot(obtener_snapshot()) == {}
+
+        Cliente.objects.filter(edad__lt=40).update(saldo=Decimal('10.00'))
+        assert verificar_snapshot(obtener_snapshot()) == {}
+
+        clientes = list(Cliente.objects.all()[:4])
+        for cliente in clientes:
+            cliente.activo = False
+        Cliente.objects.bulk_update(clientes, ['activo'])
+        snapshot = obtener_snapshot()
+        assert verificar_snapshot(snapshot) == {}
+        assert snapshot.version == version + 3
+
+    @pytest.mark.parametrize('filtro, cambios', [
+        (Q(activo=True), {'activo': False}),
+        (Q(edad__lt=40), {'edad': F('edad') + 50, 'saldo': Decimal('0.00')}),
+        (Q(saldo__gte=3000), {'saldo': Decimal('10.50'), 'genero': 'F', 'nivel_de_satisfaccion': 5}),
+        (Q(), {'nivel_de_satisfaccion': 1}),
+    ])
+    def test_update_masivo_aplica_delta(self, monkeypatch, filtro, cambios):
+        """Test: update() ajusta el snapshot y el sketch con el resumen de sus filas, sin reconstruir"""
+        crear_clientes(20)
+        Cliente.objects.filter(pk__in=Cliente.objects.order_by('cliente_id').values('pk')[:5]).update(activo=True)
+
+        def reconstruir():
+            raise AssertionError('update() no debe reconstruir el snapshot')
+
+        monkeypatch.setattr('clientes.signals.reconstruir_snapshot', reconstruir)
+        version = obtener_snapshot().version
+        assert Cliente.objects.filter(filtro).update(**cambios) > 0
+
+        snapshot = obtener_snapshot()
+        assert snapshot.version == version + 1
+        assert verificar_snapshot(snapshot) == {}
+
+    def test_eliminar_extremo_invalida_y_recalcula(self):
+        """Test: Eliminar el saldo máximo fuerza el recálculo de extremos en la lectura"""
+        crear_clientes(5)
+        Cliente.objects.order_by('-saldo').first().delete()
+
+        assert EstadisticasSnapshot.objects.get(pk=SNAPSHOT_PK).extremos_validos is False
+        snapshot = obtener_snapshot()
+        assert snapshot.saldo_maximo == Cliente.objects.order_by('-saldo').first().saldo
+        assert EstadisticasSnapshot.objects.get(pk=SNAPSHOT_PK).extremos_validos is True
+
+    def test_endpoint_coincide_con_agregacion(self, client):
+        """Test: El endpoint leído del snapshot devuelve lo mismo que la agregación directa"""
+        crear_clientes(25)
+        Cliente.objects.order_by('cliente_id')[3].delete()
+
+        response = client.get('/api/v1/clientes/estadisticas-generales/')
+
+        # Solo los cuantiles del sketch son aproximados (ver test_sketch)
+        data = dict(response.data)
+        del data['cuantiles_saldo']
+        assert data == calcular_estadisticas_generales(Cliente.objects.all())
+
+    def test_comando_detecta_deriva_y_reconstruye(self):
+        """Test: recompute_estadisticas informa la deriva y la corrige"""
+        crear_clientes(8)
+        EstadisticasSnapshot.objects.filter(pk=SNAPSHOT_PK).update(total=999)
+
+        salida = StringIO()
+        call_command('recompute_estadisticas', '--verificar', stdout=salida)
+        assert 'total' in salida.getvalue()
+        assert EstadisticasSnapshot.objects.get(pk=SNAPSHOT_PK).total == 999
+
+        call_command('recompute_estadisticas', stdout=StringIO())
+        assert verificar_snapshot() == {}
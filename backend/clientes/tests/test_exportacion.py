@@ -0,0 +1,64 @@
+"""
+Tests para la exportación en streaming
+"""
+import csv
+import io
+import json
+from decimal import Decimal
+
+import pytest
+from rest_framework import status
+from clientes.models import Cliente
+
+
+@pytest.mark.django_db
+class TestExportacion:
+    """Tests para /api/v1/clientes/export/"""
+
+    @pytest.fixture
+    def clientes(self):
+        return [
+            Cliente.objects.create(edad=25 + i, genero='MF'[i % 2], saldo=Decimal(f'{i * 1000}.5'),
+                                   activo=i % 3 != 0, nivel_de_satisfaccion=1 + i % 5)
+            for i in range(25)
+        ]
+
+    def contenido(self, response):
+        assert response.streaming
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_igual_al_listado(self, client, clientes):
+        """Test: Cada línea NDJSON es idéntica a la fila del listado"""
+        response = client.get('/api/v1/clientes/export/')
+        listado = client.get('/api/v1/clientes/', {'page_size': 100}).json()['results']
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/x-ndjson'
+        filas = [json.loads(linea) for linea in self.contenido(response).splitlines()]
+        assert filas == listado
+
+    def test_csv_con_filtros(self, client, clientes):
+        """Test: El CSV aplica los mismos filtros que el listado"""
+        response = client.get('/api/v1/clientes/export/', {'formato': 'csv', 'genero': 'F', 'activo': 'true'})
+
+        filas = list(csv.DictReader(io.StringIO(self.contenido(response))))
+        esperados = [c for c in clientes if c.genero == 'F' and c.activo]
+        assert response['Content-Disposition'] == 'attachment; filename="clientes.csv"'
+        assert {int(f['cliente_id']) for f in filas} == {c.cliente_id for c in esperados}
+        assert all(f['activo'] == 'true' and f['genero_display'] == 'Femenino' for f in filas)
+        assert filas[0]['saldo'].endswith('.50')
+
+    def test_bloques_en_consultas_constantes(self, client, clientes, django_assert_num_queries, monkeypatch):
+        """Test: La exportación por bloques lee la tabla en una sola consulta"""
+        monkeypatch.setattr('clientes.exportacion.TAMANO_BLOQUE', 10)
+        response = client.get('/api/v1/clientes/export/')
+
+        with django_assert_num_queries(1):
+            bloques = list(response.streaming_content)
+        assert len(bloques) == 3
+        assert len(b''.join(bloques).splitlines()) == len(clientes)
+
+    def test_formato_invalido(self, client):
+        """Test: Un formato desconocido devuelve 400"""
+        response = client.get('/api/v1/clientes/export/', {'formato': 'xml'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,209 @@
+"""
+Tests para el motor de importación por bloques (importar_clientes)
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from io import StringIO
+
+import pandas as pd
+import pytest
+from django.core.management import call_command
+from clientes.estadisticas import obtener_snapshot, verificar_snapshot
+from clientes.importacion import convertir_bloque, convertir_saldos
+from clientes.models import Cliente, ClienteEliminado, ImportacionCheckpoint
+
+ENCABEZADO = 'Cliente_ID,Edad,Genero,Saldo,Activo,Nivel_de_Satisfaccion\n'
+
+
+def bloque(*lineas):
+    return pd.read_csv(StringIO(ENCABEZADO + '\n'.join(lineas)), dtype=str, keep_default_na=False)
+
+
+class TestConversiones:
+    """Tests para la conversión vectorizada de columnas"""
+
+    @pytest.mark.parametrize('texto', ['72699.44', '12.3', '7', '007.50', '1.005', '2.675', '1e3', ' 15.999 '])
+    def test_saldo_igual_a_la_importacion_original(self, texto):
+        """Test: El saldo coincide con Decimal(str(float(x))) redondeado a centavos"""
+        esperado = Decimal(str(float(texto))).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        assert Decimal(convertir_saldos(pd.Series([texto]))[0]) == esperado
+
+    def test_saldo_invalido(self):
+        """Test: Los saldos que no son números quedan como NA"""
+        assert convertir_saldos(pd.Series(['abc', '', 'nan', 'inf'])).isna().all()
+
+    def test_errores_con_los_mensajes_del_modelo(self):
+        """Test: Cada fila inválida informa su primer error con los mensajes de validación"""
+        convertidos, errores = convertir_bloque(bloque(
+            '1,30.0,Femenino,10.5,1.0,4.0',
+            '2,17,Masculino,10,1,3',
+            '3,30,Masculino,-4.5,0,3',
+            '4,30,Masculino,10,0,6',
+            'x,30,Masculino,10,0,3',
+            '6,30.5,F,10,0,3',
+        ))
+
+        assert convertidos.to_dict('records') == [{
+            'cliente_id': 1, 'edad': 30, 'genero': 'F', 'saldo': '10.50', 'activo': True, 'nivel_de_satisfaccion': 4,
+        }]
+        assert [(error.fila, error.cliente_id, error.mensaje) for error in errores] == [
+            (2, 2, 'El cliente debe ser mayor de 18 años'),
+            (3, 3, 'El saldo no puede ser negativo'),
+            (4, 4, 'El nivel de satisfacción debe estar entre 1 y 5'),
+            (5, None, 'Cliente_ID inválido'),
+            (6, 6, 'Edad inválida'),
+        ]
+
+    def test_valores_por_defecto(self):
+        """Test: Género desconocido se importa como M y Activo vacío como activo"""
+        convertidos, errores = convertir_bloque(bloque('1,30,,10,,3', '2,30,Otro,10,0,3'))
+        assert not errores
+        assert convertidos['genero'].tolist() == ['M', 'M']
+        assert convertidos['activo'].tolist() == [True, False]
+
+
+@pytest.mark.django_db
+class TestImportarClientes:
+    """Tests para el comando importar_clientes"""
+
+    @pytest.fixture
+    def csv(self, tmp_path):
+        ruta = tmp_path / 'clientes.csv'
+        ruta.write_text(ENCABEZADO + '\n'.join([
+            '1,24.0,Femenino,72699.44,1.0,4.0',
+            '2,52,Masculino,15084.72,0.0,2',
+            '2,53,Masculino,1.00,0.0,2',
+            '3,15,Femenino,100,1,3',
+            '4,40,Femenino,0,1,5',
+            '5,41,Masculino,99.99,1,1',
+        ]) + '\n')
+        return ruta
+
+    def test_importa_por_bloques(self, csv):
+        """Test: Inserta las filas válidas, omite repetidas y existentes y deja el snapshot exacto"""
+        Cliente.objects.create(cliente_id=5, edad=60, genero='F', saldo=Decimal('1.00'), nivel_de_satisfaccion=3)
+        salida, errores = StringIO(), StringIO()
+
+        call_command('importar_clientes', str(csv), '--tamano-bloque', '2', stdout=salida, stderr=errores)
+
+        assert 'Registros creados:  3' in salida.getvalue()
+        assert 'Registros omitidos: 2' in salida.getvalue()
+        assert 'Error en fila 4 (ID: 3): El cliente debe ser mayor de 18 años' in errores.getvalue()
+        assert list(Cliente.objects.order_by('pk').values_list('pk', 'edad', 'saldo')) == [
+            (1, 24, Decimal('72699.44')), (2, 52, Decimal('15084.72')), (4, 40, Decimal('0.00')),
+            (5, 60, Decimal('1.00')),
+        ]
+        assert verificar_snapshot(obtener_snapshot()) == {}
+
+    def test_reimportar_no_duplica(self, csv):
+        """Test: Importar dos veces el mismo archivo no crea filas nuevas"""
+        call_command('importar_clientes', str(csv), stdout=StringIO(), stderr=StringIO())
+        version = obtener_snapshot().version
+        salida = StringIO()
+
+        call_command('importar_clientes', str(csv), stdout=salida, stderr=StringIO())
+
+        assert 'Registros creados:  0' in salida.getvalue()
+        assert Cliente.objects.count() == 4
+        assert obtener_snapshot().version == version
+
+    def test_nuevos_ids_continuan_despues_de_los_importados(self, csv):
+        """Test: Los clientes creados después de importar reciben IDs nuevos"""
+        call_command('importar_clientes', str(csv), stdout=StringIO(), stderr=StringIO())
+        cliente = Cliente.objects.create(edad=30, genero='M', saldo=Decimal('5.00'), nivel_de_satisfaccion=3)
+        assert cliente.pk > 5
+
+
+@pytest.mark.django_db
+class TestImportarMerge:
+    """Tests para --modo=merge, --eliminar-ausentes y la reanudación"""
+
+    def escribir(self, ruta, *lineas):
+        ruta.write_text(ENCABEZADO + '\n'.join(lineas) + '\n')
+        return str(ruta)
+
+    @pytest.fixture
+    def inicial(self, tmp_path):
+        ruta = self.escribir(tmp_path / 'dia1.csv', '1,30,Femenino,100.00,1,3', '2,40,Masculino,200.5,0,4',
+                             '3,50,Femenino,300,1,5')
+        call_command('importar_clientes', ruta, stdout=StringIO(), stderr=StringIO())
+        return ruta
+
+    def test_merge_actualiza_solo_los_cambios(self, inicial, tmp_path):
+        """Test: Solo se actualizan las filas cuya huella cambió y se crean las nuevas"""
+        sin_cambios = Cliente.objects.get(pk=1).secuencia_cambio
+        ruta = self.escribir(tmp_path / 'dia2.csv', '1,30,Femenino,100,1.0,3', '2,40,Masculino,250.00,0,4',
+                             '3,50,Femenino,300,1,5', '4,60,Masculino,1,1,1')
+        salida = StringIO()
+
+        call_command('importar_clientes', ruta, '--modo', 'merge', stdout=salida, stderr=StringIO())
+
+        assert 'Registros creados:  1' in salida.getvalue()
+        assert 'Registros actualizados: 1' in salida.getvalue()
+        assert 'Registros omitidos: 2 (sin cambios)' in salida.getvalue()
+        assert Cliente.objects.get(pk=2).saldo == Decimal('250.00')
+        assert Cliente.objects.get(pk=1).secuencia_cambio == sin_cambios
+        assert verificar_snapshot(obtener_snapshot()) == {}
+
+    def test_merge_eliminar_ausentes(self, inicial, tmp_path):
+        """Test: Con --eliminar-ausentes se eliminan los clientes que no están en el archivo"""
+        ruta = self.escribir(tmp_path / 'dia2.csv', '1,30,Femenino,100,1,3', '3,15,Femenino,300,1,5')
+
+        call_command('importar_clientes', ruta, '--modo', 'merge', '--eliminar-ausentes',
+                     stdout=StringIO(), stderr=StringIO())
+
+        # La fila 3 tiene errores pero su ID sigue presente: no se elimina
+        assert sorted(Cliente.objects.values_list('pk', flat=True)) == [1, 3]
+        assert ClienteEliminado.objects.filter(cliente_id=2).exists()
+        assert verificar_snapshot(obtener_snapshot()) == {}
+
+    def test_snapshot_exacto_en_cada_bloque(self, inicial, tmp_path, monkeypatch):
+        """Test: Cada bloque que cambia la versión de datos deja el snapshot al día, sin esperar al final"""
+        from clientes.management.commands import importar_clientes
+
+        ruta = self.escribir(tmp_path / 'dia2.csv', '1,30,Femenino,100,1,3', '2,41,Femenino,9000,1,1',
+                             '3,50,Femenino,300.10,0,5', '4,60,Masculino,1,1,1', '5,19,Femenino,75000,1,2')
+        original, versiones = importar_clientes.importar_bloque, []
+
+        def verificar_bloque(*args):
+            resultado = original(*args)
+            snapshot = obtener_snapshot()
+            versiones.append(snapshot.version)
+            assert verificar_snapshot(snapshot) == {}
+            return resultado
+
+        monkeypatch.setattr(importar_clientes, 'importar_bloque', verificar_bloque)
+        call_command('importar_clientes', ruta, '--modo', 'merge', '--tamano-bloque', '2',
+                     stdout=StringIO(), stderr=StringIO())
+
+        assert len(versiones) == 3 and versiones == sorted(set(versiones))
+        assert obtener_snapshot().total == 5
+
+    def test_reanuda_desde_el_ultimo_bloque(self, tmp_path, monkeypatch):
+        """Test: Tras una falla, la siguiente ejecución continúa después del último bloque confirmado"""
+        from clientes.management.commands import importar_clientes
+
+        ruta = self.escribir(tmp_path / 'clientes.csv', *[f'{i},{20 + i},Femenino,{i}.00,1,3' for i in range(1, 7)])
+        original, llamadas = importar_clientes.importar_bloque, []
+
+        def falla_en_el_tercero(bloque, *args):
+            llamadas.append(bloque.index[0])
+            if len(llamadas) == 3:
+                raise RuntimeError('caída simulada')
+            return original(bloque, *args)
+
+        monkeypatch.setattr(importar_clientes, 'importar_bloque', falla_en_el_tercero)
+        call_command('importar_clientes', ruta, '--tamano-bloque', '2', stdout=StringIO(), stderr=StringIO())
+        assert Cliente.objects.count() == 4
+        checkpoint = ImportacionCheckpoint.objects.get()
+        assert (checkpoint.filas_confirmadas, checkpoint.completado) == (4, False)
+
+        llamadas.clear()
+        monkeypatch.setattr(importar_clientes, 'importar_bloque', original)
+        salida = StringIO()
+        call_command('importar_clientes', ruta, '--tamano-bloque', '2', stdout=salida, stderr=StringIO())
+
+        assert 'Reanudando la importación interrumpida desde la fila 5' in salida.getvalue()
+        assert 'Registros creados:  6' in salida.getvalue()
+        assert Cliente.objects.count() == 6
+        assert ImportacionCheckpoint.objects.get().completado
+        assert verificar_snapshot(obtener_snapshot()) == {}
@@ -0,0 +1,181 @@
+"""
+Tests de los planes de consulta de las rutas calientes de la API.
+
+Cada caso ejecuta un endpoint (o la función que lo respalda), captura las
+consultas SQL que hizo y pide su plan con ``EXPLAIN``. El test falla si
+alguna recorre secuencialmente una tabla grande, es decir, si un índice de
+``Cliente.Meta.indexes`` dejó de usarse o falta.
+
+El fixture es grande y sesgado (cada valor filtrado aparece en ~5% de las
+filas) y se analiza con ``ANALYZE``: con un filtro selectivo y estadísticas
+el planificador elige el índice si existe y el recorrido completo si no, en
+SQLite y en PostgreSQL. Los listados sin filtros quedan fuera: su COUNT(*)
+lee la tabla entera de todos modos. También los que solo filtran por
+genero, activo o nivel_de_satisfaccion: con datos reales cada valor cubre
+del 20% al 50% de las filas y esas columnas no tienen índice a propósito.
+"""
+import re
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from clientes.estadisticas import contar_alta_rentabilidad
+from clientes.models import Cliente, ClienteEliminado
+
+TOTAL_CLIENTES = 5000
+# Tablas que crecen con los datos; las pequeñas (snapshot, cubos) pueden recorrerse
+TABLAS_GRANDES = (Cliente._meta.db_table, ClienteEliminado._meta.db_table)
+
+URL = '/api/v1/clientes/'
+RUTAS = [
+    '?paginacion=cursor&ordering=-saldo',
+    '?paginacion=cursor&ordering=saldo',
+    '?paginacion=cursor&ordering=-edad',
+    '?paginacion=cursor&ordering=edad',
+    '?paginacion=cursor&ordering=-saldo&activo=true',
+    '?paginacion=cursor&ordering=-saldo&genero=F',
+    'estadisticas-generales/',
+]
+
+
+def plan(sql):
+    """Líneas del plan de ``sql`` según el motor de la conexión"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN {sql}')
+            return [fila[0] for fila in cursor.fetchall()]
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [fila[-1] for fila in cursor.fetchall()]
+
+
+def recorridos_secuenciales(sql, lineas):
+    """
+    Líneas del plan que recorren secuencialmente una de ``TABLAS_GRANDES``.
+
+    En PostgreSQL es ``Seq Scan``. En SQLite es ``SCAN`` sin índice, salvo
+    que la consulta tenga LIMIT y no ordene en una tabla temporal: entonces
+    recorre la tabla en orden de clave primaria y se detiene en el límite
+    (el ``Index Scan`` sobre la clave primaria de PostgreSQL).
+    """
+    if connection.vendor == 'postgresql':
+        return [linea for linea in lineas
+                if any(re.search(rf'Seq Scan on {tabla}\b', linea) for tabla in TABLAS_GRANDES)]
+
+    # Django usa alias (U0, T1...) para las tablas de las subconsultas
+    nombres = set(TABLAS_GRANDES)
+    for tabla in TABLAS_GRANDES:
+        nombres.update(re.findall(rf'"{tabla}" ([A-Z]\d+)\b', sql))
+    recorre_clave_primaria = ' LIMIT ' in sql and not any('TEMP B-TREE FOR ORDER BY' in linea for linea in lineas)
+    return [linea for linea in lineas
+            if (coincide := re.match(r'SCAN (\S+)$', linea.strip())) and coincide.group(1) in nombres
+            and not recorre_clave_primaria]
+
+
+def consultas_de(funcion):
+    """SQL de las consultas que ejecuta ``funcion()``"""
+    with CaptureQueriesContext(connection) as capturadas:
+        funcion()
+    return [consulta['sql'] for consulta in capturadas.captured_queries]
+
+
+def verificar_planes(consultas):
+    recorridos = {}
+    for sql in consultas:
+        if not sql.lstrip().upper().startswith('SELECT'):
+            continue
+        lineas = plan(sql)
+        if secuenciales := recorridos_secuenciales(sql, lineas):
+            recorridos[sql] = secuenciales
+    assert not recorridos, '\n\n'.join(f'{sql}\n  -> {lineas}' for sql, lineas in recorridos.items())
+
+
+@pytest.fixture
+def clientes_grandes():
+    """Clientes con valores raros (~5%) en cada columna filtrada, y estadísticas del planificador"""
+    Cliente.objects.bulk_create([
+        Cliente(
+            edad=18 + i % 80,
+            genero='F' if i % 20 == 0 else 'M',
+            activo=i % 20 != 1,
+            nivel_de_satisfaccion=1 if i % 20 in (0, 2) else 3 + i % 3,
+            saldo=Decimal(i * 37 % 100_000) + Decimal('0.25'),
+        )
+        for i in range(TOTAL_CLIENTES)
+    ], batch_size=1000)
+    ClienteEliminado.objects.bulk_create(
+        [ClienteEliminado(cliente_id=TOTAL_CLIENTES * 2 + i, secuencia_cambio=i) for i in range(TOTAL_CLIENTES)]
+    )
+    with connection.cursor() as cursor:
+        for tabla in TABLAS_GRANDES:
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(tabla)}')
+    return Cliente.objects.order_by('pk').values_list('pk', flat=True)
+
+
+@pytest.mark.django_db
+class TestIndicesCliente:
+    """Tests de que las rutas calientes usan índices en lugar de recorrer la tabla"""
+
+    @pytest.fixture
+    def api_client(self):
+        return APIClient()
+
+    def test_indices_declarados(self):
+        """Test: Los índices del modelo están creados en la base de datos y los de filtros ya no"""
+        with connection.cursor() as cursor:
+            existentes = connection.introspection.get_constraints(cursor, Cliente._meta.db_table)
+        for indice in Cliente._meta.indexes:
+            assert indice.name in existentes
+            assert existentes[indice.name]['index']
+        for nombre in ('cliente_filtros_idx', 'cliente_genero_nivel_idx', 'cliente_nivel_idx'):
+            assert nombre not in existentes
+
+    @pytest.mark.parametrize('ruta', RUTAS)
+    def test_listados_y_estadisticas(self, api_client, clientes_grandes, ruta):
+        """Test: Los filtros, ordenamientos y estadísticas de la API no recorren la tabla"""
+        def pedir():
+            respuesta = api_client.get(URL + ruta)
+            assert respuesta.status_code == 200
+            # La página siguiente agrega la condición del cursor
+            if siguiente := respuesta.data.get('next'):
+                assert api_client.get(siguiente).status_code == 200
+
+        verificar_planes(consultas_de(pedir))
+
+    def test_detalle(self, api_client, clientes_grandes):
+        """Test: El detalle y las estadísticas de un cliente buscan por clave primaria"""
+        pk = clientes_grandes[TOTAL_CLIENTES // 2]
+
+        def pedir():
+            assert api_client.get(f'{URL}{pk}/').status_code == 200
+            assert api_client.get(f'{URL}{pk}/estadisticas/').status_code == 200
+
+        verificar_planes(consultas_de(pedir))
+
+    def test_cambios(self, api_client, clientes_grandes):
+        """Test: La sincronización incremental usa el índice de la secuencia de cambio"""
+        desde = Cliente.objects.order_by('-secuencia_cambio').values_list('secuencia_cambio', flat=True)[100]
+        verificar_planes(consultas_de(
+            lambda: api_client.get(f'{URL}cambios/', {'desde': desde, 'limite': 50})
+        ))
+
+    def test_alta_rentabilidad_exacta(self, clientes_grandes):
+        """Test: El umbral del 10% y el conteo saldo >= umbral usan el índice de saldo"""
+        consultas = consultas_de(lambda: contar_alta_rentabilidad(Cliente.objects.all(), TOTAL_CLIENTES))
+        assert len(consultas) == 1
+        verificar_planes(consultas)
+
+    def test_activos_por_saldo_usa_indice_parcial(self, clientes_grandes):
+        """Test: El ranking de activos por saldo usa el índice parcial"""
+        queryset = Cliente.objects.filter(activo=True).order_by('-saldo', '-cliente_id').values('pk')[:5]
+        assert 'cliente_activos_saldo_idx' in '\n'.join(plan(str(queryset.query)))
+
+    def test_detecta_recorrido_secuencial(self, clientes_grandes):
+        """Test: Una consulta sin índice aplicable se informa como recorrido secuencial"""
+        # Ningún índice tiene edad y nivel a la vez
+        sql = str(Cliente.objects.filter(edad__lt=F('nivel_de_satisfaccion')).values('pk').query)
+        assert recorridos_secuenciales(sql, plan(sql))
+        with pytest.raises(AssertionError):
+            verificar_planes([sql])
@@ -0,0 +1,78 @@
+"""
+Tests para la lectura rápida de list/retrieve
+"""
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from clientes.lectura import CAMPOS_CONSULTA, representar, representar_fila
+from clientes.models import Cliente
+from clientes.serializers import ClienteSerializer
+from clientes.views import ClienteViewSet
+
+
+@pytest.mark.django_db
+class TestLecturaRapida:
+    """La representación desde tuplas es idéntica a la de ClienteSerializer"""
+
+    @pytest.fixture
+    def clientes(self):
+        usuario = User.objects.create_user(username='dueno', password='x')
+        saldos = ['0.00', '0.10', '15.5', '999999999.99', '1E+3', '42']
+        return [
+            Cliente.objects.create(edad=18 + i * 9, genero='MF'[i % 2], saldo=Decimal(saldo),
+                                   activo=i % 2 == 0, nivel_de_satisfaccion=1 + i % 5,
+                                   usuario=usuario if i % 3 == 0 else None)
+            for i, saldo in enumerate(saldos)
+        ]
+
+    def respuestas(self, client, monkeypatch, url, params=None):
+        rapida = client.get(url, params)
+        monkeypatch.setattr(ClienteViewSet, 'lectura_rapida', False)
+        original = client.get(url, params)
+        monkeypatch.setattr(ClienteViewSet, 'lectura_rapida', True)
+        return rapida, original
+
+    @pytest.mark.parametrize('params', [
+        {},
+        {'page_size': 4, 'page': 2},
+        {'genero': 'F'},
+        {'paginacion': 'cursor', 'ordering': '-saldo', 'page_size': 3},
+    ])
+    def test_listado_identico_byte_a_byte(self, client, clientes, monkeypatch, params):
+        """Test: El listado rápido devuelve los mismos bytes que el serializer"""
+        rapida, original = self.respuestas(client, monkeypatch, '/api/v1/clientes/', params)
+
+        assert rapida.status_code == original.status_code == 200
+        assert rapida.content == original.content
+        assert rapida['ETag'] == original['ETag']
+
+    def test_detalle_identico_y_404(self, client, clientes, monkeypatch):
+        """Test: El detalle rápido coincide y un ID inexistente sigue dando 404"""
+        for cliente in clientes:
+            rapida, original = self.respuestas(client, monkeypatch, f'/api/v1/clientes/{cliente.pk}/')
+            assert rapida.content == original.content
+
+        rapida, original = self.respuestas(client, monkeypatch, '/api/v1/clientes/999999/')
+        assert rapida.status_code == original.status_code == 404
+
+    def test_saldo_sin_escala_del_campo(self):
+        """Test: Un saldo con otra escala se cuantiza igual que DecimalField"""
+        cliente = Cliente(cliente_id=7, edad=30, genero='M', saldo=Decimal('12.5'), activo=True,
+                          nivel_de_satisfaccion=4)
+        fila = tuple(getattr(cliente, campo) for campo in CAMPOS_CONSULTA)
+
+        assert representar_fila(fila) == ClienteSerializer(cliente).data
+        assert representar([fila])[0]['saldo'] == '12.50'
+
+    def test_comando_benchmark(self):
+        """Test: La suite de serialización verifica la equivalencia y reporta filas/s"""
+        salida = StringIO()
+        call_command('benchmark', '--suite', 'serializacion', '--filas', '50', '--repeticiones', '1',
+                     stdout=salida)
+
+        assert 'filas/s' in salida.getvalue()
+        assert 'idéntica' in salida.getvalue()
+        assert Cliente.objects.count() == 0
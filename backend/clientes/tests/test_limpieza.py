@@ -0,0 +1,129 @@
+"""
+Tests para la limpieza de CSV por bloques (limpiar_csv)
+"""
+from collections import Counter
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from clientes.limpieza import ConjuntoHuellas, mediana, moda
+
+ENCABEZADO = 'Cliente_ID,Edad,Genero,Saldo,Activo,Nivel_de_Satisfaccion\n'
+
+FILAS = [
+    '1,24.0,Femenino,72699.44,1.0,4.0',
+    '2,52.0,Masculino,15084.72,0.0,2.0',
+    '2,52,Masculino,15084.72,0,2',
+    '3,,Femenino,100.0,1.0,',
+    '4,40.0,,0.0,1.0,5.0',
+    '5,41.0,Masculino,,1.0,1.0',
+    '6,45.0,Femenino,99.99,,3.0',
+    '7,15.0,Femenino,10.0,1.0,3.0',
+    '8,33.0,Masculino,-5.0,0.0,3.0',
+    '9,33.0,Femenino,5.0,0.0,7.0',
+    '10,abc,Femenino,5.0,0.0,3.0',
+    '11,61.0,Masculino,12.5,1.0,5.0',
+    '1,24.0,Femenino,72699.44,1.0,4.0',
+]
+
+
+def limpieza_en_memoria(ruta):
+    """La limpieza original (analisis_datos.py), sobre las filas que pasan la validación"""
+    df = pd.read_csv(ruta)
+    df['Edad'] = pd.to_numeric(df['Edad'], errors='coerce')
+    df = df.drop_duplicates().dropna(subset=['Activo']).dropna(subset=['Saldo'])
+    df = df[~df['Cliente_ID'].isin([7, 8, 9, 10])].copy()
+    df['Edad'] = df['Edad'].fillna(df['Edad'].median())
+    df['Genero'] = df['Genero'].fillna(df['Genero'].mode()[0])
+    df['Nivel_de_Satisfaccion'] = df['Nivel_de_Satisfaccion'].fillna(df['Nivel_de_Satisfaccion'].median())
+    df['Edad'] = df['Edad'].astype(int)
+    df['Nivel_de_Satisfaccion'] = df['Nivel_de_Satisfaccion'].astype(int)
+    return df
+
+
+class TestAuxiliares:
+    """Tests para el conjunto de huellas y la mediana/moda por conteos"""
+
+    def test_conjunto_huellas_entre_bloques(self):
+        """Test: Solo se marca la primera aparición de cada huella, dentro y entre bloques"""
+        conjunto = ConjuntoHuellas()
+        generador = np.random.default_rng(1)
+        vistas = set()
+        for _ in range(20):
+            huellas = generador.integers(0, 500, size=100).astype(np.uint64)
+            esperado = []
+            for huella in huellas.tolist():
+                esperado.append(huella not in vistas)
+                vistas.add(huella)
+            assert conjunto.agregar(huellas).tolist() == esperado
+        assert len(conjunto) == len(vistas)
+        assert len(conjunto.arreglos) <= 10
+
+    @pytest.mark.parametrize('valores', [[3], [1, 2], [5, 1, 4, 4, 2], [18.0, 90.0, 30.0, 30.0], [1, 1, 2, 2]])
+    def test_mediana_y_moda_como_pandas(self, valores):
+        """Test: La mediana y la moda por conteos coinciden con las de pandas"""
+        serie = pd.Series(valores)
+        assert mediana(Counter(valores)) == serie.median()
+        assert moda(Counter(valores)) == serie.mode()[0]
+
+    def test_sin_valores(self):
+        """Test: Sin valores no hay mediana ni moda"""
+        assert mediana(Counter()) is None
+        assert moda(Counter()) is None
+
+
+class TestLimpiarCsv:
+    """Tests para el comando limpiar_csv"""
+
+    @pytest.fixture
+    def entrada(self, tmp_path):
+        ruta = tmp_path / 'clientes_banco.csv'
+        ruta.write_text(ENCABEZADO + '\n'.join(FILAS) + '\n')
+        return ruta
+
+    @pytest.mark.parametrize('tamano_bloque', [1, 4, 1000])
+    def test_igual_a_la_limpieza_en_memoria(self, entrada, tmp_path, tamano_bloque):
+        """Test: El resultado no depende del tamaño de bloque y coincide con la limpieza original"""
+        salida = tmp_path / 'limpios.csv'
+        call_command('limpiar_csv', str(entrada), str(salida), '--tamano-bloque', str(tamano_bloque),
+                     stdout=StringIO())
+
+        esperado = StringIO()
+        limpieza_en_memoria(entrada).to_csv(esperado, index=False)
+        assert salida.read_text() == esperado.getvalue()
+
+    def test_rechazados_con_motivo(self, entrada, tmp_path):
+        """Test: Las filas rechazadas se escriben sin modificar, con su fila y el mensaje de validación"""
+        salida = StringIO()
+        call_command('limpiar_csv', str(entrada), str(tmp_path / 'limpios.csv'), '--tamano-bloque', '3',
+                     stdout=salida)
+
+        rechazados = pd.read_csv(tmp_path / 'limpios_rechazados.csv', dtype=str, keep_default_na=False)
+        assert rechazados[['Cliente_ID', 'Fila', 'Motivo']].values.tolist() == [
+            ['5', '6', 'Saldo vacío'],
+            ['6', '7', 'Activo vacío'],
+            ['7', '8', 'El cliente debe ser mayor de 18 años'],
+            ['8', '9', 'El saldo no puede ser negativo'],
+            ['9', '10', 'El nivel de satisfacción debe estar entre 1 y 5'],
+            ['10', '11', 'Edad inválida'],
+        ]
+        assert rechazados['Edad'].tolist()[-1] == 'abc'
+        assert 'Duplicadas:        2' in salida.getvalue()
+        assert 'Rechazadas:        6' in salida.getvalue()
+        assert 'filas/s' in salida.getvalue()
+
+    def test_sin_valores_para_imputar(self, tmp_path):
+        """Test: Si una columna solo tiene vacíos el comando falla en lugar de inventar un valor"""
+        entrada = tmp_path / 'clientes.csv'
+        entrada.write_text(ENCABEZADO + '1,,Femenino,10,1,3\n')
+
+        with pytest.raises(CommandError, match='Edad'):
+            call_command('limpiar_csv', str(entrada), str(tmp_path / 'limpios.csv'), stdout=StringIO())
+
+    def test_archivo_inexistente(self, tmp_path):
+        """Test: Un archivo que no existe es un error del comando"""
+        with pytest.raises(CommandError, match='no fue encontrado'):
+            call_command('limpiar_csv', str(tmp_path / 'no_existe.csv'), stdout=StringIO())
@@ -0,0 +1,322 @@
+"""
+Tests para la escritura masiva (/api/v1/clientes/bulk/)
+"""
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models.signals import post_delete
+from rest_framework import status
+from rest_framework.test import APIClient
+from clientes.estadisticas import obtener_snapshot, verificar_snapshot
+from clientes.models import Cliente, ClienteEliminado
+
+
+def fila(i, **campos):
+    return {'edad': 20 + i, 'genero': 'MF'[i % 2], 'saldo': f'{i * 10}.50',
+            'nivel_de_satisfaccion': 1 + i % 5, **campos}
+
+
+@pytest.mark.django_db
+class TestBulk:
+    """Tests para create/upsert/delete masivos"""
+
+    url = '/api/v1/clientes/bulk/'
+
+    @pytest.fixture
+    def admin(self):
+        return User.objects.create_user(username='admin', password='adminpass123', is_staff=True)
+
+    @pytest.fixture
+    def api_client(self, admin):
+        client = APIClient()
+        client.force_authenticate(user=admin)
+        return client
+
+    @pytest.fixture(autouse=True)
+    def snapshot(self):
+        return obtener_snapshot()
+
+    def test_create(self, api_client, admin):
+        """Test: Crea todas las filas y mantiene el snapshot consistente"""
+        response = api_client.post(self.url, {'operacion': 'create', 'clientes': [fila(i) for i in range(5)]},
+                                   format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['creados'] == 5
+        ids = [resultado['cliente_id'] for resultado in response.data['resultados']]
+        assert sorted(ids) == sorted(Cliente.objects.values_list('pk', flat=True))
+        assert set(Cliente.objects.values_list('usuario_id', flat=True)) == {admin.pk}
+        assert Cliente.objects.get(pk=ids[3]).saldo == Decimal('30.50')
+        assert verificar_snapshot(obtener_snapshot()) == {}
+
+    def test_errores_por_fila(self, api_client):
+        """Test: Las filas inválidas se informan con los mensajes del serializer y el resto se aplica"""
+        filas = [fila(0), fila(1, edad=15), fila(2, saldo='-1'), {'genero': 'X'}]
+        response = api_client.post(self.url, {'operacion': 'create', 'clientes': filas}, format='json')
+
+        assert response.status_code == status.HTTP_207_MULTI_STATUS
+        assert (response.data['creados'], response.data['errores']) == (1, 3)
+        resultados = response.data['resultados']
+        assert resultados[1]['errores'] == {'edad': ['El cliente debe ser mayor de 18 años']}
+        assert resultados[2]['errores'] == {'saldo': ['El saldo no puede ser negativo']}
+        assert set(resultados[3]['errores']) == {'edad', 'genero', 'saldo', 'nivel_de_satisfaccion'}
+        assert Cliente.objects.count() == 1
+
+    def test_atomico(self, api_client, snapshot):
+        """Test: Con atomico=true una fila inválida impide aplicar las demás"""
+        response = api_client.post(self.url, {
+            'operacion': 'create', 'atomico': True, 'clientes': [fila(0), fila(1, nivel_de_satisfaccion=9)],
+        }, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert [resultado['estado'] for resultado in response.data['resultados']] == ['omitido', 'error']
+        assert not Cliente.objects.exists()
+        assert obtener_snapshot().version == snapshot.version
+
+    @pytest.mark.parametrize('atomico', ['false', '0', 0, False])
+    def test_atomico_falso_como_texto(self, api_client, atomico):
+        """Test: 'false' y '0' desactivan atomico como en dry_run y todos"""
+        response = api_client.post(self.url, {
+            'operacion': 'create', 'atomico': atomico, 'clientes': [fila(0), fila(1, nivel_de_satisfaccion=9)],
+        }, format='json')
+
+        assert response.status_code == status.HTTP_207_MULTI_STATUS
+        assert Cliente.objects.count() == 1
+
+    @pytest.mark.parametrize('atomico', ['quizas', None, [True], 2])
+    def test_atomico_invalido(self, api_client, atomico):
+        """Test: Un valor de atomico que no es booleano responde 400 sin escribir"""
+        response = api_client.post(self.url, {'operacion': 'create', 'atomico': atomico, 'clientes': [fila(0)]},
+                                   format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'atomico' in response.data
+        assert not Cliente.objects.exists()
+
+    def test_atomico_con_id_inexistente(self, api_client):
+        """Test: Un ID inexistente también impide aplicar la solicitud atómica"""
+        existente = Cliente.objects.create(edad=40, genero='M', saldo=Decimal('100.00'), nivel_de_satisfaccion=3)
+        response = api_client.post(self.url, {'operacion': 'delete', 'atomico': True,
+                                              'clientes': [existente.pk, 999999]}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert Cliente.objects.filter(pk=existente.pk).exists()
+
+    def test_upsert(self, api_client):
+        """Test: Actualiza los campos enviados de los existentes y crea los que no traen ID"""
+        existente = Cliente.objects.create(edad=40, genero='M', saldo=Decimal('100.00'), nivel_de_satisfaccion=3)
+        response = api_client.post(self.url, {'operacion': 'upsert', 'clientes': [
+            {'cliente_id': existente.pk, 'saldo': '250.00', 'activo': False},
+            fila(1),
+            {'cliente_id': 999999, 'edad': 30},
+            {'cliente_id': existente.pk, 'edad': 30},
+        ]}, format='json')
+
+        assert response.status_code == status.HTTP_207_MULTI_STATUS
+        assert [resultado['estado'] for resultado in response.data['resultados']] == [
+            'actualizado', 'creado', 'error', 'error',
+        ]
+        existente.refresh_from_db()
+        assert (existente.edad, existente.saldo, existente.activo) == (40, Decimal('250.00'), False)
+        assert Cliente.objects.count() == 2
+        assert verificar_snapshot(obtener_snapshot()) == {}
+
+    def test_delete(self, api_client, snapshot):
+        """Test: Elimina por lotes, deja marcas de eliminación y actualiza la versión una vez"""
+        clientes = Cliente.objects.bulk_create([
+            Cliente(edad=20 + i, genero='F', saldo=Decimal('10.00'), nivel_de_satisfaccion=2) for i in range(4)
+        ])
+        ids = [cliente.pk for cliente in clientes]
+        version = obtener_snapshot().version
+
+        response = api_client.post(self.url, {'operacion': 'delete', 'clientes': ids[:3] + [999999]},
+                                   format='json')
+
+        assert response.status_code == status.HTTP_207_MULTI_STATUS
+        assert response.data['eliminados'] == 3
+        assert list(Cliente.objects.values_list('pk', flat=True)) == ids[3:]
+        marcas = ClienteEliminado.objects.filter(cliente_id__in=ids[:3])
+        assert {marca.secuencia_cambio for marca in marcas} == {version + 1}
+        assert obtener_snapshot().version == version + 1
+        assert verificar_snapshot(obtener_snapshot()) == {}
+
+    def test_cuerpo_invalido(self, api_client):
+        """Test: Operación desconocida o lista vacía devuelven 400"""
+        assert api_client.post(self.url, {'operacion': 'merge', 'clientes': [fila(0)]},
+                               format='json').status_code == status.HTTP_400_BAD_REQUEST
+        assert api_client.post(self.url, {'operacion': 'create', 'clientes': []},
+                               format='json').status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_requiere_admin(self):
+        """Test: Sin autenticación de administrador no se permite escribir"""
+        response = APIClient().post(self.url, {'operacion': 'create', 'clientes': [fila(0)]}, format='json')
+        assert response.status_code in (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN)
+
+
+@pytest.mark.django_db
+class TestAccionesPorFiltro:
+    """Tests para actualizar-masivo y eliminar-masivo"""
+
+    @pytest.fixture
+    def api_client(self):
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='admin', password='x', is_staff=True))
+        return client
+
+    @pytest.fixture(autouse=True)
+    def clientes(self):
+        obtener_snapshot()
+        return Cliente.objects.bulk_create([
+            Cliente(edad=20 + i, genero='MF'[i % 2], saldo=Decimal('10.00'), nivel_de_satisfaccion=1 + i % 3)
+            for i in range(9)
+        ])
+
+    def test_actualizar_por_filtro(self, api_client):
+        """Test: Actualiza solo los clientes filtrados y mantiene el snapshot consistente"""
+        response = api_client.post('/api/v1/clientes/actualizar-masivo/?nivel_de_satisfaccion=1',
+                                   {'cambios': {'activo': False, 'saldo': '55.50'}}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {'dry_run': False, 'actualizados': 3}
+        assert set(Cliente.objects.filter(activo=False).values_list('nivel_de_satisfaccion', flat=True)) == {1}
+        assert Cliente.objects.filter(saldo=Decimal('55.50')).count() == 3
+        assert verificar_snapshot(obtener_snapshot()) == {}
+
+    def test_actualizar_valida_rangos(self, api_client):
+        """Test: Valores fuera de rango o campos desconocidos devuelven 400 sin modificar nada"""
+        version = obtener_snapshot().version
+        response = api_client.post('/api/v1/clientes/actualizar-masivo/?genero=M',
+                                   {'cambios': {'edad': 150, 'cliente_id': 1}}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['edad'] == ['La edad no puede ser mayor a 120 años']
+        assert 'cliente_id' in response.data
+        assert obtener_snapshot().version == version
+
+    def test_dry_run(self, api_client):
+        """Test: dry_run solo cuenta las coincidencias"""
+        version = obtener_snapshot().version
+        response = api_client.post('/api/v1/clientes/eliminar-masivo/?genero=F&dry_run=true')
+
+        assert response.data == {'dry_run': True, 'coincidentes': 4, 'eliminados': 0}
+        assert Cliente.objects.count() == 9
+        assert obtener_snapshot().version == version
+
+    def test_eliminar_por_filtro(self, api_client):
+        """Test: Elimina los clientes filtrados y deja sus marcas de eliminación"""
+        response = api_client.post('/api/v1/clientes/eliminar-masivo/?genero=F')
+
+        assert response.data == {'dry_run': False, 'eliminados': 4}
+        assert set(Cliente.objects.values_list('genero', flat=True)) == {'M'}
+        assert ClienteEliminado.objects.count() == 4
+        assert verificar_snapshot(obtener_snapshot()) == {}
+
+    def test_sin_filtros_requiere_todos(self, api_client):
+        """Test: Sin filtros solo se afecta a toda la tabla con todos=true"""
+        assert api_client.post('/api/v1/clientes/eliminar-masivo/').status_code == status.HTTP_400_BAD_REQUEST
+        response = api_client.post('/api/v1/clientes/eliminar-masivo/?todos=true')
+        assert response.data['eliminados'] == 9
+
+    @pytest.mark.parametrize('filtros', ['genero=', 'activo=', 'nivel_de_satisfaccion=', 'genero=&activo='])
+    def test_filtros_vacios_no_cuentan(self, api_client, filtros):
+        """Test: Un filtro con valor vacío no reemplaza a todos=true en ninguna de las dos acciones"""
+        eliminar = api_client.post(f'/api/v1/clientes/eliminar-masivo/?{filtros}')
+        actualizar = api_client.post(f'/api/v1/clientes/actualizar-masivo/?{filtros}',
+                                     {'cambios': {'activo': False}}, format='json')
+
+        assert eliminar.status_code == status.HTTP_400_BAD_REQUEST
+        assert actualizar.status_code == status.HTTP_400_BAD_REQUEST
+        assert Cliente.objects.count() == 9
+        assert not Cliente.objects.filter(activo=False).exists()
+
+    def test_filtro_vacio_con_otro_filtro(self, api_client):
+        """Test: Un filtro vacío junto a uno con valor aplica solo el que tiene valor"""
+        response = api_client.post('/api/v1/clientes/eliminar-masivo/?genero=&nivel_de_satisfaccion=1')
+        assert response.data == {'dry_run': False, 'eliminados': 3}
+
+    def test_filtro_falso_cuenta(self, api_client):
+        """Test: activo=false es un filtro con valor"""
+        response = api_client.post('/api/v1/clientes/eliminar-masivo/?activo=false&dry_run=true')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['coincidentes'] == 0
+
+    def test_filtro_invalido(self, api_client):
+        """Test: Un valor inválido devuelve 400 sin modificar nada"""
+        response = api_client.post('/api/v1/clientes/eliminar-masivo/?genero=X')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert Cliente.objects.count() == 9
+
+    def test_solo_admin(self):
+        """Test: Un usuario sin is_staff no puede usar las acciones por filtro"""
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='usuario', password='x'))
+        response = client.post('/api/v1/clientes/eliminar-masivo/?genero=F')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert Cliente.objects.count() == 9
+
+
+@pytest.mark.django_db
+class TestLimpiarClientes:
+    """Tests para limpiar_clientes (truncado y eliminación por lotes)"""
+
+    @pytest.fixture(autouse=True)
+    def clientes(self):
+        obtener_snapshot()
+        return [Cliente.objects.create(**fila(i)) for i in range(1, 4)]
+
+    def test_trunca_y_reinicia_ids(self, clientes):
+        """Test: Sin handlers externos trunca, registra las eliminaciones y reinicia los IDs"""
+        # Un ID ya eliminado antes y recreado recibe la marca nueva
+        ClienteEliminado.objects.create(cliente_id=clientes[0].pk, secuencia_cambio=1)
+        version = obtener_snapshot().version
+        salida = StringIO()
+
+        call_command('limpiar_clientes', '--confirmar', stdout=salida)
+
+        assert 'Tabla truncada' in salida.getvalue()
+        assert '3 clientes eliminados' in salida.getvalue()
+        assert not Cliente.objects.exists()
+        marcas = ClienteEliminado.objects.filter(cliente_id__in=[cliente.pk for cliente in clientes])
+        assert set(marcas.values_list('secuencia_cambio', flat=True)) == {version + 1}
+        assert obtener_snapshot().version == version + 1
+        assert verificar_snapshot(obtener_snapshot()) == {}
+        assert Cliente.objects.create(**fila(1)).pk == 1
+
+    def test_con_handlers_elimina_por_lotes(self, clientes):
+        """Test: Si otro handler depende de las filas, elimina por lotes y lo notifica por instancia"""
+        notificados = []
+
+        def registrar(sender, instance, **kwargs):
+            notificados.append(instance.pk)
+
+        post_delete.connect(registrar, sender=Cliente)
+        try:
+            salida = StringIO()
+            call_command('limpiar_clientes', '--confirmar', '--tamano-lote', '2', stdout=salida)
+        finally:
+            post_delete.disconnect(registrar, sender=Cliente)
+
+        assert 'Eliminados: 2/3' in salida.getvalue()
+        assert 'Eliminados: 3/3' in salida.getvalue()
+        assert sorted(notificados) == [cliente.pk for cliente in clientes]
+        assert not Cliente.objects.exists()
+        assert verificar_snapshot(obtener_snapshot()) == {}
+
+    def test_por_lotes_no_reinicia_ids(self, clientes):
+        """Test: --por-lotes usa la eliminación por lotes y conserva la secuencia de IDs"""
+        salida = StringIO()
+
+        call_command('limpiar_clientes', '--confirmar', '--por-lotes', stdout=salida)
+
+        assert 'Eliminando por lotes' in salida.getvalue()
+        assert ClienteEliminado.objects.count() == 3
+        assert verificar_snapshot(obtener_snapshot()) == {}
+        assert Cliente.objects.create(**fila(1)).pk > clientes[-1].pk
+
+    def test_truncar_queryset_filtrado(self, clientes):
+        """Test: truncar() solo aplica a la tabla completa"""
+        assert Cliente.objects.filter(pk=clientes[0].pk).truncar() is None
+        assert Cliente.objects.count() == 3
@@ -0,0 +1,63 @@
+"""
+Tests de las migraciones de datos de clientes
+"""
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+ANTES = [('clientes', '0008_secuencia_cambio_clienteeliminado')]
+RESTRICCIONES = [('clientes', '0009_restricciones_cliente')]
+
+
+def migrar(destino):
+    executor = MigrationExecutor(connection)
+    executor.loader.build_graph()
+    executor.migrate(destino)
+    return executor.loader.project_state(destino).apps
+
+
+@pytest.mark.django_db(transaction=True)
+class TestRestriccionesConDatosExistentes:
+    """Tests de la migración 0009 sobre una tabla con filas fuera de las reglas"""
+
+    @pytest.fixture
+    def apps_anteriores(self):
+        apps = migrar(ANTES)
+        yield apps
+        migrar(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_aparta_las_filas_invalidas(self, apps_anteriores, capsys):
+        """Test: Los clientes fuera de rango pasan a cuarentena y la migración termina"""
+        Cliente = apps_anteriores.get_model('clientes', 'Cliente')
+        apps_anteriores.get_model('clientes', 'EstadisticasSnapshot').objects.create(pk=1, total=5, version=7)
+        valido = dict(genero='F', saldo=Decimal('10.00'), activo=True, nivel_de_satisfaccion=3, edad=30)
+        for cliente_id, cambios in [(1, {}), (2, {'edad': 13}), (3, {'saldo': Decimal('-5.00')}),
+                                    (4, {'nivel_de_satisfaccion': 0}), (5, {'edad': 121, 'nivel_de_satisfaccion': 6})]:
+            Cliente.objects.create(cliente_id=cliente_id, **{**valido, **cambios})
+
+        apps = migrar(RESTRICCIONES)
+
+        assert list(apps.get_model('clientes', 'Cliente').objects.values_list('pk', flat=True)) == [1]
+        apartados = {c.cliente_id: c for c in apps.get_model('clientes', 'ClienteCuarentena').objects.all()}
+        assert sorted(apartados) == [2, 3, 4, 5]
+        assert apartados[2].datos['edad'] == 13
+        assert apartados[3].datos['saldo'] == '-5.00'
+        assert len(apartados[5].motivos) == 2
+        eliminados = apps.get_model('clientes', 'ClienteEliminado').objects.all()
+        assert {e.cliente_id for e in eliminados} == {2, 3, 4, 5}
+        assert {e.secuencia_cambio for e in eliminados} == {8}
+        # El snapshot contaba las filas apartadas: se reconstruye en la siguiente lectura
+        assert not apps.get_model('clientes', 'EstadisticasSnapshot').objects.exists()
+        assert 'ClienteCuarentena: 2, 3, 4, 5' in capsys.readouterr().out
+
+    def test_revertir_restaura_los_apartados(self, apps_anteriores):
+        """Test: Revertir 0009 devuelve los clientes apartados a la tabla"""
+        Cliente = apps_anteriores.get_model('clientes', 'Cliente')
+        Cliente.objects.create(cliente_id=9, genero='M', saldo=Decimal('1.00'), nivel_de_satisfaccion=3, edad=15)
+        migrar(RESTRICCIONES)
+
+        apps = migrar(ANTES)
+        assert apps.get_model('clientes', 'Cliente').objects.get(pk=9).edad == 15
+        assert not apps.get_model('clientes', 'ClienteEliminado').objects.exists()
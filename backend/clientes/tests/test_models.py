@@ -4,6 +4,8 @@ Tests para el modelo Cliente
 import pytest
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from clientes.models import Cliente
 
 User = get_user_model()
@@ -136,3 +138,101 @@ class TestClienteModel:
         
         assert cliente_m.get_genero_display() == 'Masculino'
         assert cliente_f.get_genero_display() == 'Femenino'
+    
+    def test_restricciones_check_en_base_de_datos(self):
+        """Test: La base de datos rechaza valores fuera de rango aunque se omita la validación"""
+        from django.db import IntegrityError, transaction
+        from django.db.models import F, Value
+        from clientes.campos import CentavosField
+        
+        cliente = Cliente.objects.create(edad=30, genero='M', saldo=100, nivel_de_satisfaccion=3)
+        for campo, valor in (('edad', F('edad') + 200), ('saldo', F('saldo') - Value(500, output_field=CentavosField())),
+                             ('nivel_de_satisfaccion', F('nivel_de_satisfaccion') + 5)):
+            with pytest.raises(IntegrityError), transaction.atomic():
+                Cliente.objects.filter(pk=cliente.pk).update(**{campo: valor})
+    
+    def test_escrituras_masivas_validan_con_los_mismos_mensajes(self):
+        """Test: bulk_create y update rechazan los mismos valores que save()"""
+        from decimal import Decimal
+        
+        validos = Cliente(edad=30, genero='F', saldo=Decimal('10.00'), nivel_de_satisfaccion=2)
+        invalido = Cliente(edad=30, genero='F', saldo=Decimal('-1.00'), nivel_de_satisfaccion=2)
+        with pytest.raises(ValidationError) as exc_info:
+            Cliente.objects.bulk_create([validos, invalido])
+        assert exc_info.value.message_dict == {'saldo': ['El saldo no puede ser negativo']}
+        assert exc_info.value.error_dict['saldo'][0].params == {'posicion': 1}
+        
+        with pytest.raises(ValidationError) as exc_info:
+            Cliente.objects.update(edad=121)
+        assert exc_info.value.message_dict == {'edad': ['La edad no puede ser mayor a 120 años']}
+        assert not Cliente.objects.exists()
+    
+    def test_save_no_consulta_las_restricciones(self):
+        """Test: save() no evalúa las restricciones CHECK con consultas (las aplica la base de datos)"""
+        cliente = Cliente.objects.create(edad=30, genero='M', saldo=100, nivel_de_satisfaccion=3)
+        cliente.edad = 31
+        with CaptureQueriesContext(connection) as consultas:
+            cliente.save()
+        assert not any('_check' in consulta['sql'] for consulta in consultas.captured_queries)
+
+
+@pytest.mark.django_db
+class TestSaldoEnCentavos:
+    """Tests para el almacenamiento compacto de saldo (CentavosField)"""
+
+    @pytest.fixture
+    def clientes(self):
+        return [
+            Cliente.objects.create(edad=30, genero='M', saldo=saldo, nivel_de_satisfaccion=3)
+            for saldo in ('10.50', '0.01', '99.99')
+        ]
+
+    def test_columna_entera_y_valor_decimal(self, clientes):
+        """Test: La columna guarda centavos y el modelo devuelve el mismo Decimal con dos decimales"""
+        from decimal import Decimal
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT saldo FROM {Cliente._meta.db_table} WHERE cliente_id = %s', [clientes[0].pk])
+            assert cursor.fetchone()[0] == 1050
+        assert Cliente.objects.get(pk=clientes[0].pk).saldo == Decimal('10.50')
+        assert str(Cliente.objects.get(pk=clientes[1].pk).saldo) == '0.01'
+
+    def test_busquedas_y_agregados_en_unidades(self, clientes):
+        """Test: Filtros, Sum/Max y PromedioCentavos trabajan en unidades, sin perder centavos"""
+        from decimal import Decimal
+        from django.db.models import Max, Sum
+        from clientes.campos import PromedioCentavos
+
+        assert Cliente.objects.filter(saldo__gte=Decimal('10.5')).count() == 2
+        assert Cliente.objects.filter(saldo__lt=1).get().pk == clientes[1].pk
+        agregados = Cliente.objects.aggregate(suma=Sum('saldo'), maximo=Max('saldo'), promedio=PromedioCentavos('saldo'))
+        assert agregados['suma'] == Decimal('110.50')
+        assert agregados['maximo'] == Decimal('99.99')
+        assert agregados['promedio'] == pytest.approx(Decimal('110.50') / 3)
+
+    def test_misma_representacion_en_la_api(self, clientes):
+        """Test: El serializer sigue devolviendo el saldo como texto con dos decimales"""
+        from clientes.serializers import ClienteSerializer
+
+        assert ClienteSerializer(clientes[0]).data['saldo'] == '10.50'
+        serializer = ClienteSerializer(data={'edad': -5, 'genero': 'M', 'saldo': '1.00', 'nivel_de_satisfaccion': 3})
+        assert not serializer.is_valid()
+        assert serializer.errors['edad'] == ['El cliente debe ser mayor de 18 años']
+
+    def test_limite_de_saldo(self):
+        """Test: El saldo admite hasta 16 dígitos enteros (18 en total, dentro de un BIGINT de centavos)"""
+        from decimal import Decimal
+        from clientes.serializers import ClienteSerializer
+
+        maximo = '9999999999999999.99'
+        serializer = ClienteSerializer(data={'edad': 30, 'genero': 'M', 'saldo': maximo, 'nivel_de_satisfaccion': 3})
+        assert serializer.is_valid(), serializer.errors
+        assert Cliente.objects.get(pk=serializer.save().pk).saldo == Decimal(maximo)
+
+        excedido = {'edad': 30, 'genero': 'M', 'saldo': '10000000000000000.00', 'nivel_de_satisfaccion': 3}
+        serializer = ClienteSerializer(data=excedido)
+        assert not serializer.is_valid()
+        assert 'saldo' in serializer.errors
+        with pytest.raises(ValidationError) as error:
+            Cliente(**excedido).full_clean()
+        assert 'saldo' in error.value.message_dict
@@ -0,0 +1,79 @@
+"""
+Tests para la paginación por cursor de clientes
+"""
+from decimal import Decimal
+
+import pytest
+from rest_framework import status
+from clientes.models import Cliente
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+    """Tests para ClienteCursorPagination"""
+
+    @pytest.fixture
+    def clientes(self):
+        # Saldos y edades repetidos para ejercitar el desempate por cliente_id
+        return [
+            Cliente.objects.create(edad=20 + i % 7, genero='MF'[i % 2], saldo=Decimal((i % 9) * 100),
+                                   nivel_de_satisfaccion=1 + i % 5)
+            for i in range(47)
+        ]
+
+    def recorrer(self, client, params):
+        ids, paginas = [], []
+        response = client.get('/api/v1/clientes/', params)
+        while True:
+            assert response.status_code == status.HTTP_200_OK
+            paginas.append(response.data)
+            ids.extend(fila['cliente_id'] for fila in response.data['results'])
+            if not response.data['next']:
+                return ids, paginas
+            response = client.get(response.data['next'])
+
+    @pytest.mark.parametrize('ordering,clave', [
+        ('-cliente_id', lambda c: -c.cliente_id),
+        ('cliente_id', lambda c: c.cliente_id),
+        ('saldo', lambda c: (c.saldo, c.cliente_id)),
+        ('-saldo', lambda c: (-c.saldo, -c.cliente_id)),
+        ('edad', lambda c: (c.edad, c.cliente_id)),
+        ('-edad', lambda c: (-c.edad, -c.cliente_id)),
+    ])
+    def test_recorrido_completo_sin_repetidos(self, client, clientes, ordering, clave):
+        """Test: Recorrer todas las páginas devuelve cada cliente una vez y en orden"""
+        ids, paginas = self.recorrer(client, {'paginacion': 'cursor', 'ordering': ordering, 'page_size': 10})
+
+        assert ids == [c.cliente_id for c in sorted(clientes, key=clave)]
+        assert len(paginas) == 5
+        assert 'count' not in paginas[0]
+        assert paginas[0]['previous'] is None
+
+    def test_enlace_previous(self, client, clientes):
+        """Test: previous devuelve exactamente la página anterior"""
+        _, paginas = self.recorrer(client, {'paginacion': 'cursor', 'ordering': '-saldo', 'page_size': 10})
+
+        response = client.get(paginas[2]['previous'])
+        assert response.data['results'] == paginas[1]['results']
+        response = client.get(response.data['previous'])
+        assert response.data['results'] == paginas[0]['results']
+        assert response.data['previous'] is None
+
+    def test_costo_constante_por_pagina(self, client, clientes, django_assert_num_queries):
+        """Test: Una página profunda es una sola consulta, sin COUNT"""
+        _, paginas = self.recorrer(client, {'paginacion': 'cursor', 'page_size': 10})
+
+        with django_assert_num_queries(1):
+            client.get(paginas[-2]['next'])
+
+    def test_cursor_invalido(self, client):
+        """Test: Un cursor manipulado devuelve 404"""
+        response = client.get('/api/v1/clientes/', {'cursor': 'no-es-un-cursor'})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_numero_de_pagina_por_defecto(self, client, clientes):
+        """Test: Sin paginacion=cursor se mantiene la paginación por número de página"""
+        response = client.get('/api/v1/clientes/', {'page': 2, 'page_size': 10})
+
+        assert response.data['count'] == len(clientes)
+        assert len(response.data['results']) == 10
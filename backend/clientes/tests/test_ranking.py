@@ -0,0 +1,115 @@
+"""
+Tests para el índice de ranking de saldos
+"""
+from decimal import Decimal
+
+import pytest
+from django.db.models import Avg
+from clientes.campos import PromedioCentavos
+from clientes.estadisticas import obtener_snapshot
+from clientes.models import Cliente
+from clientes.ranking import MAXIMO_CAMBIOS_UNITARIOS, IndiceSaldos, indice_saldos
+
+
+def ranking_referencia(cliente):
+    """Cálculo original por consultas a la tabla"""
+    mayores = Cliente.objects.filter(saldo__gt=cliente.saldo).count()
+    total = Cliente.objects.count()
+    return round((1 - (mayores / total)) * 100, 1) if total > 0 else 0
+
+
+@pytest.mark.django_db
+class TestIndiceSaldos:
+    """Tests para IndiceSaldos y el endpoint de estadísticas por cliente"""
+
+    @pytest.fixture
+    def clientes(self):
+        saldos = ['100.00', '250.50', '250.50', '999.99', '0.00', '5000.00', '250.50', '42.10']
+        return [
+            Cliente.objects.create(edad=20 + i * 5, genero='MF'[i % 2], saldo=Decimal(saldo),
+                                   nivel_de_satisfaccion=1 + i % 5)
+            for i, saldo in enumerate(saldos)
+        ]
+
+    def test_percentil_coincide_con_consulta(self, clientes):
+        """Test: El percentil por bisect coincide con el conteo en la base de datos"""
+        indice = IndiceSaldos()
+        indice.sincronizar(version=1)
+
+        for cliente in clientes:
+            assert indice.percentil(cliente.saldo) == ranking_referencia(cliente)
+
+    def test_promedios_en_memoria(self, clientes):
+        """Test: Los promedios del índice coinciden con Avg"""
+        indice = IndiceSaldos()
+        indice.sincronizar(version=1)
+
+        esperado = Cliente.objects.aggregate(promedio_edad=Avg('edad'), promedio_saldo=PromedioCentavos('saldo'))
+        promedios = indice.promedios()
+        assert promedios['promedio_edad'] == pytest.approx(float(esperado['promedio_edad']))
+        assert promedios['promedio_saldo'] == pytest.approx(float(esperado['promedio_saldo']))
+
+    @pytest.mark.usefixtures('cache_en_disco')
+    def test_endpoint_una_consulta_y_recarga_por_version(self, client, clientes, django_assert_num_queries):
+        """Test: Con el índice vigente el endpoint hace una sola consulta; una escritura lo invalida"""
+        url = f'/api/v1/clientes/{clientes[0].cliente_id}/estadisticas/'
+        client.get(url)
+
+        with django_assert_num_queries(1):
+            response = client.get(url)
+        assert response.data['ranking_saldo'] == f'Top {ranking_referencia(clientes[0])}%'
+
+        Cliente.objects.create(edad=50, genero='F', saldo=Decimal('50.00'), nivel_de_satisfaccion=3)
+        response = client.get(url)
+
+        assert len(indice_saldos) == Cliente.objects.count()
+        assert response.data['ranking_saldo'] == f'Top {ranking_referencia(clientes[0])}%'
+
+    def recargado(self):
+        indice = IndiceSaldos()
+        indice.sincronizar(obtener_snapshot().version)
+        return indice
+
+    def mismo_contenido(self, indice, otro):
+        assert list(indice.saldos) == list(otro.saldos)
+        assert indice.clientes == otro.clientes
+        assert indice.promedios() == otro.promedios()
+
+    @pytest.mark.parametrize('masivo', [False, True])
+    def test_aplica_solo_los_cambios(self, clientes, masivo, monkeypatch, django_assert_num_queries):
+        """Test: Tras la carga inicial se leen solo las filas cambiadas y eliminadas, no la tabla"""
+        indice = IndiceSaldos()
+        indice.sincronizar(obtener_snapshot().version)
+
+        clientes[1].saldo = Decimal('7.77')
+        clientes[1].save()
+        clientes[3].delete()
+        cantidad = MAXIMO_CAMBIOS_UNITARIOS + 1 if masivo else 2
+        Cliente.objects.bulk_create([
+            Cliente(edad=30, genero='F', saldo=Decimal(f'{i}.50'), nivel_de_satisfaccion=3) for i in range(cantidad)
+        ])
+        Cliente.objects.filter(pk=clientes[0].pk).delete()
+
+        monkeypatch.setattr(IndiceSaldos, '_recargar', lambda *args: pytest.fail('recargó la tabla'))
+        version = obtener_snapshot().version
+        with django_assert_num_queries(2):
+            # Filas y marcas de eliminación posteriores a la versión cargada
+            indice.sincronizar(version)
+        monkeypatch.undo()
+
+        self.mismo_contenido(indice, self.recargado())
+        assert len(indice) == Cliente.objects.count()
+
+    def test_cambios_repetidos_no_alteran_el_indice(self, clientes):
+        """Test: Volver a aplicar una ventana ya incluida en la carga deja el mismo contenido"""
+        version = obtener_snapshot().version
+        clientes[2].saldo = Decimal('1.00')
+        clientes[2].save()
+        clientes[4].delete()
+        # La carga completa ya ve estos cambios aunque se asocie a la versión anterior
+        indice = IndiceSaldos()
+        indice.sincronizar(version)
+
+        indice.sincronizar(obtener_snapshot().version)
+        self.mismo_contenido(indice, self.recargado())
+
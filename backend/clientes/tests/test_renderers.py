@@ -0,0 +1,60 @@
+"""
+Tests para los renderers orjson, columnar y MessagePack
+"""
+import json
+from decimal import Decimal
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+from clientes.models import Cliente
+from clientes.renderers import ORJSONRenderer, a_columnas
+
+
+@pytest.mark.django_db
+class TestRenderers:
+    """Tests para la negociación de formatos del ViewSet"""
+
+    @pytest.fixture
+    def clientes(self):
+        return [
+            Cliente.objects.create(edad=20 + i * 3, genero='MF'[i % 2], saldo=Decimal(f'{i * 321}.75'),
+                                   nivel_de_satisfaccion=1 + i % 5)
+            for i in range(8)
+        ]
+
+    @pytest.mark.parametrize('url', ['/api/v1/clientes/', '/api/v1/clientes/estadisticas-generales/'])
+    def test_orjson_igual_a_json_estandar(self, client, clientes, url):
+        """Test: El JSON por defecto (orjson) es idéntico al de JSONRenderer"""
+        response = client.get(url)
+
+        assert response['Content-Type'] == 'application/json'
+        assert response.content == JSONRenderer().render(response.data)
+
+    def test_indentacion_usa_json_estandar(self):
+        """Test: Con indent en Accept se delega a JSONRenderer"""
+        data = {'a': [1, 2], 'texto': 'línea\u2028separada', 3: None}
+        salida = ORJSONRenderer().render(data, 'application/json; indent=2')
+
+        assert salida == JSONRenderer().render(data, 'application/json; indent=2')
+        assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_formato_columnar(self, client, clientes):
+        """Test: ?format=columnas envía un arreglo por campo con los mismos valores"""
+        filas = client.get('/api/v1/clientes/', {'page_size': 5}).json()['results']
+        response = client.get('/api/v1/clientes/', {'page_size': 5, 'format': 'columnas'})
+
+        assert response['Content-Type'] == 'application/vnd.clientes.columnas+json'
+        columnas = json.loads(response.content)['results']
+        assert list(columnas) == list(filas[0])
+        assert columnas['cliente_id'] == [fila['cliente_id'] for fila in filas]
+        assert a_columnas([]) == {}
+
+    def test_messagepack_por_accept(self, client, clientes):
+        """Test: Accept application/msgpack devuelve los mismos datos en binario"""
+        msgpack = pytest.importorskip('msgpack')
+        esperado = client.get('/api/v1/clientes/').json()
+        response = client.get('/api/v1/clientes/', HTTP_ACCEPT='application/msgpack')
+
+        assert response['Content-Type'] == 'application/msgpack'
+        assert msgpack.unpackb(response.content) == esperado
+        assert response['ETag'] != client.get('/api/v1/clientes/')['ETag']
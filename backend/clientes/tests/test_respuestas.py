@@ -0,0 +1,178 @@
+"""
+Tests para la caché de respuestas por versión de datos y sus backends LRU
+"""
+import os
+import pickle
+import time
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.test import APIClient
+from clientes.cache import ArchivoLRUCache, MemoriaLRUCache
+from clientes.estadisticas import obtener_snapshot
+from clientes.models import Cliente
+from clientes.respuestas import CACHE_RESPUESTAS
+
+
+def tamano(valor):
+    return len(pickle.dumps(valor, pickle.HIGHEST_PROTOCOL))
+
+
+class TestBackendsLRU:
+    """Tests para los backends acotados por bytes"""
+
+    @pytest.fixture
+    def memoria(self):
+        almacen = MemoriaLRUCache('tests-lru', {'OPTIONS': {'MAX_BYTES': 3 * tamano('x' * 100)}})
+        almacen.clear()
+        yield almacen
+        almacen.clear()
+
+    def test_memoria_expulsa_la_menos_usada(self, memoria):
+        """Test: Al superar MAX_BYTES sale la entrada leída hace más tiempo"""
+        for clave in 'abc':
+            memoria.set(clave, clave * 100)
+        assert memoria.bytes_usados == 3 * tamano('x' * 100)
+
+        memoria.get('a')
+        memoria.set('d', 'd' * 100)
+
+        assert memoria.get('b') is None
+        assert [memoria.get(clave) for clave in 'acd'] == ['a' * 100, 'c' * 100, 'd' * 100]
+        assert memoria.bytes_usados <= memoria.max_bytes
+
+    def test_memoria_cuenta_bytes(self, memoria):
+        """Test: Reemplazar, eliminar e incrementar mantienen la cuenta de bytes"""
+        memoria.set('a', 'a' * 100)
+        memoria.set('a', 'a' * 10)
+        assert memoria.bytes_usados == tamano('a' * 10)
+        memoria.set('n', 1)
+        memoria.incr('n', 10 ** 30)
+        assert memoria.bytes_usados == tamano('a' * 10) + tamano(1 + 10 ** 30)
+        memoria.delete('a')
+        memoria.delete('n')
+        assert memoria.bytes_usados == 0 and len(memoria) == 0
+
+    def test_memoria_no_guarda_valores_mayores_al_limite(self, memoria):
+        """Test: Un valor más grande que MAX_BYTES no se guarda ni expulsa a los demás"""
+        memoria.set('a', 'a')
+        memoria.set('grande', 'x' * memoria.max_bytes)
+        assert memoria.get('grande') is None
+        assert memoria.get('a') == 'a'
+
+    def test_archivo_expulsa_la_menos_usada(self, tmp_path):
+        """Test: El backend en disco borra los archivos menos usados al superar MAX_BYTES"""
+        almacen = ArchivoLRUCache(str(tmp_path), {'OPTIONS': {'MAX_BYTES': 3000, 'CULL_FREQUENCY': 3, 'CULL_CADA': 1}})
+        for indice in range(3):
+            almacen.set(f'clave{indice}', os.urandom(1000))
+        # Fechas de uso explícitas: la 0 fue leída después que la 1
+        for indice, fecha in ((0, 300), (1, 100), (2, 200)):
+            ruta = almacen._key_to_file(f'clave{indice}')
+            os.utime(ruta, (fecha, fecha))
+        almacen.get('clave0')
+
+        almacen.set('clave3', b'x')
+
+        assert almacen.get('clave1') is None
+        assert almacen.get('clave0') is not None
+        assert almacen.get('clave3') == b'x'
+        assert almacen.bytes_usados <= 3000
+
+    def test_archivo_lectura_reciente_no_escribe(self, tmp_path):
+        """Test: Un acierto solo actualiza la fecha de uso si es más vieja que RESOLUCION_USO"""
+        almacen = ArchivoLRUCache(str(tmp_path), {'OPTIONS': {'RESOLUCION_USO': 60}})
+        almacen.set('a', 'a')
+        ruta = almacen._key_to_file('a')
+        reciente = time.time() - 30
+        os.utime(ruta, (reciente, reciente))
+        almacen.get('a')
+        assert os.stat(ruta).st_mtime == reciente
+
+        os.utime(ruta, (100, 100))
+        almacen.get('a')
+        assert os.stat(ruta).st_mtime > reciente
+
+    def test_archivo_recorre_el_directorio_cada_n_escrituras(self, tmp_path, monkeypatch):
+        """Test: Guardar no lista el directorio en cada escritura sino cada CULL_CADA"""
+        almacen = ArchivoLRUCache(str(tmp_path), {'OPTIONS': {'CULL_CADA': 4}})
+        recorridos = []
+        listar = almacen._list_cache_files
+        monkeypatch.setattr(almacen, '_list_cache_files', lambda: recorridos.append(1) or listar())
+        for indice in range(8):
+            almacen.set(f'clave{indice}', indice)
+        assert len(recorridos) == 2
+
+
+@pytest.mark.django_db
+class TestCacheRespuestas:
+    """Tests para la caché del listado"""
+
+    url = '/api/v1/clientes/'
+
+    @pytest.fixture
+    def api_client(self):
+        return APIClient()
+
+    @pytest.fixture
+    def clientes(self):
+        obtener_snapshot()
+        return [
+            Cliente.objects.create(edad=25 + i, genero='MF'[i % 2], saldo=Decimal(f'{i * 100}.00'),
+                                   nivel_de_satisfaccion=1 + i % 5)
+            for i in range(6)
+        ]
+
+    def test_acierto_sin_consultar_clientes(self, api_client, clientes, django_assert_num_queries):
+        """Test: La segunda petición igual se sirve de la caché leyendo solo la versión"""
+        primera = api_client.get(self.url, {'genero': 'F', 'page_size': 2})
+        assert primera['X-Cache'] == 'MISS'
+
+        with django_assert_num_queries(1):
+            segunda = api_client.get(self.url, {'page_size': 2, 'genero': 'F'})
+        assert segunda.status_code == status.HTTP_200_OK
+        assert segunda['X-Cache'] == 'HIT'
+        assert segunda.content == primera.content
+        assert segunda['ETag'] == primera['ETag']
+
+    def test_parametros_distintos_no_comparten_entrada(self, api_client, clientes):
+        """Test: Otros filtros o página son otra entrada"""
+        api_client.get(self.url, {'genero': 'F'})
+        response = api_client.get(self.url, {'genero': 'M'})
+        assert response['X-Cache'] == 'MISS'
+        assert {c['genero'] for c in response.data['results']} == {'M'}
+
+    def test_escritura_invalida_sin_borrar_claves(self, api_client, clientes):
+        """Test: Una escritura cambia la versión y la siguiente petición ve los datos nuevos"""
+        api_client.get(self.url)
+        entradas = len(caches[CACHE_RESPUESTAS])
+        Cliente.objects.filter(pk=clientes[0].pk).update(edad=99)
+
+        response = api_client.get(self.url)
+        assert response['X-Cache'] == 'MISS'
+        assert next(c for c in response.data['results'] if c['cliente_id'] == clientes[0].pk)['edad'] == 99
+        # La respuesta nueva agrega sus entradas (datos y bytes) y no se borra ninguna
+        assert len(caches[CACHE_RESPUESTAS]) == 2 * entradas
+
+    def test_errores_no_se_guardan(self, api_client, clientes):
+        """Test: Una página inexistente no se guarda"""
+        assert api_client.get(self.url, {'page': 99}).status_code == status.HTTP_404_NOT_FOUND
+        assert len(caches[CACHE_RESPUESTAS]) == 0
+
+    def test_metricas(self, api_client, clientes):
+        """Test: Las métricas cuentan aciertos y fallos y solo las ve un admin"""
+        for _ in range(3):
+            api_client.get(self.url)
+        assert api_client.get(f'{self.url}metricas-cache/').status_code in (
+            status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN)
+
+        api_client.force_authenticate(User.objects.create_superuser('admin', 'a@a.com', 'x'))
+        respuestas = api_client.get(f'{self.url}metricas-cache/').data['respuestas']
+        assert respuestas['aciertos'] == 2
+        assert respuestas['fallos'] == 1
+        assert respuestas['tasa_aciertos'] == 66.67
+        # Los datos de la página y sus bytes renderizados
+        assert respuestas['entradas'] == len(caches[CACHE_RESPUESTAS]) > 1
+        assert 0 < respuestas['bytes'] <= respuestas['max_bytes']
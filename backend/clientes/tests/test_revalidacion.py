@@ -0,0 +1,199 @@
+"""
+Tests para stale-while-revalidate de las estadísticas
+"""
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+from clientes import revalidacion
+from clientes.estadisticas import obtener_snapshot
+from clientes.models import Cliente
+from clientes.respuestas import CACHE_RESPUESTAS, metricas
+
+GENERALES = '/api/v1/clientes/estadisticas-generales/'
+AGREGADOS = '/api/v1/clientes/agregados/'
+
+
+def crear_cliente(edad=30, saldo='100.00'):
+    return Cliente.objects.create(edad=edad, genero='F', saldo=Decimal(saldo), nivel_de_satisfaccion=3)
+
+
+@pytest.mark.django_db
+class TestRevalidacion:
+    """Tests para servir estadísticas obsoletas mientras se recalculan"""
+
+    @pytest.fixture
+    def api_client(self):
+        return APIClient()
+
+    @pytest.fixture
+    def clientes(self):
+        obtener_snapshot()
+        return [crear_cliente(edad=20 + i, saldo=f'{i * 1000}.00') for i in range(5)]
+
+    @pytest.fixture
+    def pendientes(self, monkeypatch):
+        """Recálculos lanzados; el test los ejecuta cuando quiere"""
+        tareas = []
+        monkeypatch.setattr(revalidacion, 'en_segundo_plano', lambda funcion, *args: tareas.append((funcion, args)))
+        yield tareas
+        revalidacion._en_curso.clear()
+
+    def ejecutar(self, pendientes):
+        while pendientes:
+            funcion, args = pendientes.pop(0)
+            funcion(*args)
+
+    def test_acierto_fresco(self, api_client, clientes, django_assert_num_queries):
+        """Test: Sin escrituras la segunda petición se sirve de la caché leyendo solo la versión"""
+        primera = api_client.get(GENERALES)
+        assert primera['X-Cache'] == 'MISS'
+
+        with django_assert_num_queries(1):
+            segunda = api_client.get(GENERALES)
+        assert segunda['X-Cache'] == 'HIT'
+        assert int(segunda['Age']) >= 0
+        assert segunda.content == primera.content
+        assert segunda['ETag'] == primera['ETag']
+
+    def test_obsoleta_se_sirve_y_se_recalcula(self, api_client, clientes, pendientes):
+        """Test: Tras una escritura se sirve el cálculo anterior y un solo recálculo lo reemplaza"""
+        primera = api_client.get(GENERALES)
+        crear_cliente()
+
+        obsoletas = [api_client.get(GENERALES) for _ in range(3)]
+        assert {response['X-Cache'] for response in obsoletas} == {'STALE'}
+        assert obsoletas[0].json()['total_clientes'] == 5
+        # Los validadores describen los datos enviados, no los actuales
+        assert obsoletas[0]['ETag'] == primera['ETag']
+        assert len(pendientes) == 1
+
+        self.ejecutar(pendientes)
+        response = api_client.get(GENERALES)
+        assert response['X-Cache'] == 'HIT'
+        assert response.json()['total_clientes'] == 6
+        assert response['ETag'] != primera['ETag']
+
+    def test_obsolescencia_maxima(self, api_client, clientes, pendientes):
+        """Test: Pasado ESTADISTICAS_MAX_OBSOLETA se recalcula en la petición"""
+        api_client.get(GENERALES)
+        crear_cliente()
+        assert api_client.get(GENERALES)['X-Cache'] == 'STALE'
+
+        # El recálculo no terminó y la entrada lleva obsoleta más que el máximo
+        almacen = caches[CACHE_RESPUESTAS]
+        clave = revalidacion.clave_estadisticas(RequestFactory().get(GENERALES))
+        almacen.set(f'{clave}:obsoleto:{almacen.get(clave).version}', time.time() - 301)
+
+        response = api_client.get(GENERALES)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['total_clientes'] == 6
+        assert metricas.resumen('estadisticas')['vencidas'] == 1
+
+    def test_sin_obsolescencia(self, api_client, clientes, pendientes, settings):
+        """Test: Con ESTADISTICAS_MAX_OBSOLETA=0 nunca se sirven datos obsoletos"""
+        settings.ESTADISTICAS_MAX_OBSOLETA = 0
+        api_client.get(GENERALES)
+        crear_cliente()
+
+        response = api_client.get(GENERALES)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['total_clientes'] == 6
+        assert not pendientes
+
+    def test_marca_obsoleta_no_pisa_un_calculo_nuevo(self, api_client, clientes, pendientes, monkeypatch):
+        """Test: Servir obsoleto no reescribe la entrada ni pisa el recálculo guardado entretanto"""
+        api_client.get(GENERALES)
+        almacen = caches[CACHE_RESPUESTAS]
+        clave = revalidacion.clave_estadisticas(RequestFactory().get(GENERALES))
+        anterior = almacen.get(clave)
+        crear_cliente()
+        api_client.get(GENERALES)
+        self.ejecutar(pendientes)
+        nuevo = almacen.get(clave)
+        assert nuevo.version > anterior.version
+
+        # Una petición que leyó el cálculo anterior justo antes de que se guardara el nuevo
+        leer = almacen.get
+        lecturas = [anterior]
+
+        def leer_anterior(key, *args):
+            if key == clave and lecturas:
+                return lecturas.pop()
+            return leer(key, *args)
+
+        monkeypatch.setattr(almacen, 'get', leer_anterior)
+        assert api_client.get(GENERALES)['X-Cache'] == 'STALE'
+        monkeypatch.undo()
+
+        assert almacen.get(clave) == nuevo
+        assert api_client.get(GENERALES)['X-Cache'] == 'HIT'
+
+    def test_recalculo_fallido(self, api_client, clientes, pendientes, monkeypatch):
+        """Test: Un recálculo que falla se cuenta y el siguiente pedido puede relanzarlo"""
+        api_client.get(GENERALES)
+        crear_cliente()
+        api_client.get(GENERALES)
+
+        def fallar(*args, **kwargs):
+            raise RuntimeError('base de datos no disponible')
+
+        monkeypatch.setattr('clientes.views.construir_respuesta', fallar)
+        self.ejecutar(pendientes)
+        assert metricas.resumen('estadisticas')['revalidaciones_fallidas'] == 1
+
+        assert api_client.get(GENERALES)['X-Cache'] == 'STALE'
+        assert len(pendientes) == 1
+
+    def test_agregados_por_parametros(self, api_client, clientes, pendientes):
+        """Test: agregados guarda un cálculo por combinación de parámetros"""
+        por_genero = {'group_by': 'genero'}
+        assert api_client.get(AGREGADOS, por_genero)['X-Cache'] == 'MISS'
+        assert api_client.get(AGREGADOS, {'group_by': 'activo'})['X-Cache'] == 'MISS'
+        assert api_client.get(AGREGADOS, por_genero)['X-Cache'] == 'HIT'
+
+        crear_cliente()
+        assert api_client.get(AGREGADOS, por_genero).json()['filas'] == [['F', 5]]
+        self.ejecutar(pendientes)
+        assert api_client.get(AGREGADOS, por_genero).json()['filas'] == [['F', 6]]
+
+    def test_agregados_sin_filas_no_se_guardan(self, api_client):
+        """Test: Sin filas no hay versión leída y el resultado no se guarda"""
+        obtener_snapshot()
+        api_client.get(AGREGADOS, {'group_by': 'genero'})
+        assert api_client.get(AGREGADOS, {'group_by': 'genero'})['X-Cache'] == 'MISS'
+
+    def test_metricas(self, api_client, clientes, pendientes):
+        """Test: metricas-cache distingue respuestas frescas, obsoletas y recalculadas"""
+        api_client.get(GENERALES)
+        api_client.get(GENERALES)
+        crear_cliente()
+        api_client.get(GENERALES)
+        self.ejecutar(pendientes)
+
+        api_client.force_authenticate(User.objects.create_superuser('admin', 'a@a.com', 'x'))
+        estadisticas = api_client.get('/api/v1/clientes/metricas-cache/').data['estadisticas']
+        assert estadisticas['aciertos'] == 2
+        assert estadisticas['obsoletas'] == 1
+        assert estadisticas['fallos'] == 1
+        assert estadisticas['revalidadas'] == 1
+        assert 'bytes' not in estadisticas
+
+
+def test_en_segundo_plano_usa_otro_hilo():
+    """Test: El recálculo corre en un hilo aparte del worker"""
+    hilos = []
+    terminado = threading.Event()
+
+    def registrar():
+        hilos.append(threading.current_thread().name)
+        terminado.set()
+
+    revalidacion.en_segundo_plano(registrar)
+    assert terminado.wait(5)
+    assert hilos == ['revalidar-estadisticas']
@@ -0,0 +1,107 @@
+"""
+Tests para el sketch de cuantiles de saldo
+"""
+import random
+from decimal import Decimal
+
+import pytest
+from clientes.estadisticas import calcular_sketch, contar_alta_rentabilidad, obtener_snapshot, verificar_snapshot
+from clientes.models import Cliente, CuboSaldo
+from clientes.sketch import PRECISION_RELATIVA, SketchCuantiles
+
+
+def valor_exacto(valores, q):
+    ordenados = sorted(valores)
+    return ordenados[int(q * (len(ordenados) - 1))]
+
+
+class TestSketchCuantiles:
+    """Tests unitarios del sketch (sin base de datos)"""
+
+    @pytest.fixture
+    def valores(self):
+        generador = random.Random(42)
+        return [round(generador.lognormvariate(9, 2), 2) for _ in range(20000)] + [0.0] * 50
+
+    @pytest.mark.parametrize('q', [0.0, 0.01, 0.5, 0.9, 0.99, 1.0])
+    def test_error_relativo_acotado(self, valores, q):
+        """Test: Cada cuantil está dentro del error relativo documentado"""
+        sketch = SketchCuantiles()
+        for valor in valores:
+            sketch.agregar(valor)
+
+        exacto = valor_exacto(valores, q)
+        assert abs(sketch.cuantil(q) - exacto) <= PRECISION_RELATIVA * exacto
+
+    def test_eliminacion_exacta(self, valores):
+        """Test: Agregar y luego quitar valores deja el mismo sketch que no agregarlos"""
+        sketch = SketchCuantiles()
+        for valor in valores:
+            sketch.agregar(valor)
+        for valor in valores[:5000]:
+            sketch.quitar(valor)
+
+        esperado = SketchCuantiles()
+        for valor in valores[5000:]:
+            esperado.agregar(valor)
+        assert sketch.cubos == esperado.cubos
+
+    def test_fusion_independiente_del_orden(self, valores):
+        """Test: Fusionar sketches parciales equivale a construir uno solo"""
+        partes = [SketchCuantiles() for _ in range(4)]
+        for i, valor in enumerate(valores):
+            partes[i % 4].agregar(valor)
+        completo = SketchCuantiles()
+        for valor in valores:
+            completo.agregar(valor)
+
+        fusionado = SketchCuantiles()
+        for parte in reversed(partes):
+            fusionado.fusionar(parte)
+        assert fusionado.cubos == completo.cubos
+
+    def test_fusion_con_precision_distinta(self):
+        """Test: No se fusionan sketches con distinta precisión"""
+        with pytest.raises(ValueError):
+            SketchCuantiles(0.01).fusionar(SketchCuantiles(0.02))
+
+
+@pytest.mark.django_db
+class TestSketchPersistido:
+    """Tests del sketch mantenido en CuboSaldo"""
+
+    @pytest.fixture
+    def clientes(self):
+        obtener_snapshot()
+        generador = random.Random(7)
+        return [
+            Cliente.objects.create(edad=30, genero='F', nivel_de_satisfaccion=3,
+                                   saldo=Decimal(str(round(generador.uniform(0, 100000), 2))))
+            for _ in range(60)
+        ]
+
+    def test_senales_mantienen_los_cubos(self, clientes):
+        """Test: Crear, modificar y eliminar clientes mantiene los cubos persistidos"""
+        clientes[0].saldo = Decimal('0.00')
+        clientes[0].save()
+        clientes[1].delete()
+
+        persistidos = dict(CuboSaldo.objects.filter(conteo__gt=0).values_list('indice', 'conteo'))
+        assert persistidos == dict(calcular_sketch().cubos)
+        assert verificar_snapshot() == {}
+
+    def test_endpoint_expone_cuantiles(self, client, clientes):
+        """Test: Los cuantiles son aproximados dentro de la cota y la alta rentabilidad es exacta"""
+        response = client.get('/api/v1/clientes/estadisticas-generales/')
+
+        saldos = [float(c.saldo) for c in clientes]
+        cuantiles = response.data['cuantiles_saldo']
+        assert cuantiles['aproximado'] is True
+        assert cuantiles['error_relativo'] == PRECISION_RELATIVA
+        for clave, q in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99)):
+            exacto = valor_exacto(saldos, q)
+            assert abs(cuantiles[clave] - exacto) <= PRECISION_RELATIVA * exacto + 0.01
+
+        exacto = contar_alta_rentabilidad(Cliente.objects.all(), len(clientes))
+        assert response.data['clientes_alta_rentabilidad'] == exacto
+        assert response.data['porcentaje_alta_rentabilidad'] == round(exacto / len(clientes) * 100, 2)
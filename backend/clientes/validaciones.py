@@ -0,0 +1,98 @@
+"""
+Reglas de negocio de Cliente, definidas una sola vez.
+
+Las usan el serializer (``validate_*``), ``Cliente.clean()``, las escrituras
+masivas de ClienteQuerySet y las restricciones CHECK de ``Cliente.Meta``, de
+modo que todas las vías de escritura rechazan lo mismo con el mismo mensaje.
+"""
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models import Q
+
+EDAD_MINIMA = 18
+EDAD_MAXIMA = 120
+SATISFACCION_MINIMA = 1
+SATISFACCION_MAXIMA = 5
+
+MENSAJE_EDAD_MINIMA = 'El cliente debe ser mayor de 18 años'
+MENSAJE_EDAD_MAXIMA = 'La edad no puede ser mayor a 120 años'
+MENSAJE_SALDO_NEGATIVO = 'El saldo no puede ser negativo'
+MENSAJE_SATISFACCION = 'El nivel de satisfacción debe estar entre 1 y 5'
+
+
+def error_edad(valor):
+    if valor < EDAD_MINIMA:
+        return MENSAJE_EDAD_MINIMA
+    if valor > EDAD_MAXIMA:
+        return MENSAJE_EDAD_MAXIMA
+    return None
+
+
+def error_saldo(valor):
+    return MENSAJE_SALDO_NEGATIVO if valor < 0 else None
+
+
+def error_nivel_de_satisfaccion(valor):
+    if valor < SATISFACCION_MINIMA or valor > SATISFACCION_MAXIMA:
+        return MENSAJE_SATISFACCION
+    return None
+
+
+# Campo -> función que devuelve el mensaje de error o None
+REGLAS = {
+    'edad': error_edad,
+    'saldo': error_saldo,
+    'nivel_de_satisfaccion': error_nivel_de_satisfaccion,
+}
+
+
+def errores(valores):
+    """Errores por campo para los valores presentes en ``valores`` (dict o instancia)"""
+    obtener = valores.get if isinstance(valores, dict) else lambda campo: getattr(valores, campo, None)
+    resultado = {}
+    for campo, regla in REGLAS.items():
+        valor = obtener(campo)
+        # None lo rechaza la validación del campo; las expresiones (F(), ...) la base de datos
+        if valor is None or hasattr(valor, 'resolve_expression'):
+            continue
+        try:
+            mensaje = regla(valor)
+        except TypeError:
+            # Valor sin convertir (p. ej. saldo como texto): lo valida la restricción CHECK
+            continue
+        if mensaje is not None:
+            resultado[campo] = mensaje
+    return resultado
+
+
+def validar_objetos(objetos):
+    """Lanza ValidationError con los errores del primer objeto inválido (su posición va en ``params``)"""
+    for posicion, objeto in enumerate(objetos):
+        encontrados = errores(objeto)
+        if encontrados:
+            raise ValidationError({
+                campo: ValidationError(mensaje, code='invalid', params={'posicion': posicion})
+                for campo, mensaje in encontrados.items()
+            })
+
+
+def restricciones():
+    """Restricciones CHECK equivalentes a ``REGLAS`` para ``Cliente.Meta.constraints``"""
+    return [
+        models.CheckConstraint(
+            condition=Q(edad__gte=EDAD_MINIMA, edad__lte=EDAD_MAXIMA),
+            name='cliente_edad_rango',
+            violation_error_message='La edad debe estar entre 18 y 120 años',
+        ),
+        models.CheckConstraint(
+            condition=Q(saldo__gte=0),
+            name='cliente_saldo_no_negativo',
+            violation_error_message=MENSAJE_SALDO_NEGATIVO,
+        ),
+        models.CheckConstraint(
+            condition=Q(nivel_de_satisfaccion__gte=SATISFACCION_MINIMA,
+                        nivel_de_satisfaccion__lte=SATISFACCION_MAXIMA),
+            name='cliente_satisfaccion_rango',
+            violation_error_message=MENSAJE_SATISFACCION,
+        ),
+    ]
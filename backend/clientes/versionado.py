@@ -0,0 +1,51 @@
+"""
+Versión de los datos de Cliente.
+
+``EstadisticasSnapshot.version`` se incrementa con cada escritura sobre la
+tabla (creaciones, actualizaciones, eliminaciones y operaciones masivas) y
+``actualizado`` registra el momento del último cambio; juntos sirven como
+contador de cambios para validar cachés e índices derivados.
+
+Cada escritura reserva ``version + 1`` como su secuencia de cambio y la guarda
+en las filas que toca (``Cliente.secuencia_cambio`` o ``ClienteEliminado``);
+al terminar, la actualización del snapshot deja ``version`` en ese valor.
+"""
+from django.db.models import Subquery
+
+from .estadisticas import SNAPSHOT_PK, obtener_snapshot, reconstruir_snapshot
+from .models import EstadisticasSnapshot
+
+
+def subconsulta_version():
+    """Versión actual de los datos, para anotarla en la misma consulta del cliente"""
+    return Subquery(EstadisticasSnapshot.objects.filter(pk=SNAPSHOT_PK).values('version')[:1])
+
+
+def subconsulta_actualizado():
+    """Momento del último cambio, para anotarlo junto a la versión"""
+    return Subquery(EstadisticasSnapshot.objects.filter(pk=SNAPSHOT_PK).values('actualizado')[:1])
+
+
+def obtener_version():
+    """``(version, actualizado)`` en una consulta; construye el snapshot si no existe"""
+    fila = EstadisticasSnapshot.objects.filter(pk=SNAPSHOT_PK).values_list('version', 'actualizado').first()
+    if fila is None:
+        snapshot = obtener_snapshot()
+        return snapshot.version, snapshot.actualizado
+    return fila
+
+
+def reservar_secuencia():
+    """
+    Secuencia de cambio para la escritura en curso.
+
+    Debe llamarse dentro de una transacción: bloquea la fila del snapshot hasta
+    el commit, así las secuencias se confirman en orden y un lector que ve la
+    secuencia ``n`` ya ve todas las anteriores.
+    """
+    bloqueada = EstadisticasSnapshot.objects.select_for_update().filter(pk=SNAPSHOT_PK)
+    version = bloqueada.values_list('version', flat=True).first()
+    if version is None:
+        reconstruir_snapshot()
+        version = bloqueada.values_list('version', flat=True).first()
+    return version + 1
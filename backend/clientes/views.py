@@ -1,21 +1,37 @@
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponseRedirect
+from django.http import Http404, HttpResponseRedirect, StreamingHttpResponse
 from django.urls import reverse
-from django.db.models import Count, Avg, Sum, Q, Max, Min
-from django.utils import timezone
-from datetime import timedelta
-from rest_framework import viewsets, status
+from decimal import Decimal
+from rest_framework import serializers, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, AllowAny
+from rest_framework.settings import api_settings
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiResponse
 from drf_spectacular.types import OpenApiTypes
 from .models import Cliente
+from .cambios import LIMITE_MAXIMO, obtener_cambios, parsear_consulta
+from .agregados import DIMENSIONES, METRICAS, calcular_agregados_por_grupo, parsear_parametros
+from .exportacion import FORMATOS, GENERADORES
+from .masivo import CAMPOS_ACTUALIZABLES, MAXIMO_FILAS, aplicar, parsear_solicitud, validar_cambios
+from .lectura import CAMPOS_CONSULTA, representar
+from .estadisticas import agregados_desde_snapshot, construir_respuesta, obtener_snapshot, sketch_saldos
 from .serializers import ClienteSerializer
 from .throttling import BurstRateThrottle, ReadOnlyRateThrottle, WriteRateThrottle, StatsRateThrottle
-from .pagination import ClientePagination
+from .pagination import ClienteCursorPagination, ClientePagination
+from .ranking import indice_saldos
+from .versionado import obtener_version, subconsulta_actualizado, subconsulta_version
+from .condicional import respuesta_condicional
+from .respuestas import CACHE_RESPUESTAS, respuesta_cacheada, resumen_metricas
+from .compresion import comprimir_streaming
+from .revalidacion import respuesta_revalidada
+from .cache_clientes import (
+    CACHE_CLIENTES, MAXIMO_CALENTAR, TAMANO_LOTE, cache_clientes, obtener_entrada, version_cliente,
+)
+from .renderers import RENDERERS_ADICIONALES
 from .permissions import IsOwnerOrAdmin, IsAdminOrReadOnly, CanCreateCliente
 
 
@@ -37,6 +53,11 @@ def cliente_list(request):
             OpenApiParameter(name='nivel_de_satisfaccion', type=int, description='Filtrar por nivel de satisfacción (1-5)'),
             OpenApiParameter(name='page', type=int, description='Número de página'),
             OpenApiParameter(name='page_size', type=int, description='Tamaño de página (máx 100)'),
+            OpenApiParameter(name='paginacion', type=str, enum=['cursor'],
+                             description='Usar paginación por cursor (keyset) en lugar de número de página'),
+            OpenApiParameter(name='cursor', type=str, description='Cursor opaco devuelto en next/previous'),
+            OpenApiParameter(name='ordering', type=str, enum=list(ClienteCursorPagination.ordenamientos),
+                             description='Ordenamiento en modo cursor (por defecto -cliente_id)'),
         ],
     ),
     retrieve=extend_schema(
@@ -86,13 +107,87 @@ class ClienteViewSet(viewsets.ModelViewSet):
     pagination_class = ClientePagination
     permission_classes = [IsAdminOrReadOnly]  # GET público, POST/PUT/DELETE admin only
     throttle_classes = [BurstRateThrottle, ReadOnlyRateThrottle, WriteRateThrottle]
+    # JSON por defecto y formatos columnar/MessagePack con Accept o ?format=
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, *RENDERERS_ADICIONALES]
+    # list/retrieve serializan desde tuplas de values_list (ver clientes.lectura)
+    lectura_rapida = True
 
     def get_queryset(self):
         """
         Retorna todos los clientes para lectura pública.
         Admin puede ver todos.
         """
-        return Cliente.objects.all()
+        queryset = Cliente.objects.all()
+        if self.action in ('list', 'retrieve'):
+            # La versión de datos viaja en la misma consulta que las filas
+            queryset = queryset.annotate(
+                version_datos=subconsulta_version(),
+                actualizado_datos=subconsulta_actualizado(),
+            )
+        return queryset
+    
+    def _registrar_version(self, cliente):
+        """Versión de datos leída junto con ``cliente``, para el ETag de la respuesta"""
+        if hasattr(cliente, 'version_datos'):
+            self.version_datos = (cliente.version_datos, cliente.actualizado_datos)
+    
+    def get_object(self):
+        cliente = super().get_object()
+        self._registrar_version(cliente)
+        return cliente
+    
+    def paginate_queryset(self, queryset):
+        pagina = super().paginate_queryset(queryset)
+        if pagina:
+            self._registrar_version(pagina[0])
+        return pagina
+    
+    def _filas(self):
+        """Queryset de tuplas con nombre para la lectura rápida, con la versión de datos"""
+        return self.filter_queryset(self.get_queryset()).values_list(
+            *CAMPOS_CONSULTA, 'version_datos', 'actualizado_datos', named=True
+        )
+    
+    @respuesta_condicional
+    @respuesta_cacheada
+    def list(self, request, *args, **kwargs):
+        """Listado con ETag/Last-Modified (304 si los datos no cambiaron) y caché por versión"""
+        if not self.lectura_rapida:
+            return super().list(request, *args, **kwargs)
+        
+        filas = self._filas()
+        pagina = self.paginate_queryset(filas)
+        if pagina is not None:
+            return self.get_paginated_response(representar(pagina))
+        return Response(representar(filas))
+    
+    @respuesta_condicional(leer_version=version_cliente)
+    def retrieve(self, request, *args, **kwargs):
+        """Detalle desde la caché por objeto, con ETag por secuencia de cambio; 304 si no cambió"""
+        if not self.lectura_rapida:
+            return super().retrieve(request, *args, **kwargs)
+        
+        entrada = self._entrada_cliente()
+        self.check_object_permissions(request, entrada)
+        self.version_datos = (entrada.secuencia, entrada.actualizado)
+        return Response(entrada.datos)
+    
+    def _entrada_cliente(self):
+        """Entrada de la caché por objeto del cliente de la URL (404 si no existe)"""
+        entrada = obtener_entrada(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        if entrada is None:
+            raise Http404
+        return entrada
+    
+    @property
+    def paginator(self):
+        """Paginación por cursor si se solicita; por número de página en otro caso"""
+        if not hasattr(self, '_paginator'):
+            if ClienteCursorPagination.solicitada(self.request):
+                self._paginator = ClienteCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
     
     def perform_create(self, serializer):
         """Auto-asignar usuario admin al crear cliente"""
@@ -136,9 +231,13 @@ class ClienteViewSet(viewsets.ModelViewSet):
         throttle_classes=[StatsRateThrottle],
         url_path='estadisticas'
     )
+    @respuesta_condicional
     def estadisticas(self, request, pk=None):
         """Estadísticas detalladas de un cliente específico"""
-        cliente = self.get_object()
+        # El cliente sale de la caché por objeto; el ranking depende de todos los datos
+        cliente = self._entrada_cliente().datos
+        saldo = Decimal(cliente['saldo'])
+        self.version_datos = obtener_version()
         
         niveles_satisfaccion = {
             1: 'Muy Insatisfecho',
@@ -148,36 +247,30 @@ class ClienteViewSet(viewsets.ModelViewSet):
             5: 'Muy Satisfecho'
         }
         
-        # Calcular ranking de saldo
-        clientes_con_mayor_saldo = Cliente.objects.filter(saldo__gt=cliente.saldo).count()
-        total_clientes = Cliente.objects.count()
-        percentil = round((1 - (clientes_con_mayor_saldo / total_clientes)) * 100, 1) if total_clientes > 0 else 0
-        
-        # Comparación con promedio del sistema
-        promedios = Cliente.objects.aggregate(
-            promedio_edad=Avg('edad'),
-            promedio_saldo=Avg('saldo')
-        )
+        # Ranking y promedios desde el índice en memoria (O(log n))
+        indice_saldos.sincronizar(self.version_datos[0])
+        percentil = indice_saldos.percentil(saldo)
+        promedios = indice_saldos.promedios()
         
         data = {
-            'cliente_id': cliente.cliente_id,
-            'edad': cliente.edad,
-            'genero': cliente.get_genero_display(),
-            'saldo': float(cliente.saldo),
-            'activo': cliente.activo,
-            'nivel_de_satisfaccion': cliente.nivel_de_satisfaccion,
-            'nivel_satisfaccion_texto': niveles_satisfaccion.get(cliente.nivel_de_satisfaccion, 'Desconocido'),
+            'cliente_id': cliente['cliente_id'],
+            'edad': cliente['edad'],
+            'genero': cliente['genero_display'],
+            'saldo': float(saldo),
+            'activo': cliente['activo'],
+            'nivel_de_satisfaccion': cliente['nivel_de_satisfaccion'],
+            'nivel_satisfaccion_texto': niveles_satisfaccion.get(cliente['nivel_de_satisfaccion'], 'Desconocido'),
             'ranking_saldo': f'Top {percentil}%',
             'comparacion_promedio': {
                 'edad': {
-                    'cliente': cliente.edad,
+                    'cliente': cliente['edad'],
                     'promedio': round(float(promedios['promedio_edad'] or 0), 1),
-                    'diferencia': round(cliente.edad - float(promedios['promedio_edad'] or 0), 1)
+                    'diferencia': round(cliente['edad'] - float(promedios['promedio_edad'] or 0), 1)
                 },
                 'saldo': {
-                    'cliente': float(cliente.saldo),
+                    'cliente': float(saldo),
                     'promedio': round(float(promedios['promedio_saldo'] or 0), 2),
-                    'diferencia': round(float(cliente.saldo) - float(promedios['promedio_saldo'] or 0), 2)
+                    'diferencia': round(float(saldo) - float(promedios['promedio_saldo'] or 0), 2)
                 }
             }
         }
@@ -196,6 +289,9 @@ class ClienteViewSet(viewsets.ModelViewSet):
         - Análisis de satisfacción por género
         - Tendencias y promedios
         - Métricas de saldo (min, max, promedio, total)
+        - Clientes de alta rentabilidad (10% de mayor saldo), exacto
+        - Cuantiles de saldo (p50, p90, p99, umbral top 10%): aproximados, con
+          error relativo <= ``cuantiles_saldo.error_relativo`` (1%)
         """,
         responses={
             200: OpenApiResponse(
@@ -209,127 +305,362 @@ class ClienteViewSet(viewsets.ModelViewSet):
         throttle_classes=[StatsRateThrottle],
         url_path='estadisticas-generales'
     )
+    @respuesta_condicional
+    @respuesta_revalidada
     def estadisticas_generales(self, request):
         """Estadísticas generales del sistema con análisis avanzado"""
-        queryset = self.get_queryset()
+        # Totales y distribuciones desde el snapshot materializado (O(1))
+        snapshot = obtener_snapshot()
+        self.version_datos = (snapshot.version, snapshot.actualizado)
+        sketch = sketch_saldos.obtener(snapshot.version)
+        data = construir_respuesta(agregados_desde_snapshot(snapshot), self.get_queryset(), sketch)
         
-        # Básicas
-        total = queryset.count()
-        activos = queryset.filter(activo=True).count()
-        inactivos = queryset.filter(activo=False).count()
+        return Response(data)
+    
+    @extend_schema(
+        summary="Agregados por grupo",
+        description="""
+        Agrega los clientes en el servidor con un único GROUP BY.
+        
+        Reemplaza la descarga completa de clientes para construir histogramas:
+        la respuesta crece con la cantidad de grupos, no de clientes. Acepta los
+        mismos filtros que el listado (genero, activo, nivel_de_satisfaccion).
         
-        # Distribución por género
-        por_genero = {
-            'masculino': queryset.filter(genero='M').count(),
-            'femenino': queryset.filter(genero='F').count(),
+        Respuesta: `columnas` (dimensiones y métricas), `filas` y `total_grupos`.
+        """,
+        parameters=[
+            OpenApiParameter(
+                name='group_by', type=str,
+                description=f"Dimensiones separadas por coma: {', '.join(DIMENSIONES)}",
+            ),
+            OpenApiParameter(
+                name='metrics', type=str,
+                description=f"Métricas separadas por coma (por defecto count): {', '.join(METRICAS)}",
+            ),
+        ],
+        responses={
+            200: OpenApiResponse(description="Tabla compacta de agregados"),
+            400: OpenApiResponse(description="Dimensión o métrica no soportada"),
         }
+    )
+    @action(
+        detail=False,
+        methods=['get'],
+        throttle_classes=[StatsRateThrottle],
+        url_path='agregados'
+    )
+    @respuesta_revalidada
+    def agregados(self, request):
+        """Agregación por grupos (genero, activo, satisfacción, rangos de edad y saldo)"""
+        dimensiones, metricas = parsear_parametros(request.query_params)
+        queryset = self.filter_queryset(self.get_queryset())
         
-        # Distribución por nivel de satisfacción
-        por_satisfaccion = {}
-        niveles = {
-            1: 'muy_insatisfecho',
-            2: 'insatisfecho',
-            3: 'neutral',
-            4: 'satisfecho',
-            5: 'muy_satisfecho'
+        # La versión sale del mismo GROUP BY, para guardar el resultado bajo ella
+        data, self.version_datos = calcular_agregados_por_grupo(queryset, dimensiones, metricas, leer_version=True)
+        return Response(data)
+    
+    @extend_schema(
+        summary="Métricas de caché",
+        description="""
+        Aciertos, fallos y ocupación de las cachés de respuestas y de clientes en
+        el worker que atiende la petición (los contadores son por proceso). En
+        `estadisticas`, `obsoletas` cuenta las respuestas servidas mientras se
+        recalculaban, `vencidas` las que superaron la obsolescencia máxima y
+        `coalescidas` las que esperaron el mismo cálculo de otra petición.
+        """,
+        responses={200: OpenApiResponse(description="Métricas de caché del proceso")},
+    )
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=[IsAdminUser],
+        url_path='metricas-cache'
+    )
+    def metricas_cache(self, request):
+        """Métricas de las cachés de la API en este proceso"""
+        # Las estadísticas se guardan en el almacén de respuestas
+        return Response(resumen_metricas({
+            'respuestas': CACHE_RESPUESTAS, 'clientes': CACHE_CLIENTES, 'estadisticas': None, 'compresion': None,
+        }))
+    
+    @extend_schema(
+        summary="Calentar caché de clientes",
+        description=f"""
+        Carga en la caché por objeto los clientes indicados (por ejemplo, la
+        lista de clientes en riesgo antes de mostrarla), en una consulta por
+        cada {TAMANO_LOTE} IDs. Cuerpo: `{{"ids": [1, 2, 3]}}`, hasta {MAXIMO_CALENTAR} IDs.
+        Los IDs inexistentes se ignoran.
+        """,
+        responses={
+            200: OpenApiResponse(description="Cantidad de clientes cargados"),
+            400: OpenApiResponse(description="Lista de IDs inválida"),
+        },
+    )
+    @action(
+        detail=False,
+        methods=['post'],
+        permission_classes=[IsAdminUser],
+        url_path='calentar-cache'
+    )
+    def calentar_cache(self, request):
+        """Carga en la caché por objeto una lista de clientes"""
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if (not isinstance(ids, list) or not ids
+                or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids)):
+            raise serializers.ValidationError({'ids': ['Se esperaba una lista no vacía de enteros']})
+        if len(ids) > MAXIMO_CALENTAR:
+            raise serializers.ValidationError({'ids': [f'Máximo {MAXIMO_CALENTAR} IDs por solicitud']})
+        return Response({'calentados': len(cache_clientes.calentar(ids))})
+    
+    @extend_schema(
+        summary="Cambios desde una secuencia",
+        description="""
+        Sincronización incremental: devuelve los clientes creados o modificados y
+        los IDs eliminados después de la secuencia `desde`.
+        
+        Sin `desde` devuelve todos los clientes. Si hay más cambios que `limite`,
+        `siguiente` trae la URL de la página siguiente y `hasta` es null; en la
+        última página `hasta` es la secuencia a enviar como `desde` en la
+        próxima sincronización. Aplicar primero `eliminados` y luego `clientes`.
+        """,
+        parameters=[
+            OpenApiParameter(name='desde', type=int, description='Última secuencia sincronizada'),
+            OpenApiParameter(name='despues_de', type=int,
+                             description='cliente_id del último cambio recibido (lo completa `siguiente`)'),
+            OpenApiParameter(name='limite', type=int,
+                             description=f'Cambios por página (por defecto 1000, máx {LIMITE_MAXIMO})'),
+        ],
+        responses={
+            200: OpenApiResponse(
+                description="Cambios posteriores a la secuencia",
+                response={
+                    'type': 'object',
+                    'properties': {
+                        'hasta': {'type': 'integer', 'nullable': True},
+                        'siguiente': {'type': 'string', 'nullable': True},
+                        'clientes': {'type': 'array', 'items': {'type': 'object'}},
+                        'eliminados': {'type': 'array', 'items': {'type': 'integer'}},
+                    }
+                }
+            ),
+            400: OpenApiResponse(description="Parámetros inválidos"),
         }
-        for nivel, nombre in niveles.items():
-            por_satisfaccion[nombre] = queryset.filter(nivel_de_satisfaccion=nivel).count()
+    )
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='cambios'
+    )
+    @respuesta_condicional
+    def cambios(self, request):
+        """Clientes modificados y eliminados desde una secuencia de cambio"""
+        desde, despues_de, limite = parsear_consulta(request.query_params)
+        # La versión se lee antes que las filas: todo cambio hasta ella ya es visible
+        self.version_datos = obtener_version()
+        hasta = self.version_datos[0]
+        clientes, eliminados, ultimo = obtener_cambios(desde, despues_de, limite, hasta)
         
-        # Promedios y agregaciones
-        agregados = queryset.aggregate(
-            promedio_edad=Avg('edad'),
-            promedio_saldo=Avg('saldo'),
-            saldo_total=Sum('saldo'),
-            saldo_max=Max('saldo'),
-            saldo_min=Min('saldo'),
-            edad_max=Max('edad'),
-            edad_min=Min('edad'),
-        )
+        siguiente = None
+        if ultimo is not None:
+            siguiente = replace_query_param(request.build_absolute_uri(), 'desde', ultimo[0])
+            siguiente = replace_query_param(siguiente, 'despues_de', ultimo[1])
         
-        # TOP 5 clientes por saldo
-        top_5_saldo = list(queryset.order_by('-saldo')[:5].values(
-            'cliente_id', 'edad', 'genero', 'saldo', 'nivel_de_satisfaccion'
-        ))
+        return Response({
+            'hasta': None if ultimo else hasta,
+            'siguiente': siguiente,
+            'clientes': self.get_serializer(clientes, many=True).data,
+            'eliminados': eliminados,
+        })
+    
+    @extend_schema(
+        summary="Exportar clientes (streaming)",
+        description="""
+        Exporta todos los clientes que cumplen los filtros del listado como NDJSON
+        (un objeto por línea, misma forma que el listado) o CSV.
         
-        # Análisis de satisfacción por género
-        satisfaccion_por_genero = {
-            'masculino': {
-                'promedio': queryset.filter(genero='M').aggregate(
-                    avg=Avg('nivel_de_satisfaccion'))['avg'] or 0,
-                'total': queryset.filter(genero='M').count()
-            },
-            'femenino': {
-                'promedio': queryset.filter(genero='F').aggregate(
-                    avg=Avg('nivel_de_satisfaccion'))['avg'] or 0,
-                'total': queryset.filter(genero='F').count()
-            }
+        La respuesta se transmite por bloques: la memoria del servidor no depende
+        del tamaño de la tabla y el primer byte llega de inmediato.
+        """,
+        parameters=[
+            OpenApiParameter(name='formato', type=str, enum=tuple(FORMATOS),
+                             description='Formato de salida (por defecto ndjson)'),
+            OpenApiParameter(name='genero', type=str, description='Filtrar por género (M/F)'),
+            OpenApiParameter(name='activo', type=bool, description='Filtrar por estado activo'),
+            OpenApiParameter(name='nivel_de_satisfaccion', type=int, description='Filtrar por nivel de satisfacción (1-5)'),
+        ],
+        responses={
+            (200, 'application/x-ndjson'): OpenApiTypes.STR,
+            (200, 'text/csv'): OpenApiTypes.STR,
         }
+    )
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='export'
+    )
+    def exportar(self, request):
+        """Exportación completa en streaming (NDJSON/CSV)"""
+        formato = request.query_params.get('formato', 'ndjson')
+        if formato not in FORMATOS:
+            raise serializers.ValidationError({
+                'formato': [f"Formato no soportado. Opciones: {', '.join(FORMATOS)}"]
+            })
+        queryset = self.filter_queryset(self.get_queryset())
+        
+        response = StreamingHttpResponse(GENERADORES[formato](queryset), content_type=FORMATOS[formato])
+        response['Content-Disposition'] = f'attachment; filename="clientes.{formato}"'
+        # No se cachea: gzip por bloques a medida que se generan
+        return comprimir_streaming(response, request)
+    
+    @extend_schema(
+        summary="Escritura masiva de clientes",
+        description=f"""
+        Crea, actualiza o elimina hasta {MAXIMO_FILAS} clientes en una sola petición.
+        
+        Cuerpo: `{{"operacion": "create|upsert|delete", "clientes": [...], "atomico": false}}`.
+        - **create**: cada elemento es un cliente como en el alta individual.
+        - **upsert**: los elementos con `cliente_id` actualizan los campos enviados
+          de ese cliente; los que no lo traen se crean.
+        - **delete**: lista de IDs (o de objetos con `cliente_id`).
         
-        # Distribución por rangos de edad
-        rangos_edad = {
-            '18-30': queryset.filter(edad__gte=18, edad__lte=30).count(),
-            '31-45': queryset.filter(edad__gte=31, edad__lte=45).count(),
-            '46-60': queryset.filter(edad__gte=46, edad__lte=60).count(),
-            '61-80': queryset.filter(edad__gte=61, edad__lte=80).count(),
-            '81+': queryset.filter(edad__gte=81).count(),
+        Las filas se validan con las mismas reglas y mensajes que el alta individual
+        y las válidas se aplican en una única transacción. Con `atomico` no se aplica
+        nada si alguna fila falla (400); si no, la respuesta es 200, o 207 cuando
+        alguna fila tiene errores. `resultados` trae una entrada por fila, en orden.
+        """,
+        request=OpenApiTypes.OBJECT,
+        responses={
+            200: OpenApiTypes.OBJECT,
+            207: OpenApiResponse(description='Aplicado parcialmente: algunas filas tienen errores'),
+            400: OpenApiResponse(description='Cuerpo inválido, o errores con atomico=true'),
         }
+    )
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='bulk',
+        throttle_classes=[BurstRateThrottle, WriteRateThrottle],
+    )
+    def bulk(self, request):
+        """Create/upsert/delete por lotes con resultado por fila"""
+        operacion, filas, atomico = parsear_solicitud(request.data)
+        usuario = request.user if request.user.is_authenticated else None
+        resultados, aplicado = aplicar(operacion, filas, usuario=usuario, atomico=atomico)
         
-        # Clientes con saldo alto (top 10%)
-        if total > 0:
-            threshold_top_10 = queryset.order_by('-saldo')[int(total * 0.1) if int(total * 0.1) > 0 else 0].saldo if total > 10 else 0
-            clientes_saldo_alto = queryset.filter(saldo__gte=threshold_top_10).count()
+        conteo = {estado: 0 for estado in ('creado', 'actualizado', 'eliminado', 'error')}
+        for resultado in resultados:
+            conteo[resultado['estado']] = conteo.get(resultado['estado'], 0) + 1
+        if not aplicado:
+            codigo = status.HTTP_400_BAD_REQUEST
+        elif conteo['error']:
+            codigo = status.HTTP_207_MULTI_STATUS
         else:
-            clientes_saldo_alto = 0
+            codigo = status.HTTP_200_OK
+        return Response({
+            'operacion': operacion,
+            'total': len(resultados),
+            'creados': conteo['creado'],
+            'actualizados': conteo['actualizado'],
+            'eliminados': conteo['eliminado'],
+            'errores': conteo['error'],
+            'resultados': resultados,
+        }, status=codigo)
+    
+    def _queryset_masivo(self, request):
+        """
+        Queryset filtrado de las acciones por filtro y si es solo simulación.
         
-        # Tasa de satisfacción (4-5 considerados satisfechos)
-        clientes_satisfechos = queryset.filter(nivel_de_satisfaccion__gte=4).count()
-        tasa_satisfaccion = round((clientes_satisfechos / total * 100) if total > 0 else 0, 2)
+        Sin ningún filtro del listado con valor se exige ``todos=true``, para no
+        modificar la tabla completa por omisión. Se decide con los datos ya
+        validados del filterset: django-filter ignora los valores vacíos
+        (``?genero=``), que entonces no cuentan como filtro.
+        """
+        opciones = {}
+        for parametro in ('dry_run', 'todos'):
+            try:
+                opciones[parametro] = serializers.BooleanField().run_validation(
+                    request.query_params.get(parametro, False)
+                )
+            except serializers.ValidationError as exc:
+                raise serializers.ValidationError({parametro: exc.detail})
         
-        data = {
-            # Totales
-            'total_clientes': total,
-            'clientes_activos': activos,
-            'clientes_inactivos': inactivos,
-            'porcentaje_activos': round((activos / total * 100) if total > 0 else 0, 2),
-            
-            # Distribuciones
-            'por_genero': por_genero,
-            'por_satisfaccion': por_satisfaccion,
-            'por_rango_edad': rangos_edad,
-            
-            # Promedios
-            'promedio_edad': round(float(agregados['promedio_edad'] or 0), 2),
-            'promedio_saldo': round(float(agregados['promedio_saldo'] or 0), 2),
-            
-            # Saldos
-            'saldo_total': round(float(agregados['saldo_total'] or 0), 2),
-            'saldo_maximo': round(float(agregados['saldo_max'] or 0), 2),
-            'saldo_minimo': round(float(agregados['saldo_min'] or 0), 2),
-            
-            # Edades
-            'edad_maxima': agregados['edad_max'],
-            'edad_minima': agregados['edad_min'],
-            
-            # Top 5
-            'top_5_clientes_por_saldo': top_5_saldo,
-            
-            # Análisis avanzado
-            'satisfaccion_por_genero': {
-                'masculino': {
-                    'promedio': round(float(satisfaccion_por_genero['masculino']['promedio']), 2),
-                    'total_clientes': satisfaccion_por_genero['masculino']['total']
-                },
-                'femenino': {
-                    'promedio': round(float(satisfaccion_por_genero['femenino']['promedio']), 2),
-                    'total_clientes': satisfaccion_por_genero['femenino']['total']
-                }
-            },
-            
-            # Métricas de negocio
-            'tasa_satisfaccion_general': tasa_satisfaccion,
-            'clientes_alta_rentabilidad': clientes_saldo_alto,
-            'porcentaje_alta_rentabilidad': round((clientes_saldo_alto / total * 100) if total > 0 else 0, 2),
-        }
+        queryset = self.get_queryset()
+        filterset = DjangoFilterBackend().get_filterset(request, queryset, self)
+        if not filterset.is_valid():
+            raise serializers.ValidationError(filterset.errors)
+        filtrado = any(valor not in (None, '') for valor in filterset.form.cleaned_data.values())
+        if not opciones['todos'] and not filtrado:
+            raise serializers.ValidationError({
+                'non_field_errors': ['Indique al menos un filtro o todos=true para afectar a todos los clientes']
+            })
+        return filterset.qs, opciones['dry_run']
+    
+    @extend_schema(
+        summary="Actualizar clientes por filtro",
+        description=f"""
+        Aplica los mismos valores a todos los clientes que cumplen los filtros del
+        listado, en una única sentencia UPDATE. Solo administradores.
         
-        return Response(data)
+        Cuerpo: `{{"cambios": {{"activo": false}}}}`, con campos entre
+        {', '.join(CAMPOS_ACTUALIZABLES)}; los valores se validan con las mismas
+        reglas que un PATCH. Con `dry_run=true` solo devuelve cuántos clientes
+        coinciden. Sin filtros se requiere `todos=true`.
+        """,
+        parameters=[
+            OpenApiParameter(name='genero', type=str, description='Filtrar por género (M/F)'),
+            OpenApiParameter(name='activo', type=bool, description='Filtrar por estado activo'),
+            OpenApiParameter(name='nivel_de_satisfaccion', type=int, description='Filtrar por nivel de satisfacción (1-5)'),
+            OpenApiParameter(name='dry_run', type=bool, description='Solo contar, sin modificar'),
+            OpenApiParameter(name='todos', type=bool, description='Confirmar que se afecta a todos los clientes'),
+        ],
+        request=OpenApiTypes.OBJECT,
+        responses={200: OpenApiTypes.OBJECT}
+    )
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='actualizar-masivo',
+        permission_classes=[IsAdminUser],
+        throttle_classes=[BurstRateThrottle, WriteRateThrottle],
+    )
+    def actualizar_masivo(self, request):
+        """UPDATE único sobre los clientes filtrados"""
+        cambios = validar_cambios(request.data.get('cambios') if isinstance(request.data, dict) else None)
+        queryset, dry_run = self._queryset_masivo(request)
+        if dry_run:
+            return Response({'dry_run': True, 'coincidentes': queryset.count(), 'actualizados': 0})
+        return Response({'dry_run': False, 'actualizados': queryset.update(**cambios)})
+    
+    @extend_schema(
+        summary="Eliminar clientes por filtro",
+        description="""
+        Elimina todos los clientes que cumplen los filtros del listado, por lotes
+        de IDs y sin cargar cada cliente. Solo administradores.
+        
+        Con `dry_run=true` solo devuelve cuántos clientes coinciden. Sin filtros
+        se requiere `todos=true`.
+        """,
+        parameters=[
+            OpenApiParameter(name='genero', type=str, description='Filtrar por género (M/F)'),
+            OpenApiParameter(name='activo', type=bool, description='Filtrar por estado activo'),
+            OpenApiParameter(name='nivel_de_satisfaccion', type=int, description='Filtrar por nivel de satisfacción (1-5)'),
+            OpenApiParameter(name='dry_run', type=bool, description='Solo contar, sin eliminar'),
+            OpenApiParameter(name='todos', type=bool, description='Confirmar que se afecta a todos los clientes'),
+        ],
+        request=None,
+        responses={200: OpenApiTypes.OBJECT}
+    )
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='eliminar-masivo',
+        permission_classes=[IsAdminUser],
+        throttle_classes=[BurstRateThrottle, WriteRateThrottle],
+    )
+    def eliminar_masivo(self, request):
+        """DELETE por lotes sobre los clientes filtrados"""
+        queryset, dry_run = self._queryset_masivo(request)
+        if dry_run:
+            return Response({'dry_run': True, 'coincidentes': queryset.count(), 'eliminados': 0})
+        eliminados, _ = queryset.delete()
+        return Response({'dry_run': False, 'eliminados': eliminados})